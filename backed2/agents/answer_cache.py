@@ -0,0 +1,194 @@
+# agents/answer_cache.py
+"""
+Answer cache for general_query.
+
+Questions are normalized ("What are your working hours?" and "what are the
+working hours" share a key; question words and word order are kept, so
+"Where is the clinic?" and "When is the clinic open?" don't) and answers
+kept in a TTL-bounded LRU. On an exact miss an
+optional embedder finds a close enough earlier question. Concurrent misses
+for the same key share one model call (single flight), in threads and in
+asyncio tasks alike.
+"""
+import asyncio
+import math
+import os
+import re
+import threading
+from cachetools import TTLCache
+from metrics import CACHE_REQUESTS
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.92"))
+USE_EMBEDDINGS = os.getenv("ANSWER_CACHE_EMBEDDINGS", "0") == "1"
+
+# Filler only: question words (what/when/where/who/which/how) decide the answer
+STOPWORDS = frozenset(
+    "a an and are can could does i is it me of please the tell us we you your yours".split()
+)
+
+
+def normalize_question(text: str) -> str:
+    tokens = re.findall(r"[a-z0-9+]+", str(text).lower())
+    kept = [t for t in tokens if t not in STOPWORDS] or tokens
+    return " ".join(kept)
+
+
+def cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class AnswerCache:
+    def __init__(self, maxsize: int = ANSWER_CACHE_SIZE, ttl: float = ANSWER_CACHE_TTL,
+                 embedder=None, threshold: float = SIMILARITY_THRESHOLD):
+        self.answers = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.vectors = TTLCache(maxsize=maxsize, ttl=ttl)   # key -> embedding
+        self.embedder = embedder
+        self.threshold = threshold
+        self._flights = {}          # key -> _Flight (threads)
+        self._async_flights = {}    # key -> asyncio.Future
+        self._lock = threading.Lock()
+
+    def _record(self, result: str):
+        CACHE_REQUESTS.inc(cache="general_query", result=result)
+
+    def lookup(self, question: str):
+        """Cached answer for question, or None. Exact keys only; never calls the embedder."""
+        with self._lock:
+            return self.answers.get(normalize_question(question))
+
+    def _similar(self, key: str):
+        if self.embedder is None:
+            return None, None
+        vector = self.embedder(key)
+        with self._lock:
+            best, best_score = None, self.threshold
+            for other, other_vector in self.vectors.items():
+                score = cosine(vector, other_vector)
+                if score >= best_score:
+                    best, best_score = other, score
+            return (self.answers.get(best) if best else None), vector
+
+    def _store(self, key: str, answer: str, vector):
+        with self._lock:
+            self.answers[key] = answer
+            if vector is not None:
+                self.vectors[key] = vector
+
+    def get_or_compute(self, question: str, compute) -> str:
+        """Answer from the cache, or from compute(question) shared by concurrent callers."""
+        key = normalize_question(question)
+        with self._lock:
+            answer = self.answers.get(key)
+            if answer is None:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+        if answer is not None:
+            self._record("hit")
+            return answer
+
+        if not leader:
+            self._record("coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            answer, vector = self._similar(key)
+            if answer is not None:
+                self._record("similar")
+            else:
+                self._record("miss")
+                answer = compute(question)
+                self._store(key, answer, vector)
+            flight.value = answer
+            return answer
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    async def aget_or_compute(self, question: str, acompute) -> str:
+        key = normalize_question(question)
+        with self._lock:
+            answer = self.answers.get(key)
+        if answer is not None:
+            self._record("hit")
+            return answer
+
+        future = self._async_flights.get(key)
+        if future is not None and not future.done() and future.get_loop() is asyncio.get_running_loop():
+            self._record("coalesced")
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._async_flights[key] = future
+        try:
+            if self.embedder is None:
+                answer, vector = None, None
+            else:
+                # The embedder is a blocking (network) call; keep it off the loop
+                answer, vector = await loop.run_in_executor(None, self._similar, key)
+            if answer is not None:
+                self._record("similar")
+            else:
+                self._record("miss")
+                answer = await acompute(question)
+                self._store(key, answer, vector)
+            future.set_result(answer)
+            return answer
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()   # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            if self._async_flights.get(key) is future:
+                del self._async_flights[key]
+
+    def clear(self):
+        with self._lock:
+            self.answers.clear()
+            self.vectors.clear()
+
+
+def _default_embedder():
+    if not USE_EMBEDDINGS:
+        return None
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    model = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+    return model.embed_query
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache(embedder=_default_embedder())
+    return _cache
+
+
+def set_answer_cache(cache: AnswerCache):
+    """Swap the cache (tests and benchmarks use a fresh one or a fake embedder)."""
+    global _cache
+    _cache = cache
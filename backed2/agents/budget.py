@@ -0,0 +1,173 @@
+# agents/budget.py
+"""
+Per-turn budgets for the chatbot <-> tools loop, and direct tool replies.
+
+Each turn may make at most TURN_MAX_LLM_CALLS chatbot calls and
+TURN_MAX_TOOL_CALLS tool calls, and should finish within TURN_MAX_SECONDS.
+Each chatbot call gets only the seconds left in the turn as its timeout.
+When a budget runs out the turn ends in `budget_exhausted` with what was
+found so far instead of another Gemini round trip. Booking, cancelling and
+rescheduling results are deterministic, so `direct_reply` answers them
+from a template without a second LLM pass.
+"""
+import json
+import os
+import time
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from metrics import TURN_EXITS
+
+MAX_LLM_CALLS = int(os.getenv("TURN_MAX_LLM_CALLS", "4"))
+MAX_TOOL_CALLS = int(os.getenv("TURN_MAX_TOOL_CALLS", "6"))
+MAX_SECONDS = float(os.getenv("TURN_MAX_SECONDS", "30"))
+
+DIRECT_TOOLS = {"book_appointment", "cancel_appointment", "reschedule_appointment"}
+
+
+def new_turn() -> dict:
+    """State fields that reset at the start of every turn."""
+    return {"llm_calls": 0, "tool_calls": 0, "turn_started": time.time(), "timed_out": False}
+
+
+def count_call(state, message) -> dict:
+    """State update for one chatbot call that produced `message`."""
+    return {
+        "llm_calls": state.get("llm_calls", 0) + 1,
+        "tool_calls": state.get("tool_calls", 0) + len(getattr(message, "tool_calls", None) or ()),
+    }
+
+
+def remaining(state) -> float:
+    """Seconds left of this turn's TURN_MAX_SECONDS, never below 0."""
+    started = state.get("turn_started")
+    if started is None:
+        return MAX_SECONDS
+    return max(0.0, MAX_SECONDS - (time.time() - started))
+
+
+def exhausted(state, next_step: str):
+    """Why the turn can't take `next_step` ("tools" or "chatbot"), or None."""
+    if next_step == "tools" and state.get("tool_calls", 0) > MAX_TOOL_CALLS:
+        return "tool_calls"
+    if next_step == "chatbot" and state.get("llm_calls", 0) >= MAX_LLM_CALLS:
+        return "llm_calls"
+    started = state.get("turn_started")
+    if started is not None and time.time() - started > MAX_SECONDS:
+        return "time"
+    return None
+
+
+def _last_ai(messages: list):
+    for message in reversed(messages):
+        if isinstance(message, AIMessage):
+            return message
+    return None
+
+
+def _results(messages: list) -> list:
+    """ToolMessages answering the last AI message, oldest first."""
+    out = []
+    for message in reversed(messages):
+        if not isinstance(message, ToolMessage):
+            break
+        out.append(message)
+    return out[::-1]
+
+
+def _turn_results(messages: list) -> list:
+    """(ToolMessage, call args) pairs produced since the last user message."""
+    args, out = {}, []
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        if isinstance(message, AIMessage):
+            args.update((call["id"], call["args"]) for call in message.tool_calls or ())
+        elif isinstance(message, ToolMessage):
+            out.append(message)
+    return [(m, args.get(m.tool_call_id, {})) for m in reversed(out)]
+
+
+def _raw(message: ToolMessage):
+    """The tool's raw result: the artifact, else the JSON first line of the compact text."""
+    if isinstance(message.artifact, dict):
+        return message.artifact
+    first = str(message.content).split("\n", 1)[0]
+    try:
+        value = json.loads(first)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _render(message: ToolMessage, args: dict):
+    from agents.router import render_reply
+    result = _raw(message)
+    if result is None:
+        return None
+    try:
+        return render_reply(message.name, args, result)
+    except KeyError:
+        return None   # the model left out an argument the template needs
+
+
+def _direct_text(state):
+    messages = state["messages"]
+    ai, results = _last_ai(messages), _results(messages)
+    if ai is None or not results or not all(r.name in DIRECT_TOOLS for r in results):
+        return None
+    args = {call["id"]: call["args"] for call in ai.tool_calls}
+    replies = [_render(r, args.get(r.tool_call_id, {})) for r in results]
+    if any(reply is None for reply in replies):
+        return None
+    return "\n".join(replies)
+
+
+def route_after_chatbot(state):
+    """Replaces tools_condition: END, "tools", or "budget_exhausted"."""
+    if state.get("timed_out"):
+        return "budget_exhausted"
+    ai = state["messages"][-1]
+    if not getattr(ai, "tool_calls", None):
+        return "end"
+    return "budget_exhausted" if exhausted(state, "tools") else "tools"
+
+
+def route_after_tools(state):
+    if _direct_text(state) is not None:
+        return "direct_reply"
+    return "budget_exhausted" if exhausted(state, "chatbot") else "chatbot"
+
+
+def direct_reply(state):
+    """Graph node: answer deterministic tool results from a template."""
+    TURN_EXITS.inc(exit="direct")
+    return {"messages": [AIMessage(content=_direct_text(state))]}
+
+
+def budget_exhausted(state):
+    """Graph node: end the turn with what the tools found so far."""
+    messages = state["messages"]
+    last = messages[-1]
+    if state.get("timed_out"):
+        reason = "time"
+    else:
+        reason = exhausted(state, "tools" if getattr(last, "tool_calls", None) else "chatbot") or "time"
+    TURN_EXITS.inc(exit=f"budget:{reason}")
+
+    out = []
+    # Tool calls that won't run still need an answer, or the next turn's
+    # history is rejected by the model
+    for call in getattr(last, "tool_calls", None) or ():
+        out.append(ToolMessage(content="Not run: turn budget exhausted", tool_call_id=call["id"], name=call["name"]))
+
+    found = {}   # a looping model repeats the same call; show each result once
+    for result, args in _turn_results(messages):
+        text = _render(result, args) or str(result.content)
+        found[text if len(text) <= 600 else text[:600] + " …"] = None
+    found = list(found)[-3:]
+
+    text = "I couldn't finish that within the limits for one reply."
+    if found:
+        text += " Here is what I found so far:\n" + "\n".join(found)
+    text += "\nPlease narrow the request or ask again to continue."
+    out.append(AIMessage(content=text))
+    return {"messages": out}
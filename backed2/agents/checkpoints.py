@@ -0,0 +1,188 @@
+# agents/checkpoints.py
+"""
+Retention for the MongoDBSaver checkpoint collections.
+
+- expire_idle_threads(): delete every checkpoint and write of threads with no
+  new checkpoint for `idle_days`.
+- prune_thread(): keep the newest `keep_last` checkpoints of a thread, delete
+  the rest with their writes, and make the oldest kept one the new root.
+- compact_thread(): prune to `keep_last` and drop the pending writes of every
+  checkpoint except the latest, which is all a resume needs.
+
+run_maintenance() applies all three to every thread. The runtime runs it every
+CHECKPOINT_MAINTENANCE_INTERVAL seconds when that is set, or on demand:
+
+    python -m agents.checkpoints stats
+    python -m agents.checkpoints maintain [--keep-last 20] [--idle-days 30]
+    python -m agents.checkpoints compact --thread <thread_id> [--keep-last 1]
+"""
+import argparse
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+
+KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "20"))
+IDLE_DAYS = float(os.getenv("CHECKPOINT_IDLE_DAYS", "30"))
+MAINTENANCE_INTERVAL = float(os.getenv("CHECKPOINT_MAINTENANCE_INTERVAL", "0"))
+BATCH = 500
+
+
+def _collections(checkpointer):
+    return checkpointer.checkpoint_collection, checkpointer.writes_collection
+
+
+def expire_idle_threads(checkpointer, idle_days: float = IDLE_DAYS) -> int:
+    """Delete threads whose newest checkpoint is older than idle_days.
+
+    Checkpoint documents are upserted, so their ObjectId holds the time the
+    checkpoint was written; no extra timestamp field is needed.
+    """
+    checkpoints, writes = _collections(checkpointer)
+    cutoff = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(days=idle_days))
+    idle = checkpoints.aggregate([
+        {"$group": {"_id": "$thread_id", "last": {"$max": "$_id"}}},
+        {"$match": {"last": {"$lt": cutoff}}},
+        {"$project": {"_id": 1}},
+    ], allowDiskUse=True)
+
+    expired, batch = 0, []
+    for doc in idle:
+        batch.append(doc["_id"])
+        if len(batch) >= BATCH:
+            expired += _delete_threads(checkpoints, writes, batch)
+            batch = []
+    if batch:
+        expired += _delete_threads(checkpoints, writes, batch)
+    return expired
+
+
+def _delete_threads(checkpoints, writes, thread_ids: list) -> int:
+    checkpoints.delete_many({"thread_id": {"$in": thread_ids}})
+    writes.delete_many({"thread_id": {"$in": thread_ids}})
+    return len(thread_ids)
+
+
+def _namespaces(checkpoints, thread_id: str) -> list:
+    return checkpoints.distinct("checkpoint_ns", {"thread_id": thread_id})
+
+
+def prune_thread(checkpointer, thread_id: str, keep_last: int = KEEP_LAST) -> int:
+    """Keep the newest keep_last checkpoints per namespace; returns how many were deleted."""
+    checkpoints, writes = _collections(checkpointer)
+    deleted = 0
+    for ns in _namespaces(checkpoints, thread_id):
+        scope = {"thread_id": thread_id, "checkpoint_ns": ns}
+        # checkpoint ids are time-ordered (uuid6), so this sort is newest first
+        ids = [d["checkpoint_id"] for d in checkpoints.find(scope, {"checkpoint_id": 1}).sort("checkpoint_id", -1)]
+        kept, old = ids[:keep_last], ids[keep_last:]
+        if not old:
+            continue
+        for start in range(0, len(old), BATCH):
+            chunk = old[start:start + BATCH]
+            checkpoints.delete_many({**scope, "checkpoint_id": {"$in": chunk}})
+            writes.delete_many({**scope, "checkpoint_id": {"$in": chunk}})
+        # The oldest kept checkpoint holds the full state; make it the root
+        checkpoints.update_one({**scope, "checkpoint_id": kept[-1]}, {"$set": {"parent_checkpoint_id": None}})
+        deleted += len(old)
+    return deleted
+
+
+def compact_thread(checkpointer, thread_id: str, keep_last: int = 1) -> int:
+    """Prune to keep_last and drop writes of everything but the latest checkpoint."""
+    checkpoints, writes = _collections(checkpointer)
+    deleted = prune_thread(checkpointer, thread_id, keep_last)
+    for ns in _namespaces(checkpoints, thread_id):
+        scope = {"thread_id": thread_id, "checkpoint_ns": ns}
+        latest = checkpoints.find_one(scope, {"checkpoint_id": 1}, sort=[("checkpoint_id", -1)])
+        if latest:
+            writes.delete_many({**scope, "checkpoint_id": {"$ne": latest["checkpoint_id"]}})
+    return deleted
+
+
+def run_maintenance(checkpointer, keep_last: int = KEEP_LAST, idle_days: float = IDLE_DAYS) -> dict:
+    """Expire idle threads, then prune and compact every remaining one."""
+    checkpoints, _ = _collections(checkpointer)
+    expired = expire_idle_threads(checkpointer, idle_days)
+    pruned = 0
+    threads = checkpoints.aggregate([{"$group": {"_id": "$thread_id", "n": {"$sum": 1}}}], allowDiskUse=True)
+    for doc in threads:
+        if doc["n"] > keep_last:
+            pruned += compact_thread(checkpointer, doc["_id"], keep_last)
+    return {"expired_threads": expired, "pruned_checkpoints": pruned}
+
+
+def stats(checkpointer) -> dict:
+    checkpoints, writes = _collections(checkpointer)
+    db = checkpoints.database
+    out = {}
+    for collection in (checkpoints, writes):
+        info = db.command("collStats", collection.name)
+        out[collection.name] = {"count": info.get("count", 0), "size_bytes": info.get("size", 0)}
+    out["threads"] = len(checkpoints.distinct("thread_id"))
+    return out
+
+
+class MaintenanceJob:
+    """Runs run_maintenance() every `interval` seconds on a daemon thread."""
+
+    def __init__(self, checkpointer, interval: float = MAINTENANCE_INTERVAL,
+                 keep_last: int = KEEP_LAST, idle_days: float = IDLE_DAYS):
+        self.checkpointer = checkpointer
+        self.interval, self.keep_last, self.idle_days = interval, keep_last, idle_days
+        self.last_result = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="checkpoint-maintenance", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.last_result = run_maintenance(self.checkpointer, self.keep_last, self.idle_days)
+            except Exception as e:
+                self.last_result = {"error": str(e)}
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+
+def job_from_env(checkpointer):
+    if MAINTENANCE_INTERVAL <= 0:
+        return None
+    return MaintenanceJob(checkpointer).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint retention and compaction")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats")
+    maintain = sub.add_parser("maintain")
+    maintain.add_argument("--keep-last", type=int, default=KEEP_LAST)
+    maintain.add_argument("--idle-days", type=float, default=IDLE_DAYS)
+    compact = sub.add_parser("compact")
+    compact.add_argument("--thread", required=True)
+    compact.add_argument("--keep-last", type=int, default=1)
+    args = parser.parse_args()
+
+    from agents.runtime import get_runtime, shutdown_runtime
+    from db.connection import close_client
+
+    checkpointer = get_runtime().checkpointer
+    try:
+        if args.command == "stats":
+            print(stats(checkpointer))
+        elif args.command == "maintain":
+            print(run_maintenance(checkpointer, args.keep_last, args.idle_days))
+        else:
+            print(f"✅ Deleted {compact_thread(checkpointer, args.thread, args.keep_last)} checkpoints from {args.thread}")
+    finally:
+        shutdown_runtime()
+        close_client()
+
+
+if __name__ == "__main__":
+    main()
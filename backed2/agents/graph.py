@@ -1,37 +1,169 @@
-from agents.state import State
-from agents.llm_config import llm  
-from agents.tools import (
-    book_appointment, 
-    reschedule_appointment, cancel_appointment, general_query, check_availability,list_doctors,query_database
-)
-from langgraph.graph import StateGraph, START
-from langgraph.checkpoint.mongodb import MongoDBSaver
-
-from langgraph.prebuilt import ToolNode, tools_condition
-
-tools = [
-    book_appointment,
-    reschedule_appointment,
-    check_availability,
-    cancel_appointment,
-    general_query,
-    list_doctors,
-    query_database,
-]
-
-llm_with_tools = llm.bind_tools(tools)
-
-def chatbot(state: State):
-    message = llm_with_tools.invoke(state["messages"])
-    return {"messages": [message]}
+import asyncio
+import os
+import threading
+from agents.llm_config import get_llm, timeout_errors
+from metrics import span, timed, instrument_tool, record_llm_usage, NODE_SECONDS, LLM_SECONDS, SCHEMA_TOKENS
+
+# Heavy imports (langgraph, langchain tools, the Gemini client, Mongo) happen
+# on first use, not when this module is imported.
+
+CHECKPOINT_DURABILITY = os.getenv("CHECKPOINT_DURABILITY", "exit")
+
+_tools = None
+_llm_with_tools = None
+_lock = threading.Lock()
+
+
+def get_tools() -> list:
+    """The tool set, imported and instrumented on first use."""
+    global _tools
+    if _tools is None:
+        with _lock:
+            if _tools is None:
+                from agents.tools import (
+                    book_appointment,
+                    reschedule_appointment, cancel_appointment, general_query, check_availability,list_doctors,query_database,
+                    suggest_slots,
+                )
+                tools = [
+                    book_appointment,
+                    reschedule_appointment,
+                    check_availability,
+                    cancel_appointment,
+                    general_query,
+                    list_doctors,
+                    query_database,
+                    suggest_slots,
+                ]
+                for t in tools:
+                    instrument_tool(t)
+                _tools = tools
+    return _tools
+
+
+def _bound_tools():
+    """Per-tool schemas for the current name index, and the bound variants built from them."""
+    global _llm_with_tools
+    from agents.names import get_names, tool_schemas
+    from agents.tool_select import schema_tokens
+    names = get_names()
+    # Rebuild when the doctor/specialization lists change, so the enums in the
+    # tool schemas track the data
+    if _llm_with_tools is None or _llm_with_tools["version"] != names.version:
+        tools = get_tools()
+        schemas = tool_schemas(tools, {
+            "doctor_name": names.doctors.names,
+            "specialization": names.specializations.names,
+        })
+        _llm_with_tools = {
+            "version": names.version,
+            "schemas": {t.name: schema for t, schema in zip(tools, schemas)},
+            "tokens": {t.name: schema_tokens(schema) for t, schema in zip(tools, schemas)},
+            "variants": {},
+        }
+    return _llm_with_tools
+
+
+def get_llm_with_tools(tool_names: tuple = None):
+    """
+    The Gemini client with tool schemas bound: all tools, or only
+    `tool_names`. Each subset is bound once and reused.
+    """
+    bound = _bound_tools()
+    key = tool_names or tuple(bound["schemas"])
+    variant = bound["variants"].get(key)
+    if variant is None:
+        variant = get_llm().bind_tools([bound["schemas"][name] for name in key])
+        bound["variants"][key] = variant
+    return variant
+
+
+def _select(state):
+    """Tools to bind for this chatbot call, recording the schema tokens sent and saved."""
+    from agents.tool_select import select_tools
+    tool_names = select_tools(state)
+    tokens = _bound_tools()["tokens"]
+    sent = sum(tokens[name] for name in tool_names) if tool_names else sum(tokens.values())
+    SCHEMA_TOKENS.inc(sent, kind="sent")
+    SCHEMA_TOKENS.inc(sum(tokens.values()) - sent, kind="saved")
+    return tool_names, ("subset" if tool_names else "all")
+
+
+def __getattr__(name):
+    # Old module-level names
+    if name == "tools":
+        return get_tools()
+    if name == "llm_with_tools":
+        return get_llm_with_tools()
+    raise AttributeError(name)
+
+
+def _out_of_time(state):
+    """
+    Chatbot update when the model call would run past TURN_MAX_SECONDS: no
+    message, and route_after_chatbot sends the turn to budget_exhausted,
+    which writes the reply (and is what streaming UIs show).
+    """
+    return {"timed_out": True, "llm_calls": state.get("llm_calls", 0) + 1}
+
+@timed(NODE_SECONDS, node="chatbot")
+def chatbot(state):
+    from agents.history import build_prompt
+    from agents.budget import count_call, remaining
+    seconds = remaining(state)
+    if seconds <= 0:
+        return _out_of_time(state)
+    tool_names, tool_set = _select(state)
+    try:
+        with span(LLM_SECONDS, call="chatbot", tools=tool_set):
+            message = get_llm_with_tools(tool_names).invoke(build_prompt(state, SYSTEM_PROMPT), timeout=seconds)
+    except timeout_errors():
+        return _out_of_time(state)
+    return {"messages": [record_llm_usage(message, "chatbot")], **count_call(state, message)}
+
+@timed(NODE_SECONDS, node="chatbot")
+async def achatbot(state):
+    from agents.history import build_prompt
+    from agents.budget import count_call, remaining
+    seconds = remaining(state)
+    if seconds <= 0:
+        return _out_of_time(state)
+    tool_names, tool_set = _select(state)
+    try:
+        with span(LLM_SECONDS, call="chatbot", tools=tool_set):
+            message = await asyncio.wait_for(
+                get_llm_with_tools(tool_names).ainvoke(build_prompt(state, SYSTEM_PROMPT), timeout=seconds), seconds)
+    except timeout_errors():
+        return _out_of_time(state)
+    return {"messages": [record_llm_usage(message, "chatbot")], **count_call(state, message)}
 
 def build_graph():
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import StateGraph, START, END
+    from langgraph.prebuilt import ToolNode
+    from agents.state import State
+    from agents.history import make_summarize_node
+    from agents.router import fast_path, route_after_fast_path
+    from agents.budget import direct_reply, budget_exhausted, route_after_chatbot, route_after_tools
+
     builder = StateGraph(State)
-    builder.add_node("chatbot", chatbot)
-    builder.add_node("tools", ToolNode(tools=tools))
-    builder.add_edge(START, "chatbot")
-    builder.add_conditional_edges("chatbot", tools_condition)
-    builder.add_edge("tools", "chatbot")
+    builder.add_node("fast_path", timed(NODE_SECONDS, node="fast_path")(fast_path))
+    builder.add_node("summarize_history", timed(NODE_SECONDS, node="summarize_history")(make_summarize_node(get_llm())))
+    builder.add_node("chatbot", RunnableLambda(chatbot, afunc=achatbot, name="chatbot"))
+    builder.add_node("tools", ToolNode(tools=get_tools()))
+    builder.add_node("direct_reply", timed(NODE_SECONDS, node="direct_reply")(direct_reply))
+    builder.add_node("budget_exhausted", timed(NODE_SECONDS, node="budget_exhausted")(budget_exhausted))
+    builder.add_edge(START, "fast_path")
+    builder.add_conditional_edges("fast_path", route_after_fast_path, {"answered": END, "llm": "summarize_history"})
+    builder.add_edge("summarize_history", "chatbot")
+    # Bounded loop: chatbot -> tools -> chatbot until a reply, a direct
+    # templated answer, or an exhausted per-turn budget
+    builder.add_conditional_edges("chatbot", route_after_chatbot,
+                                  {"tools": "tools", "budget_exhausted": "budget_exhausted", "end": END})
+    builder.add_conditional_edges("tools", route_after_tools,
+                                  {"chatbot": "chatbot", "direct_reply": "direct_reply", "budget_exhausted": "budget_exhausted"})
+    builder.add_edge("direct_reply", END)
+    builder.add_edge("budget_exhausted", END)
     return builder
 
 def complie_graph_with_checkpointer(checkpointer):
@@ -43,32 +175,96 @@ You have access to tools for booking, rescheduling, canceling appointments, chec
 You can search any collection by name (e.g., 'doctor_availability', 'appointment').
 If the user does not specify a collection, choose the most relevant one.
 Always try a database search before saying something is unavailable.
+When a slot is taken, offer the suggested alternatives from the tool result (or call suggest_slots) instead of checking dates one by one.
 Be detailed, accurate, and concise.
 """
 
-def run_graph(user_input: str):
-    import os
-    from dotenv import load_dotenv
-    load_dotenv()
-
-    DB_URI = os.getenv("MONGO_URI")
-    if not DB_URI:
-        raise ValueError("❌ MONGO_URI not set.")
-
-    config = {"configurable": {"thread_id": "10"}}
-    with MongoDBSaver.from_conn_string(DB_URI) as mongo_checkpointer:
-        graph_with_mongo = complie_graph_with_checkpointer(mongo_checkpointer)
-        
-        state = State(
-            messages=[
-                { "role": "system", "content": SYSTEM_PROMPT },
-                { "role": "user", "content": user_input }],
-            thread_id="10"
-        )
-
-        reply = None
-        for event in graph_with_mongo.stream(state, config=config, stream_mode='values'):
-            if "messages" in event:
-                reply = event["messages"][-1]
-
-        return reply.content if reply else "❌ No reply from model."
+def _turn_input(user_input: str, thread_id: str):
+    from agents.budget import new_turn
+    # Only the new user message is sent; the system prompt is added per call
+    # in `chatbot` and older turns live in the checkpointed summary.
+    config = {"configurable": {"thread_id": thread_id}}
+    state = {
+        "messages": [{ "role": "user", "content": user_input }],
+        "thread_id": thread_id,
+        **new_turn(),
+    }
+    return state, config
+
+
+def _run_options() -> dict:
+    # Persist one checkpoint per turn instead of one per super-step
+    return {"durability": CHECKPOINT_DURABILITY}
+
+
+def _reply_text(result) -> str:
+    messages = result.get("messages") if result else None
+    return messages[-1].content if messages else "❌ No reply from model."
+
+
+def run_graph(user_input: str, thread_id: str):
+    from agents.runtime import get_runtime
+
+    state, config = _turn_input(user_input, thread_id)
+    return _reply_text(get_runtime().graph.invoke(state, config=config, **_run_options()))
+
+
+async def arun_graph(user_input: str, thread_id: str):
+    """Async run_graph; blocking tools and Mongo calls run on the runtime executor."""
+    from agents.runtime import get_runtime
+
+    state, config = _turn_input(user_input, thread_id)
+    return _reply_text(await get_runtime().graph.ainvoke(state, config=config, **_run_options()))
+
+
+def _text(content) -> str:
+    """Text of a message chunk; Gemini may send a list of content parts."""
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+
+def _stream_events(mode, chunk):
+    if mode == "messages":
+        message, metadata = chunk
+        # Only the chatbot's tokens are the reply; summaries and
+        # general_query run their own LLM calls underneath.
+        if metadata.get("langgraph_node") == "chatbot" and message.type == "AIMessageChunk":
+            text = _text(message.content)
+            if text:
+                yield ("token", text)
+    else:
+        for node, update in chunk.items():
+            if not update:
+                continue
+            if node == "chatbot":
+                # A timed-out call adds no message; budget_exhausted replies next
+                for message in update.get("messages", ()):
+                    for call in getattr(message, "tool_calls", None) or ():
+                        yield ("tool", call["name"])
+            elif node in ("fast_path", "direct_reply", "budget_exhausted"):
+                yield ("token", update["messages"][-1].content)
+
+
+def stream_graph(user_input: str, thread_id: str):
+    """
+    Run one turn and yield events as they are produced:
+
+        ("token", text)  - a piece of the assistant reply
+        ("tool", name)   - a tool the model decided to call
+    """
+    from agents.runtime import get_runtime
+
+    state, config = _turn_input(user_input, thread_id)
+    for mode, chunk in get_runtime().graph.stream(state, config=config, stream_mode=["messages", "updates"], **_run_options()):
+        yield from _stream_events(mode, chunk)
+
+
+async def astream_graph(user_input: str, thread_id: str):
+    """Async stream_graph, yielding the same events."""
+    from agents.runtime import get_runtime
+
+    state, config = _turn_input(user_input, thread_id)
+    async for mode, chunk in get_runtime().graph.astream(state, config=config, stream_mode=["messages", "updates"], **_run_options()):
+        for event in _stream_events(mode, chunk):
+            yield event
@@ -1,12 +1,53 @@
+import asyncio
 import os
+import threading
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
 
 load_dotenv()
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",
-    temperature=0.2,
-    max_output_tokens=1024,
-    google_api_key=os.environ["GOOGLE_API_KEY"]
-)
+_llm = None
+_lock = threading.Lock()
+
+
+def get_llm():
+    """Create the Gemini client on first use."""
+    global _llm
+    if _llm is None:
+        with _lock:
+            if _llm is None:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+                from agents.budget import MAX_SECONDS
+
+                _llm = ChatGoogleGenerativeAI(
+                    model="gemini-2.0-flash",
+                    temperature=0.2,
+                    max_output_tokens=1024,
+                    # Upper bound; chatbot calls pass the time left in the turn
+                    timeout=MAX_SECONDS,
+                    google_api_key=os.environ["GOOGLE_API_KEY"]
+                )
+    return _llm
+
+
+def timeout_errors() -> tuple:
+    """Exceptions that mean a model call ran past its timeout."""
+    errors = [TimeoutError, asyncio.TimeoutError]
+    try:
+        from google.api_core.exceptions import DeadlineExceeded
+        errors.append(DeadlineExceeded)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+def set_llm(llm):
+    """Replace the model used by the agent (e.g. a fake in benchmarks)."""
+    global _llm
+    _llm = llm
+
+
+def __getattr__(name):
+    # `from agents.llm_config import llm` keeps working, but lazily
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(name)
@@ -0,0 +1,207 @@
+# agents/names.py
+"""
+Fuzzy resolution of doctor and specialization names.
+
+NameIndex keeps a trigram posting list and a phonetic key per token for a
+set of canonical names, so "dr jon do", "Smith" or "cardiologists" resolve
+to the stored spelling in microseconds. The doctor/specialization indexes
+are built from Mongo and refreshed every NAME_INDEX_TTL seconds, or
+immediately after invalidate_names().
+"""
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+
+NAME_INDEX_TTL = float(os.getenv("NAME_INDEX_TTL", "300"))
+MIN_SCORE = 0.45
+
+_TITLES = re.compile(r"\b(?:dr|doctor|prof|mr|mrs|ms)\b\.?", re.I)
+_SOUNDEX = str.maketrans("bfpvcgjkqsxzdtlmnr", "111122222222334556")
+
+
+def normalize(text: str) -> str:
+    text = _TITLES.sub(" ", str(text).lower())
+    text = re.sub(r"[^a-z0-9 ]+", " ", text)
+    return " ".join(text.split())
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def phonetic(token: str) -> str:
+    """Soundex code of one token"""
+    if not token:
+        return ""
+    digits = token.translate(_SOUNDEX)
+    code, last = token[0], digits[0]
+    for ch in digits[1:]:
+        if ch.isdigit() and ch != last:
+            code += ch
+        if ch not in "hw":
+            last = ch
+        if len(code) == 4:
+            break
+    return code.ljust(4, "0")
+
+
+def _stem(text: str) -> str:
+    # "cardiologists" -> "cardiologist", "dentists" -> "dentist"
+    return " ".join(t[:-1] if len(t) > 4 and t.endswith("s") and not t.endswith("ss") else t for t in text.split())
+
+
+class NameIndex:
+    def __init__(self, names=()):
+        self.names = []
+        self.exact = {}
+        self.grams = defaultdict(set)
+        self.sounds = defaultdict(set)
+        self.tokens = defaultdict(set)
+        for name in names:
+            self.add(name)
+
+    def add(self, name: str):
+        key = _stem(normalize(name))
+        if not key or key in self.exact:
+            return
+        i = len(self.names)
+        self.names.append(name)
+        self.exact[key] = i
+        for g in trigrams(key):
+            self.grams[g].add(i)
+        for token in key.split():
+            self.sounds[phonetic(token)].add(i)
+            self.tokens[token].add(i)
+
+    def _score(self, query: str, query_grams: set, query_sounds: set, i: int) -> float:
+        key = _stem(normalize(self.names[i]))
+        grams = trigrams(key)
+        score = len(query_grams & grams) / len(query_grams | grams)
+        tokens = key.split()
+        if query_sounds & {phonetic(t) for t in tokens}:
+            score += 0.2
+        if set(query.split()) <= set(tokens):
+            score += 0.3   # "smith" -> "jane smith"
+        return score
+
+    def resolve(self, query: str, min_score: float = MIN_SCORE):
+        """Canonical name for query, or None if nothing is close enough or it is ambiguous."""
+        q = _stem(normalize(query or ""))
+        if not q:
+            return None
+        if q in self.exact:
+            return self.names[self.exact[q]]
+
+        q_grams = trigrams(q)
+        q_sounds = {phonetic(t) for t in q.split()}
+        candidates = set()
+        for g in q_grams:
+            candidates |= self.grams.get(g, set())
+        for s in q_sounds:
+            candidates |= self.sounds.get(s, set())
+        if not candidates:
+            return None
+
+        scored = sorted(((self._score(q, q_grams, q_sounds, i), i) for i in candidates), reverse=True)
+        best, i = scored[0]
+        if best < min_score:
+            return None
+        if len(scored) > 1 and best - scored[1][0] < 0.05:
+            return None   # two equally good matches, e.g. "smith" with two Smiths
+        return self.names[i]
+
+
+class NameRegistry:
+    """Doctor and specialization indexes with TTL refresh and explicit invalidation."""
+
+    def __init__(self, loader, ttl: float = NAME_INDEX_TTL):
+        self.loader = loader
+        self.ttl = ttl
+        self.version = 0
+        self.doctors = NameIndex()
+        self.specializations = NameIndex()
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False):
+        if not force and time.monotonic() < self._expires:
+            return self
+        with self._lock:
+            if force or time.monotonic() >= self._expires:
+                doctors, specializations = self.loader()
+                self.doctors = NameIndex(sorted(doctors))
+                self.specializations = NameIndex(sorted(specializations))
+                self.version += 1
+                self._expires = time.monotonic() + self.ttl
+        return self
+
+    def invalidate(self):
+        self._expires = 0.0
+
+
+def _load_from_mongo():
+    from db.connection import get_appointments_collection
+    from db.schedule import get_templates_collection
+
+    doctors, specializations = set(), set()
+    for collection in (get_appointments_collection(), get_templates_collection()):
+        for field in ("doctor_name", "name"):
+            doctors.update(v for v in collection.distinct(field) if isinstance(v, str) and v.strip())
+        specializations.update(v for v in collection.distinct("specialization") if isinstance(v, str) and v.strip())
+    return doctors, specializations
+
+
+_registry = NameRegistry(_load_from_mongo)
+
+
+def get_names() -> NameRegistry:
+    return _registry.refresh()
+
+
+def invalidate_names():
+    """Call after doctors or specializations change."""
+    _registry.invalidate()
+
+
+def known_doctor(name: str):
+    """Stored spelling of a doctor's name, or None if it matches no doctor or more than one."""
+    if not name:
+        return None
+    return get_names().doctors.resolve(name)
+
+
+def resolve_doctor(name: str) -> str:
+    """Stored spelling of a doctor's name, or the input unchanged if unknown."""
+    return known_doctor(name) or name
+
+
+def resolve_specialization(specialization: str) -> str:
+    if not specialization:
+        return specialization
+    return get_names().specializations.resolve(specialization) or specialization
+
+
+MAX_ENUM = 200
+
+
+def tool_schemas(tools: list, enums: dict) -> list:
+    """
+    OpenAI-style schemas for `tools` with `enum` lists added to string
+    parameters named in `enums` (e.g. {"doctor_name": [...]}), so the model
+    picks from the names that exist right now.
+    """
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    schemas = []
+    for t in tools:
+        schema = convert_to_openai_tool(t)
+        properties = schema["function"].get("parameters", {}).get("properties", {})
+        for field, values in enums.items():
+            prop = properties.get(field)
+            if prop is not None and prop.get("type") == "string" and 0 < len(values) <= MAX_ENUM:
+                prop["enum"] = list(values)
+        schemas.append(schema)
+    return schemas
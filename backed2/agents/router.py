@@ -0,0 +1,164 @@
+# agents/router.py
+"""
+Deterministic fast path in front of the chatbot node.
+
+Messages that fully match one of a few structured patterns are sent straight
+to the tool and answered from a template. Anything else, or any match whose
+slots are incomplete, goes to the LLM as before. Bookings and cancellations
+only take the fast path when the request itself names the patient ("for
+Ann Lee" or "my name is Ann Lee"); earlier turns are never guessed from.
+Likewise the doctor must be exactly one existing doctor: "Dr Smith" with two
+Smiths, or a name nobody has, is left to the LLM to ask about.
+"""
+import re
+from langchain_core.messages import AIMessage, HumanMessage
+from agents.tools import list_doctors, check_availability, cancel_appointment, book_appointment
+from agents.serialize import raw_result
+from agents.names import known_doctor
+
+DATE = r"(?P<date>\d{2}-\d{2}-\d{4})"
+TIME = r"(?P<time>\d{1,2}[:.]\d{2})"
+DOCTOR = r"(?:dr\.?\s+)?(?P<doctor>[a-z][a-z .'-]*?)"
+PATIENT = r"(?P<patient>[a-z][a-z .'-]*?)"
+# "My name is Ann Lee, book ..." / "... at 10:00. My name is Ann Lee"
+NAME_CLAUSE = re.compile(
+    r"(?:^|[,.;!]\s*)my name is\s+(?P<patient>[a-z][a-z'-]*(?:\s+[a-z][a-z'-]*)?)\s*(?:[,.;!]\s*|$)", re.I)
+
+PATTERNS = [
+    ("list_doctors", re.compile(
+        r"^(?:please\s+)?(?:list|show)(?:\s+me)?(?:\s+all)?(?:\s+the)?(?:\s+(?P<specialization>[a-z ]+?))?\s+doctors?[.?!]?$", re.I)),
+    ("list_doctors", re.compile(
+        r"^(?:please\s+)?(?:list|show)(?:\s+me)?(?:\s+all)?(?:\s+the)?\s+(?P<specialization>[a-z]+?(?:ist|ian|eon))s[.?!]?$", re.I)),
+    ("check_availability", re.compile(
+        rf"^is\s+{DOCTOR}\s+(?:available|free)\s+on\s+{DATE}[.?!]?$", re.I)),
+    ("check_availability", re.compile(
+        rf"^check\s+(?:the\s+)?availability\s+(?:of|for)\s+{DOCTOR}\s+on\s+{DATE}[.?!]?$", re.I)),
+    ("cancel_appointment", re.compile(
+        rf"^(?:please\s+)?cancel\s+(?:my\s+|the\s+)?(?:appointment\s+)?(?:at\s+)?{TIME}\s+(?:appointment\s+)?with\s+{DOCTOR}\s+on\s+{DATE}(?:\s+for\s+{PATIENT})?[.!]?$", re.I)),
+    ("book_appointment", re.compile(
+        rf"^(?:please\s+)?book\s+(?:an?\s+)?(?:appointment\s+|slot\s+)?(?:for\s+{PATIENT}\s+)?with\s+{DOCTOR}\s+on\s+{DATE}\s+at\s+{TIME}[.!]?$", re.I)),
+]
+
+TOOLS = {
+    "list_doctors": list_doctors,
+    "check_availability": check_availability,
+    "cancel_appointment": cancel_appointment,
+    "book_appointment": book_appointment,
+}
+
+
+def _clean(value):
+    return " ".join(value.split()).strip(" .") if value else value
+
+
+def _split_name(text: str):
+    """(request without a "my name is ..." clause, the name or None)."""
+    m = NAME_CLAUSE.search(text)
+    if not m:
+        return text, None
+    return (text[:m.start()] + " " + text[m.end():]).strip(), _clean(m.group("patient"))
+
+
+def match_request(text: str):
+    """Return (tool_name, args) when the message is unambiguous, else None."""
+    text, named = _split_name(" ".join(text.split()))
+    for tool_name, pattern in PATTERNS:
+        m = pattern.match(text)
+        if not m:
+            continue
+        slots = {k: _clean(v) for k, v in m.groupdict().items()}
+
+        if tool_name == "list_doctors":
+            return tool_name, {"specialization": slots["specialization"]} if slots["specialization"] else {}
+        doctor = known_doctor(slots["doctor"])
+        if doctor is None:
+            return None
+        if tool_name == "check_availability":
+            return tool_name, {"doctor_name": doctor, "date": slots["date"]}
+
+        patient = slots.get("patient") or named
+        if not patient:
+            return None
+        return tool_name, {
+            "patient_name": patient,
+            "doctor_name": doctor,
+            "date": slots["date"],
+            "time": slots["time"].replace(".", ":"),
+        }
+    return None
+
+
+def _suggestion_text(result: dict) -> str:
+    """Lines offering the nearest free slots from a tool result, if it has any."""
+    lines = []
+    if result.get("suggested"):
+        lines.append("Nearest free slots: " + ", ".join(f"{s['date']} at {s['time']}" for s in result["suggested"]))
+    if result.get("alternatives"):
+        lines.append("Other doctors: " + ", ".join(
+            f"Dr {s['doctor']} on {s['date']} at {s['time']}" for s in result["alternatives"]))
+    return "".join("\n" + line for line in lines)
+
+
+def render_reply(tool_name: str, args: dict, result: dict):
+    """Template for the tool result, or None to let the LLM handle it."""
+    if tool_name == "list_doctors":
+        if not result.get("success"):
+            return None
+        lines = [f"- {d.get('name', d)} ({d.get('specialization', '')})" for d in result["doctors"]]
+        heading = f"{args['specialization'].title()} doctors" if args.get("specialization") else "Our doctors"
+        return f"{heading}:\n" + "\n".join(lines)
+
+    if tool_name == "check_availability":
+        if "free_slots" in result:
+            if not result["free_slots"]:
+                return f"❌ Dr {args['doctor_name']} has no free slots on {args['date']}." + _suggestion_text(result)
+            return "\n".join(
+                f"Dr {args['doctor_name']} is free on {day} at: {', '.join(times)}"
+                for day, times in result["free_slots"].items()
+            )
+        if "success" in result:
+            return None
+        if result.get("available"):
+            return f"✅ Dr {args['doctor_name']} has no appointments on {args['date']}."
+        count = len(result.get("appointments", []))
+        return f"Dr {args['doctor_name']} already has {count} appointment(s) on {args['date']}."
+
+    if tool_name == "reschedule_appointment":
+        if result.get("success"):
+            return (f"✅ Moved {args['patient_name']}'s appointment with Dr {args['doctor_name']} "
+                    f"from {args['old_date']} {args['old_time']} to {args['new_date']} at {args['new_time']}.")
+        return f"❌ {result.get('message', 'That appointment could not be rescheduled')}." + _suggestion_text(result)
+
+    when = f"Dr {args['doctor_name']} on {args['date']} at {args['time']}"
+    if tool_name == "cancel_appointment":
+        if result.get("success"):
+            return f"✅ Cancelled {args['patient_name']}'s appointment with {when}."
+        return f"❌ No appointment found for {args['patient_name']} with {when}."
+
+    if tool_name == "book_appointment":
+        if result.get("success"):
+            return f"✅ Booked {args['patient_name']} with {when}."
+        return f"❌ {result.get('message', 'That slot could not be booked')}." + _suggestion_text(result)
+    return None
+
+
+def fast_path(state):
+    """Graph node: answer structured requests without calling the LLM."""
+    messages = state["messages"]
+    if not messages or not isinstance(messages[-1], HumanMessage):
+        return {}
+
+    matched = match_request(messages[-1].content)
+    if matched is None:
+        return {}
+
+    tool_name, args = matched
+    reply = render_reply(tool_name, args, raw_result(TOOLS[tool_name], args))
+    if reply is None:
+        return {}
+    return {"messages": [AIMessage(content=reply)]}
+
+
+def route_after_fast_path(state):
+    """END when the fast path answered, otherwise continue to the LLM."""
+    return "answered" if isinstance(state["messages"][-1], AIMessage) else "llm"
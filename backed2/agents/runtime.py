@@ -0,0 +1,156 @@
+# agents/runtime.py
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langgraph.checkpoint.mongodb import MongoDBSaver
+
+from metrics import span, exporter_from_env, CHECKPOINT_SECONDS
+
+# Threads used for blocking work (pymongo, sync tools) on the async path.
+EXECUTOR_WORKERS = int(os.getenv("AGENT_EXECUTOR_WORKERS", os.getenv("MONGO_MAX_POOL_SIZE", "50")))
+
+
+class ExecutorMongoDBSaver(MongoDBSaver):
+    """MongoDBSaver whose async methods run the sync pymongo calls on a
+    bounded executor, with checkpoint reads and writes timed."""
+
+    def __init__(self, *args, executor=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.executor = executor
+
+    def get_tuple(self, config):
+        with span(CHECKPOINT_SECONDS, op="get_tuple"):
+            return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with span(CHECKPOINT_SECONDS, op="put"):
+            return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with span(CHECKPOINT_SECONDS, op="put_writes"):
+            return super().put_writes(config, writes, task_id, task_path)
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+
+    async def aget_tuple(self, config):
+        return await self._run(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await self._run(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await self._run(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await self._run(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await self._run(self.delete_thread, thread_id)
+
+
+class AgentRuntime:
+    """Process-wide holder for the checkpointer and compiled graph.
+
+    Opening a checkpointer and compiling the graph are the expensive parts of a
+    turn, so they are done once in ``startup()`` and reused until ``shutdown()``.
+    The Mongo client is db.connection's, shared with crud, reservations and the
+    cache; the runtime borrows it and leaves closing it to the process
+    (``close_client()`` on exit).
+    """
+
+    def __init__(self, checkpoint_db: str = None, executor_workers: int = EXECUTOR_WORKERS):
+        self.checkpoint_db = checkpoint_db or os.getenv("CHECKPOINT_DB", "checkpointing_db")
+        self.executor_workers = executor_workers
+        self.executor = None
+        self.exporter = None
+        self.maintenance = None
+        self.cache_invalidator = None
+        self.client = None
+        self.checkpointer = None
+        self.graph = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self.graph is not None
+
+    def startup(self):
+        """Create indexes, open the checkpointer and compile the graph."""
+        with self._lock:
+            if self.graph is not None:
+                return self
+
+            from db.connection import get_client
+            from db.indexes import ensure_indexes
+            from agents.graph import complie_graph_with_checkpointer
+            from agents.checkpoints import job_from_env
+            from db.cache import invalidator_from_env
+
+            ensure_indexes()
+            self.client = get_client()
+            self.executor = ThreadPoolExecutor(self.executor_workers, thread_name_prefix="agent-io")
+            self.checkpointer = ExecutorMongoDBSaver(self.client, db_name=self.checkpoint_db, executor=self.executor)
+            self.graph = complie_graph_with_checkpointer(self.checkpointer)
+            self.exporter = exporter_from_env()
+            self.maintenance = job_from_env(self.checkpointer)
+            self.cache_invalidator = invalidator_from_env()
+            return self
+
+    def shutdown(self):
+        """Stop the runtime's threads and release the compiled graph; the shared client stays open."""
+        with self._lock:
+            if self.maintenance is not None:
+                self.maintenance.stop()
+            if self.cache_invalidator is not None:
+                self.cache_invalidator.stop()
+            if self.exporter is not None:
+                self.exporter.stop()
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+            self.maintenance = None
+            self.cache_invalidator = None
+            self.exporter = None
+            self.executor = None
+            self.client = None
+            self.checkpointer = None
+            self.graph = None
+
+    def install_executor(self, loop: asyncio.AbstractEventLoop = None):
+        """Make the bounded executor the loop's default, so sync tools and
+        nodes run by ainvoke/astream share the same thread budget."""
+        (loop or asyncio.get_running_loop()).set_default_executor(self.executor)
+
+    def __enter__(self):
+        return self.startup()
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> AgentRuntime:
+    """Return the started process-wide runtime, creating it on first use."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AgentRuntime()
+    return _runtime.startup()
+
+
+def shutdown_runtime():
+    """Shut down the process-wide runtime if one was started."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is not None:
+            _runtime.shutdown()
+            _runtime = None
@@ -0,0 +1,153 @@
+# agents/serialize.py
+"""
+Compact, token-budgeted serialization of tool results for the prompt.
+
+Internal fields (`_id` and anything starting with `_`) are dropped, Mongo/
+datetime types become plain strings, lists of records become a `|`-separated
+table, and output past the budget is cut with a "more available" hint.
+
+Tools use it through `compact_tool` together with
+`@tool(response_format="content_and_artifact")`: the model sees the compact
+text, while code calling the tool (fast path, batch) still gets the raw result
+from the ToolMessage artifact via `raw_result()`.
+"""
+import base64
+import functools
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+TOOL_RESULT_TOKENS = int(os.getenv("TOOL_RESULT_TOKENS", "400"))
+CHARS_PER_TOKEN = 4   # rough estimate for Gemini tokenization of English/JSON
+
+
+def clean(value):
+    """Drop internal fields and turn non-JSON types into plain values."""
+    if isinstance(value, dict):
+        return {str(k): clean(v) for k, v in value.items() if not str(k).startswith("_")}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [clean(v) for v in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return base64.b64encode(value[:48]).decode() + ("…" if len(value) > 48 else "")
+    return str(value)   # ObjectId, Decimal128, UUID, ...
+
+
+def _cell(value) -> str:
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    return "" if value is None else str(value).replace("|", "/").replace("\n", " ")
+
+
+def _is_records(value) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(v, dict) for v in value)
+
+
+def table(name: str, rows: list, budget_chars: int) -> str:
+    """`name (n):` + header + one line per row, stopping at budget_chars."""
+    return _table(name, rows, budget_chars)[0]
+
+
+def _table(name: str, rows: list, budget_chars: int):
+    """(table text, number of rows shown)."""
+    columns = []
+    for row in rows:
+        columns.extend(k for k in row if k not in columns)
+    lines = [f"{name} ({len(rows)}):", "|".join(columns)]
+    used = sum(len(line) + 1 for line in lines)
+    shown = 0
+    for row in rows:
+        line = "|".join(_cell(row.get(c)) for c in columns)
+        if used + len(line) + 1 > budget_chars and shown:
+            break
+        lines.append(line)
+        used += len(line) + 1
+        shown += 1
+    if shown < len(rows):
+        lines.append(f"… {len(rows) - shown} more rows available; narrow the query or ask for the next page.")
+    return "\n".join(lines), shown
+
+
+def _truncate(text: str, budget_chars: int) -> str:
+    if len(text) <= budget_chars:
+        return text
+    return text[:budget_chars] + f"… [{len(text) - budget_chars} more characters available]"
+
+
+def compact_result(result, budget_tokens: int = None) -> str:
+    """
+    Serialize a tool result within budget_tokens.
+
+    Scalar fields come first as one line of compact JSON; each list of
+    records follows as a table sharing what is left of the budget.
+    """
+    return _compact(result, budget_tokens)[0]
+
+
+def _compact(result, budget_tokens: int = None):
+    """(compact_result text, {table name: rows shown})."""
+    budget = (budget_tokens or TOOL_RESULT_TOKENS) * CHARS_PER_TOKEN
+    result = clean(result)
+
+    if _is_records(result):
+        text, shown = _table("rows", result, budget)
+        return text, {"rows": shown}
+    if not isinstance(result, dict):
+        text = result if isinstance(result, str) else json.dumps(result, separators=(",", ":"), ensure_ascii=False)
+        return _truncate(text, budget), {}
+
+    scalars = {k: v for k, v in result.items() if not _is_records(v)}
+    tables = {k: v for k, v in result.items() if _is_records(v)}
+
+    head = _truncate(json.dumps(scalars, separators=(",", ":"), ensure_ascii=False), budget)
+    parts, remaining, shown = [head], budget - len(head), {}
+    for i, (name, rows) in enumerate(tables.items()):
+        share = max(remaining // (len(tables) - i), 80)
+        part, shown[name] = _table(name, rows, share)
+        parts.append(part)
+        remaining -= len(part)
+    return "\n".join(parts), shown
+
+
+def compact_page(page: dict, rows_key: str = "records", budget_tokens: int = None) -> str:
+    """
+    compact_result for one page of a cursor-paged query. Rows carry their
+    `_id` (not shown); when the budget cuts the table short, `next_cursor`
+    is moved back to the last row shown, so the rows that didn't fit start
+    the next page instead of being skipped.
+    """
+    rows = page[rows_key]
+    text, shown = _compact(page, budget_tokens)
+    # A longer cursor in the header can push another row out; repeat until stable
+    while 0 < shown.get(rows_key, len(rows)) < len(rows):
+        cursor = str(rows[shown[rows_key] - 1]["_id"])
+        if cursor == page.get("next_cursor"):
+            break
+        page = dict(page, next_cursor=cursor)
+        text, shown = _compact(page, budget_tokens)
+    return text
+
+
+def compact_tool(fn):
+    """
+    Make a tool return (compact text, raw result) for content_and_artifact
+    tools. The artifact is clean()ed too: it is checkpointed with the
+    ToolMessage, and ObjectIds/datetimes don't survive the serializer.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        result = fn(*args, **kwargs)
+        return compact_result(result), clean(result)
+    return wrapper
+
+
+def raw_result(tool, args: dict):
+    """Invoke a content_and_artifact tool from code and return its raw result."""
+    message = tool.invoke({"name": tool.name, "args": args, "id": f"direct-{tool.name}", "type": "tool_call"})
+    return message.artifact if message.artifact is not None else message.content
@@ -1,6 +1,6 @@
 # backend/agents/state.py
 
-from typing_extensions import TypedDict
+from typing_extensions import TypedDict, NotRequired
 from typing import Annotated
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
@@ -8,3 +8,11 @@ from langgraph.graph.message import add_messages
 class State(TypedDict):
     messages: Annotated[list[BaseMessage], add_messages]
     thread_id: str
+    # Rolling summary of turns that fell out of the history window
+    summary: NotRequired[str]
+    # Per-turn budget counters, reset by each new user message (agents/budget.py)
+    llm_calls: NotRequired[int]
+    tool_calls: NotRequired[int]
+    turn_started: NotRequired[float]
+    # Set by chatbot when its model call ran out of the turn's time
+    timed_out: NotRequired[bool]
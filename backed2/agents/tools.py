@@ -1,13 +1,37 @@
 from langchain_core.tools import tool
 
 from langchain_core.messages import HumanMessage
-from agents.llm_config import llm  
-import re
-from db.crud import create_appointment, get_appointments, update_appointment, delete_appointment,get_all_doctors
+from agents.llm_config import get_llm
+from metrics import record_llm_usage
+from agents.serialize import compact_tool, compact_page
+from agents.answer_cache import get_answer_cache
+from agents.names import resolve_doctor, resolve_specialization
+from db.crud import create_appointment, create_appointments, get_appointments, update_appointment, delete_appointment,get_all_doctors
+from db.reservations import claim_slot, claim_slots, normalize_date, normalize_slot, release_slot
+from db.search import collection_names, search
+from db.schedule import has_templates, free_slots, nearest_free_slots
+
+def _suggestions(doctor_name: str, date: str, time: str = None) -> dict:
+    """Nearest free slots to offer instead of a plain "unavailable"; empty without a schedule."""
+    try:
+        return nearest_free_slots(doctor_name, date, time)
+    except ValueError:
+        return {}
 
-@tool
+@tool(response_format="content_and_artifact")
+@compact_tool
 def book_appointment(patient_name: str, doctor_name: str, date: str, time: str):
     """Book a new appointment"""
+    doctor_name = resolve_doctor(doctor_name)
+    try:
+        date, time = normalize_slot(date, time)
+        claimed = claim_slot(doctor_name, date, time, patient_name)
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
+    if not claimed:
+        return {"success": False, "message": f"Slot with {doctor_name} on {date} at {time} is already taken",
+                **_suggestions(doctor_name, date, time)}
+
     data = {
         "patient_name": patient_name,
         "doctor_name": doctor_name,
@@ -15,55 +39,164 @@ def book_appointment(patient_name: str, doctor_name: str, date: str, time: str):
         "time": time,
         "status": "booked"
     }
-    appointment_id = create_appointment(data)
+    try:
+        appointment_id = create_appointment(data)
+    except Exception:
+        release_slot(doctor_name, date, time, patient_name)
+        raise
     return {"success": True, "appointment_id": str(appointment_id)}
 
-@tool
-def check_availability(doctor_name: str, date: str):
-    """Check if a doctor has an appointment on a given date"""
+def book_appointments(requests: list) -> list:
+    """
+    book_appointment for many requests (dicts with patient_name, doctor_name,
+    date, time): slots are claimed in one bulk insert and the appointments
+    written in another. Returns one result per request, in order; a request
+    with an unparseable date or time fails on its own without touching the others.
+    """
+    requests = [dict(r, doctor_name=resolve_doctor(r["doctor_name"])) for r in requests]
+    results, valid = [None] * len(requests), []
+    for i, r in enumerate(requests):
+        try:
+            r["date"], r["time"] = normalize_slot(r["date"], r["time"])
+        except ValueError as e:
+            results[i] = {"success": False, "message": str(e)}
+        else:
+            valid.append(i)
+
+    claimed = claim_slots([(r["doctor_name"], r["date"], r["time"], r["patient_name"]) for r in (requests[i] for i in valid)])
+    docs = [
+        {"patient_name": r["patient_name"], "doctor_name": r["doctor_name"], "date": r["date"], "time": r["time"], "status": "booked"}
+        for r, ok in zip((requests[i] for i in valid), claimed) if ok
+    ]
+    try:
+        ids = iter(create_appointments(docs))
+    except Exception:
+        for doc in docs:
+            release_slot(doc["doctor_name"], doc["date"], doc["time"], doc["patient_name"])
+        raise
+    for i, ok in zip(valid, claimed):
+        r = requests[i]
+        results[i] = ({"success": True, "appointment_id": str(next(ids))} if ok else
+                      {"success": False, "message": f"Slot with {r['doctor_name']} on {r['date']} at {r['time']} is already taken"})
+    return results
+
+@tool(response_format="content_and_artifact")
+@compact_tool
+def check_availability(doctor_name: str, date: str, days: int = 1):
+    """Check a doctor's free slots on a date (DD-MM-YYYY), or over the `days` days starting at that date"""
+    doctor_name = resolve_doctor(doctor_name)
+    if has_templates(doctor_name):
+        try:
+            slots = free_slots(doctor_name, date, days)
+        except ValueError:
+            return {"success": False, "message": "Dates must be in DD-MM-YYYY format"}
+        if not slots:
+            return {"available": False, "free_slots": slots, **_suggestions(doctor_name, date)}
+        return {"available": True, "free_slots": slots}
+
+    # Doctors without a schedule template: fall back to existing appointments
+    try:
+        date = normalize_date(date)
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
     appointments = get_appointments({"doctor_name": doctor_name, "date": date})
     if appointments:
         return {"available": False, "appointments": appointments}
     return {"available": True}
 
-@tool
+@tool(response_format="content_and_artifact")
+@compact_tool
 def reschedule_appointment(patient_name: str, doctor_name: str, old_date: str, old_time: str, new_date: str, new_time: str):
     """Reschedule an appointment"""
+    doctor_name = resolve_doctor(doctor_name)
+    try:
+        old_date, old_time = normalize_slot(old_date, old_time)
+        new_date, new_time = normalize_slot(new_date, new_time)
+        claimed = claim_slot(doctor_name, new_date, new_time, patient_name)
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
+    if not claimed:
+        return {"success": False, "message": f"Slot with {doctor_name} on {new_date} at {new_time} is already taken",
+                **_suggestions(doctor_name, new_date, new_time)}
+
     result = update_appointment(
         {"patient_name": patient_name, "doctor_name": doctor_name, "date": old_date, "time": old_time},
         {"date": new_date, "time": new_time}
     )
-    if result.modified_count > 0:
+    if result["modified"] > 0:
+        release_slot(doctor_name, old_date, old_time, patient_name)
         return {"success": True}
+    release_slot(doctor_name, new_date, new_time, patient_name)
     return {"success": False, "message": "No matching appointment to reschedule"}
 
-@tool
+@tool(response_format="content_and_artifact")
+@compact_tool
 def cancel_appointment(patient_name: str, doctor_name: str, date: str, time: str):
     """Cancel an existing appointment"""
+    doctor_name = resolve_doctor(doctor_name)
+    try:
+        date, time = normalize_slot(date, time)
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
     result = delete_appointment({
         "patient_name": patient_name,
         "doctor_name": doctor_name,
         "date": date,
         "time": time
     })
-    if result.deleted_count > 0:
+    if result["deleted"] > 0:
+        release_slot(doctor_name, date, time, patient_name)
         return {"success": True}
     return {"success": False, "message": "No matching appointment found"}
 
+@tool(response_format="content_and_artifact")
+@compact_tool
+def suggest_slots(doctor_name: str, date: str, time: str = "", k: int = 3):
+    """Nearest free slots to a wanted date (DD-MM-YYYY) and optional time (HH:MM) for a doctor,
+    plus the nearest free slots of other doctors with the same specialization. Use it instead of
+    checking date after date."""
+    doctor_name = resolve_doctor(doctor_name)
+    try:
+        suggestions = nearest_free_slots(doctor_name, date, time or None, k=max(1, min(k, 10)))
+    except ValueError:
+        return {"success": False, "message": "Dates must be in DD-MM-YYYY format and times in HH:MM"}
+    if not suggestions["suggested"] and not suggestions["alternatives"]:
+        return {"success": False, "message": f"No free slots near {date} for {doctor_name} or similar doctors"}
+    return {"success": True, **suggestions}
+
 @tool
 def general_query(query: str) -> str:
     """Responds to general queries like 
      "working hours": "Our doctors are available from 9 AM to 6 PM.",
         "contact": "You can call us at +91 12345 67890", '."""
     try:
-        response = llm.invoke([HumanMessage(content=query)])
-        return response.content
+        return get_answer_cache().get_or_compute(query, _ask)
     except Exception as e:
         return f"Error: {str(e)}"
-    
-@tool
+
+
+def _ask(query: str) -> str:
+    return record_llm_usage(get_llm().invoke([HumanMessage(content=query)]), "general_query").content
+
+
+async def _aask(query: str) -> str:
+    return record_llm_usage(await get_llm().ainvoke([HumanMessage(content=query)]), "general_query").content
+
+
+async def _ageneral_query(query: str) -> str:
+    try:
+        return await get_answer_cache().aget_or_compute(query, _aask)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+# Awaited by ainvoke instead of tying up an executor thread on the LLM call
+general_query.coroutine = _ageneral_query
+
+@tool(response_format="content_and_artifact")
+@compact_tool
 def list_doctors(specialization: str = None):
     """List all doctors, or doctors of a specific specialization"""
+    specialization = resolve_specialization(specialization)
     doctors = get_all_doctors(specialization)
     if not doctors:
         if specialization:
@@ -74,43 +207,30 @@ def list_doctors(specialization: str = None):
 
 
 @tool("query_database", return_direct=True)
-def query_database(collection_name: str, search_text: str = "") -> str:
+def query_database(collection_name: str, search_text: str = "", fields: str = "", cursor: str = "") -> str:
     """
     Queries any MongoDB collection in the connected database.
 
     Args:
         collection_name (str): The MongoDB collection name (e.g., 'doctor_availability', 'appointment').
-        search_text (str, optional): Text to search for in any field (case-insensitive). 
-                                     If empty, returns all records.
+        search_text (str, optional): Words to search for (case-insensitive).
+                                     If empty, returns all records page by page.
+        fields (str, optional): Comma-separated fields to return. Empty returns all fields.
+        cursor (str, optional): Cursor from a previous call to fetch the next page.
 
     Returns:
-        str: Formatted list of matching records, or a message if none found.
+        str: Matching records as a compact table, or a message if none found.
     """
     # Check collection exists
-    if collection_name not in db.list_collection_names():
+    if collection_name not in collection_names():
         return f"❌ Collection '{collection_name}' does not exist in database."
 
-    collection = db[collection_name]
-
-    # Build query
-    query = {}
-    if search_text.strip():
-        regex = re.compile(search_text.strip(), re.IGNORECASE)
-        query = {
-            "$or": [
-                {field: regex} for field in collection.find_one().keys() if field != "_id"
-            ]
-        }
-
-    # Fetch results
-    results = list(collection.find(query, {"_id": 0}))
+    field_list = [f.strip() for f in fields.split(",") if f.strip()]
+    results, next_cursor = search(collection_name, search_text, field_list, cursor=cursor or None)
 
     if not results:
         return f"❌ No records found for search: '{search_text}' in '{collection_name}'."
 
-    # Format results for display
-    formatted = []
-    for idx, r in enumerate(results, 1):
-        formatted.append(f"{idx}. " + " | ".join(f"{k}: {v}" for k, v in r.items()))
-
-    return "\n".join(formatted)
+    # Compact table within the tool-result token budget; the cursor follows the last row shown
+    page = {"collection": collection_name, "next_cursor": next_cursor, "records": results}
+    return compact_page(page)
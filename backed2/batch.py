@@ -0,0 +1,275 @@
+# batch.py
+"""
+Process a file of booking requests.
+
+Input is JSONL or CSV, one request per row. Structured rows name an action
+and its fields and go straight to the tools; runs of consecutive bookings are
+written with bulk inserts. Rows with a free-text `message` go through the
+agent graph on a worker pool (one conversation thread per row, named after
+the run, unless `thread_id` is given).
+
+    {"action": "book", "patient_name": "Ann", "doctor_name": "Jane Smith", "date": "01-09-2025", "time": "10:00"}
+    {"action": "cancel", "patient_name": "Bob", "doctor_name": "john doe", "date": "01-09-2025", "time": "9:30"}
+    {"message": "Is Dr Smith free on Friday?"}
+
+Rows take effect in input order. A run of bookings is one bulk write that
+is split where a row repeats a slot already in it. The rows between two such
+runs execute concurrently, except that rows touching the same slot run one
+after another. Free-text rows don't name their slots, so they are only
+ordered against the bulk writes. Results are appended to the output as JSONL
+in input order, flushed after every chunk, so an interrupted run continues
+with --resume.
+
+    python batch.py requests.csv --output results.jsonl [--workers 8] [--chunk-size 200] [--resume] [--run-id ID]
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 200
+WORKERS = int(os.getenv("BATCH_WORKERS", "8"))
+
+ACTIONS = {
+    "book": "book_appointment",
+    "cancel": "cancel_appointment",
+    "reschedule": "reschedule_appointment",
+    "check": "check_availability",
+    "list_doctors": "list_doctors",
+}
+BOOK_FIELDS = ("patient_name", "doctor_name", "date", "time")
+
+
+def read_rows(path: str):
+    """Yield request dicts from a .jsonl/.json or .csv file; empty CSV cells are dropped."""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                yield {k.strip(): v.strip() for k, v in row.items() if k and v is not None and v.strip()}
+    else:
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def resume_row(path: str) -> int:
+    """Input row after the last one in the output (0 if none); a torn last line is cut off."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        data = f.read()
+    good = data.rfind(b"\n") + 1
+    if good < len(data):
+        with open(path, "r+b") as f:
+            f.truncate(good)
+    lines = data[:good].splitlines()
+    return json.loads(lines[-1])["row"] + 1 if lines else 0
+
+
+def new_run_id(path: str) -> str:
+    """Input file name plus a random suffix, e.g. 'requests-3f9a1c2e'."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{stem}-{uuid.uuid4().hex[:8]}"
+
+
+class BatchRunner:
+    def __init__(self, workers: int = WORKERS, run_id: str = None):
+        from agents.graph import get_tools
+        self.tools = {t.name: t for t in get_tools()}
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="batch")
+        self.run_id = run_id or uuid.uuid4().hex[:8]
+        self.used_graph = False
+
+    def tool_name(self, row: dict):
+        action = str(row.get("action", "")).strip().lower()
+        return ACTIONS.get(action) or (action if action in self.tools else None)
+
+    def is_bulk_booking(self, row: dict) -> bool:
+        return (not row.get("message") and self.tool_name(row) == "book_appointment"
+                and all(row.get(f) for f in BOOK_FIELDS))
+
+    def slot_keys(self, row: dict) -> list:
+        """The (doctor, date, time) slots a structured row reads or writes."""
+        from agents.names import resolve_doctor
+        from db.reservations import normalize_slot
+        if row.get("message") or not row.get("doctor_name"):
+            return []
+        doctor = resolve_doctor(str(row["doctor_name"])).strip().lower()
+        keys = []
+        for date, time in (("date", "time"), ("old_date", "old_time"), ("new_date", "new_time")):
+            if row.get(date) and row.get(time):
+                try:
+                    keys.append((doctor, *normalize_slot(row[date], row[time])))
+                except ValueError:
+                    keys.append((doctor, str(row[date]).strip(), str(row[time]).strip()))
+        return keys
+
+    def run_row(self, index: int, row: dict) -> dict:
+        from agents.serialize import raw_result
+        try:
+            if row.get("message"):
+                from agents.graph import run_graph
+                self.used_graph = True
+                thread_id = row.get("thread_id") or f"batch-{self.run_id}-{index}"
+                return {"reply": run_graph(row["message"], thread_id), "thread_id": thread_id}
+
+            name = self.tool_name(row)
+            if name is None:
+                return {"error": f"Unknown action: {row.get('action')!r}"}
+            tool = self.tools[name]
+            args = {k: v for k, v in row.items() if k in tool.args}
+            result = raw_result(tool, args)
+            return {"result": result}
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    def segments(self, chunk: list) -> list:
+        """
+        [(is_bulk, row indexes)] in input order: runs of bulk bookings, split
+        where a slot repeats, and the rows between them.
+        """
+        out, slots = [], set()
+        for i, row in enumerate(chunk):
+            bulk = self.is_bulk_booking(row)
+            key = self.slot_keys(row)[0] if bulk else None
+            if not out or out[-1][0] != bulk or key in slots:
+                out.append((bulk, []))
+                slots = set()
+            out[-1][1].append(i)
+            if bulk:
+                slots.add(key)
+        return out
+
+    def chains(self, chunk: list, indexes: list) -> list:
+        """Split `indexes` into groups that share no slot; each group stays in input order."""
+        parent = {i: i for i in indexes}
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        first = {}
+        for i in indexes:
+            for key in self.slot_keys(chunk[i]):
+                if key in first:
+                    parent[find(i)] = find(first[key])
+                else:
+                    first[key] = i
+        groups = {}
+        for i in indexes:
+            groups.setdefault(find(i), []).append(i)
+        return list(groups.values())
+
+    def run_bookings(self, chunk: list, indexes: list, results: list):
+        from agents.tools import book_appointments
+        try:
+            for i, result in zip(indexes, book_appointments([{f: chunk[i][f] for f in BOOK_FIELDS} for i in indexes])):
+                results[i] = {"result": result}
+        except Exception as e:
+            for i in indexes:
+                results[i] = {"error": f"{type(e).__name__}: {e}"}
+
+    def run_chain(self, start: int, chunk: list, chain: list, results: list):
+        for i in chain:
+            results[i] = self.run_row(start + i, chunk[i])
+
+    def run_chunk(self, start: int, chunk: list) -> list:
+        results = [None] * len(chunk)
+        for bulk, indexes in self.segments(chunk):
+            if bulk:
+                self.run_bookings(chunk, indexes, results)
+                continue
+            futures = [self.pool.submit(self.run_chain, start, chunk, chain, results)
+                       for chain in self.chains(chunk, indexes)]
+            for future in futures:
+                future.result()
+
+        out = []
+        for i, (row, result) in enumerate(zip(chunk, results)):
+            value = result.get("result")
+            ok = "error" not in result and not (isinstance(value, dict) and value.get("success") is False)
+            out.append({"row": start + i, "action": row.get("action") or "message", "ok": ok, **result})
+        return out
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        if self.used_graph:
+            from agents.runtime import shutdown_runtime
+            shutdown_runtime()
+
+
+def run(path: str, output: str, workers: int = WORKERS, chunk_size: int = CHUNK_SIZE,
+        start: int = 0, report=print, run_id: str = None) -> dict:
+    """
+    Process rows from `start` on, appending results to `output`. Free-text
+    rows get thread ids from `run_id` (default: new_run_id(path)). Returns
+    counts and rows/s.
+    """
+    from agents.serialize import clean
+
+    runner = BatchRunner(workers, run_id or new_run_id(path))
+    rows = itertools.islice(read_rows(path), start, None)
+    done = ok = 0
+    started = time.perf_counter()
+    try:
+        with open(output, "a") as out:
+            while True:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    break
+                for result in runner.run_chunk(start + done, chunk):
+                    out.write(json.dumps(clean(result), ensure_ascii=False) + "\n")
+                    ok += result["ok"]
+                out.flush()
+                os.fsync(out.fileno())
+                done += len(chunk)
+                elapsed = time.perf_counter() - started
+                report(f"… {start + done} rows ({done / elapsed:,.0f} rows/s)")
+    finally:
+        runner.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": done,
+        "ok": ok,
+        "failed": done - ok,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(done / elapsed, 1) if elapsed else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process a JSONL/CSV file of booking requests")
+    parser.add_argument("path")
+    parser.add_argument("--output", required=True, help="results JSONL (appended to)")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="threads for row-by-row and free-text requests")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--start", type=int, default=0, help="skip this many input rows")
+    parser.add_argument("--resume", action="store_true", help="start after the last row in --output")
+    parser.add_argument("--run-id", help="prefix for free-text rows' thread ids (default: file name + random suffix)")
+    args = parser.parse_args(argv)
+
+    start = resume_row(args.output) if args.resume else args.start
+    if start:
+        print(f"↪️ Resuming at row {start}", file=sys.stderr)
+    from db.connection import close_client
+    try:
+        summary = run(args.path, args.output, args.workers, args.chunk_size, start,
+                      report=lambda line: print(line, file=sys.stderr), run_id=args.run_id)
+    finally:
+        close_client()
+    print(f"✅ {summary['rows']} rows in {summary['seconds']} s ({summary['rows_per_s']} rows/s): "
+          f"{summary['ok']} ok, {summary['failed']} failed")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# benchmarks/datasets.py
+"""Synthetic availability and appointment data at configurable scale."""
+import csv
+import random
+from datetime import date, timedelta
+
+SPECIALIZATIONS = [
+    "general_dentist", "cosmetic_dentist", "orthodontist", "pediatric_dentist",
+    "oral_surgeon", "prosthodontist", "cardiologist", "dermatologist",
+]
+FIRST = ["john", "jane", "emily", "michael", "sarah", "daniel", "susan", "robert", "lisa", "kevin", "anita", "ravi"]
+LAST = ["doe", "smith", "johnson", "brown", "green", "wilson", "miller", "davis", "martinez", "anderson", "sharma", "kumar"]
+SLOT_TIMES = [f"{h}:{m:02d}" for h in range(8, 18) for m in (0, 30)]   # 20 slots per day
+
+
+def doctors(count: int, seed: int = 7) -> list:
+    combos = [f"{first} {last}" for first in FIRST for last in LAST]
+    random.Random(seed).shuffle(combos)
+    names = [
+        combos[i % len(combos)] + (f" {i // len(combos)}" if i >= len(combos) else "")
+        for i in range(count)
+    ]
+    return [(name, SPECIALIZATIONS[i % len(SPECIALIZATIONS)]) for i, name in enumerate(names)]
+
+
+def shape(slots: int):
+    """Pick (doctors, days) so doctors * days * len(SLOT_TIMES) ~= slots"""
+    per_doctor_day = len(SLOT_TIMES)
+    n_doctors = max(1, min(2000, int((slots / per_doctor_day) ** 0.5)))
+    n_days = max(1, slots // (n_doctors * per_doctor_day))
+    return n_doctors, n_days
+
+
+def availability_rows(slots: int, start: date = date(2025, 8, 1), taken: float = 0.3, seed: int = 7):
+    """Yield availability rows (dicts) in the doctor_availability.csv layout."""
+    rng = random.Random(seed)
+    n_doctors, n_days = shape(slots)
+    for name, specialization in doctors(n_doctors, seed):
+        for d in range(n_days):
+            day = (start + timedelta(days=d)).strftime("%d-%m-%Y")
+            for t in SLOT_TIMES:
+                booked = rng.random() < taken
+                yield {
+                    "date_slot": f"{day} {t}",
+                    "specialization": specialization,
+                    "doctor_name": name,
+                    "is_available": not booked,
+                    "patient_to_attend": rng.randint(1000000, 1999999) if booked else "",
+                }
+
+
+def write_availability_csv(path: str, slots: int, **kwargs) -> int:
+    fields = ["date_slot", "specialization", "doctor_name", "is_available", "patient_to_attend"]
+    count = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for row in availability_rows(slots, **kwargs):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def appointment_docs(slots: int, seed: int = 7):
+    """Yield appointment documents for the taken slots."""
+    rng = random.Random(seed)
+    for row in availability_rows(slots, seed=seed):
+        if row["is_available"]:
+            continue
+        day, time = row["date_slot"].split(" ")
+        yield {
+            "patient_name": f"patient {rng.randint(1, 50000)}",
+            "doctor_name": row["doctor_name"],
+            "specialization": row["specialization"],
+            "name": row["doctor_name"],
+            "date": day,
+            "time": time,
+            "status": "booked",
+        }
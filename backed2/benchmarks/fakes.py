@@ -0,0 +1,444 @@
+# benchmarks/fakes.py
+"""
+In-process stand-ins for MongoDB and the Gemini client, used by the
+benchmarks so the tool and data layers can run without network access.
+
+Only the subset of the pymongo API that db/ and agents/ use is implemented.
+"""
+import asyncio
+import copy
+import re
+import sys
+import threading
+import time
+import types
+from bson import ObjectId
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+
+def _get(doc, field):
+    for part in field.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def _fold(value):
+    """Case-fold strings, as a strength-2 collation compares them."""
+    if isinstance(value, str):
+        return value.casefold()
+    if isinstance(value, dict):
+        return {k: _fold(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fold(v) for v in value]
+    return value
+
+
+def _collation(collation) -> dict:
+    """pymongo takes a Collation or a plain dict."""
+    return dict(getattr(collation, "document", collation))
+
+
+def _matches_value(value, cond) -> bool:
+    if isinstance(cond, re.Pattern):
+        return isinstance(value, str) and bool(cond.search(value))
+    if isinstance(cond, dict) and any(k.startswith("$") for k in cond):
+        for op, arg in cond.items():
+            if op == "$regex":
+                flags = re.I if "i" in cond.get("$options", "") else 0
+                if not (isinstance(value, str) and re.search(arg, value, flags)):
+                    return False
+            elif op == "$options":
+                continue
+            elif op == "$in":
+                if value not in arg:
+                    return False
+            elif op == "$nin":
+                if value in arg:
+                    return False
+            elif op == "$ne":
+                if value == arg:
+                    return False
+            elif op == "$exists":
+                if (value is not None) != bool(arg):
+                    return False
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                if op == "$gt" and not value > arg:
+                    return False
+                if op == "$gte" and not value >= arg:
+                    return False
+                if op == "$lt" and not value < arg:
+                    return False
+                if op == "$lte" and not value <= arg:
+                    return False
+            else:
+                raise OperationFailure(f"operator {op} not supported by FakeCollection")
+        return True
+    return value == cond
+
+
+def matches(doc: dict, query: dict, fold: bool = False) -> bool:
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(matches(doc, q, fold) for q in cond):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, q, fold) for q in cond):
+                return False
+        elif key == "$text":
+            raise OperationFailure("text search not supported by FakeCollection")
+        elif fold:
+            if not _matches_value(_fold(_get(doc, key)), _fold(cond)):
+                return False
+        elif not _matches_value(_get(doc, key), cond):
+            return False
+    return True
+
+
+def project(doc: dict, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if include:
+        out = {k: copy.deepcopy(doc[k]) for k in include if k in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            out["_id"] = doc["_id"]
+        return out
+    return {k: copy.deepcopy(v) for k, v in doc.items() if projection.get(k, 1)}
+
+
+def _group(docs, spec):
+    """$group with a "$field" key and $sum / $max accumulators."""
+    groups = {}
+    for doc in docs:
+        groups.setdefault(_get(doc, spec["_id"][1:]), []).append(doc)
+    out = []
+    for key, members in groups.items():
+        row = {"_id": key}
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, expr), = accumulator.items()
+            values = [_get(d, expr[1:]) if isinstance(expr, str) else expr for d in members]
+            if op == "$sum":
+                row[field] = sum(values)
+            elif op == "$max":
+                row[field] = max(values)
+            else:
+                raise OperationFailure(f"accumulator {op} not supported by FakeCollection")
+        out.append(row)
+    return out
+
+
+class _Result(types.SimpleNamespace):
+    pass
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self._docs = docs
+        self._limit = 0
+
+    def sort(self, key, direction=1):
+        keys = [(key, direction)] if isinstance(key, str) else list(key)
+        for field, d in reversed(keys):
+            self._docs.sort(key=lambda doc: (_get(doc, field) is None, _get(doc, field)), reverse=d < 0)
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def skip(self, n):
+        self._docs = self._docs[n:]
+        return self
+
+    def explain(self):
+        return {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+
+    def __iter__(self):
+        docs = self._docs[: self._limit] if self._limit else self._docs
+        return iter(docs)
+
+
+class FakeCollection:
+    def __init__(self, name: str, database=None):
+        self.name = name
+        self.database = database
+        self._docs = {}
+        self._indexes = {"_id_": {"key": [("_id", 1)]}}
+        self._unique = []
+        self._lock = threading.RLock()
+
+    # -- indexes --------------------------------------------------------
+    def create_index(self, keys, name=None, unique=False, **kwargs):
+        keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        if any(kind == "text" for _, kind in keys):
+            raise OperationFailure("text indexes not supported by FakeCollection")
+        name = name or "_".join(f"{k}_{d}" for k, d in keys)
+        info = {"key": keys, **({"unique": True} if unique else {})}
+        if kwargs.get("collation") is not None:
+            info["collation"] = _collation(kwargs["collation"])
+        with self._lock:
+            self._indexes[name] = info
+            if unique:
+                self._unique.append(tuple(k for k, _ in keys))
+        return name
+
+    def index_information(self):
+        return copy.deepcopy(self._indexes)
+
+    def _check_unique(self, doc, ignore_id=None):
+        for fields in self._unique:
+            key = tuple(_get(doc, f) for f in fields)
+            for other in self._docs.values():
+                if other["_id"] != ignore_id and tuple(_get(other, f) for f in fields) == key:
+                    raise DuplicateKeyError(f"duplicate key {dict(zip(fields, key))}")
+
+    # -- reads ----------------------------------------------------------
+    def find(self, query=None, projection=None, collation=None):
+        fold = collation is not None and _collation(collation).get("strength", 3) <= 2
+        with self._lock:
+            docs = [project(d, projection) for d in self._docs.values() if matches(d, query or {}, fold)]
+        return FakeCursor(docs)
+
+    def find_one(self, query=None, projection=None, sort=None):
+        cursor = self.find(query, projection)
+        if sort:
+            cursor.sort(sort)
+        for doc in cursor.limit(1):
+            return doc
+        return None
+
+    def count_documents(self, query, limit=0, **kwargs):
+        with self._lock:
+            n = sum(1 for d in self._docs.values() if matches(d, query))
+        return min(n, limit) if limit else n
+
+    def distinct(self, field, query=None):
+        seen = []
+        for doc in self.find(query):
+            value = _get(doc, field)
+            if value not in seen:
+                seen.append(value)
+        return seen
+
+    def aggregate(self, pipeline, **kwargs):
+        with self._lock:
+            docs = [copy.deepcopy(d) for d in self._docs.values()]
+        for stage in pipeline:
+            (op, arg), = stage.items()
+            if op == "$match":
+                docs = [d for d in docs if matches(d, arg)]
+            elif op == "$group":
+                docs = _group(docs, arg)
+            elif op == "$project":
+                docs = [project(d, arg) for d in docs]
+            else:
+                raise OperationFailure(f"stage {op} not supported by FakeCollection")
+        return iter(docs)
+
+    # -- writes ---------------------------------------------------------
+    def insert_one(self, doc):
+        with self._lock:
+            doc.setdefault("_id", ObjectId())
+            stored = copy.deepcopy(doc)
+            self._check_unique(stored)
+            self._docs[stored["_id"]] = stored
+        return _Result(inserted_id=doc["_id"], acknowledged=True)
+
+    def insert_many(self, docs, ordered=True):
+        ids, errors = [], []
+        for i, doc in enumerate(docs):
+            try:
+                ids.append(self.insert_one(doc).inserted_id)
+            except DuplicateKeyError as e:
+                errors.append({"index": i, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(ids)})
+        return _Result(inserted_ids=ids, acknowledged=True)
+
+    def _apply(self, doc, update):
+        for op, fields in update.items():
+            if op == "$set":
+                doc.update(copy.deepcopy(fields))
+            elif op == "$unset":
+                for f in fields:
+                    doc.pop(f, None)
+            elif op == "$inc":
+                for f, n in fields.items():
+                    doc[f] = doc.get(f, 0) + n
+            elif op == "$setOnInsert":
+                continue
+            else:
+                raise OperationFailure(f"update operator {op} not supported by FakeCollection")
+
+    def update_one(self, query, update, upsert=False):
+        with self._lock:
+            for doc in self._docs.values():
+                if matches(doc, query):
+                    changed = copy.deepcopy(doc)
+                    self._apply(changed, update)
+                    self._check_unique(changed, ignore_id=doc["_id"])
+                    modified = int(changed != doc)
+                    self._docs[doc["_id"]] = changed
+                    return _Result(matched_count=1, modified_count=modified, upserted_id=None)
+            if not upsert:
+                return _Result(matched_count=0, modified_count=0, upserted_id=None)
+            doc = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+            self._apply(doc, update)
+            doc.update(copy.deepcopy(update.get("$setOnInsert", {})))
+            return _Result(matched_count=0, modified_count=0, upserted_id=self.insert_one(doc).inserted_id)
+
+    def delete_one(self, query):
+        with self._lock:
+            for _id, doc in self._docs.items():
+                if matches(doc, query):
+                    del self._docs[_id]
+                    return _Result(deleted_count=1)
+        return _Result(deleted_count=0)
+
+    def delete_many(self, query):
+        with self._lock:
+            ids = [i for i, d in self._docs.items() if matches(d, query)]
+            for i in ids:
+                del self._docs[i]
+        return _Result(deleted_count=len(ids))
+
+    def replace_one(self, query, replacement, upsert=False):
+        with self._lock:
+            for doc in self._docs.values():
+                if matches(doc, query):
+                    changed = dict(copy.deepcopy(replacement), _id=doc["_id"])
+                    self._check_unique(changed, ignore_id=doc["_id"])
+                    modified = int(changed != doc)
+                    self._docs[doc["_id"]] = changed
+                    return _Result(matched_count=1, modified_count=modified, upserted_id=None)
+            if not upsert:
+                return _Result(matched_count=0, modified_count=0, upserted_id=None)
+            return _Result(matched_count=0, modified_count=0, upserted_id=self.insert_one(dict(replacement)).inserted_id)
+
+    def bulk_write(self, requests, ordered=True):
+        upserted = modified = 0
+        for request in requests:
+            doc = request._doc
+            if isinstance(request, ReplaceOne):
+                result = self.replace_one(request._filter, doc, upsert=request._upsert)
+            else:
+                result = self.update_one(request._filter, doc, upsert=request._upsert)
+            upserted += result.upserted_id is not None
+            modified += result.modified_count
+        return _Result(upserted_count=upserted, modified_count=modified)
+
+    def drop(self):
+        with self._lock:
+            self._docs.clear()
+            self._indexes = {"_id_": {"key": [("_id", 1)]}}
+            self._unique = []
+
+    def rename(self, new_name, dropTarget=False):
+        if self.database is None:
+            raise OperationFailure("rename needs a database")
+        return self.database._rename(self, new_name, dropTarget)
+
+    def __len__(self):
+        return len(self._docs)
+
+
+class FakeDatabase:
+    def __init__(self, name: str = "PatientData"):
+        self.name = name
+        self._collections = {}
+
+    def __getitem__(self, name) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(name, self)
+        return self._collections[name]
+
+    def list_collection_names(self):
+        return [name for name, c in self._collections.items() if len(c)]
+
+    def _rename(self, collection, new_name, drop_target):
+        if not drop_target and len(self._collections.get(new_name, ())):
+            raise OperationFailure(f"target namespace {new_name} exists")
+        del self._collections[collection.name]
+        collection.name = new_name
+        self._collections[new_name] = collection
+
+
+class FakeClient:
+    def __init__(self):
+        self._dbs = {}
+
+    def __getitem__(self, name) -> FakeDatabase:
+        return self._dbs.setdefault(name, FakeDatabase(name))
+
+    def close(self):
+        pass
+
+
+def install_fake_db(collection_name: str = "appointments") -> FakeDatabase:
+    """
+    Register a fake `db.connection` module so db.crud, db.reservations and
+    db.search run against an in-process database. Call before importing them.
+    """
+    client = FakeClient()
+    database = client["PatientData"]
+    module = types.ModuleType("db.connection")
+    module.client = client
+    module.db = database
+    module.appointments_collection = database[collection_name]
+    module.MONGO_URI = "fake://"
+    module.DB_NAME = database.name
+    module.get_client = lambda: client
+    module.get_db = lambda: database
+    module.get_appointments_collection = lambda: database[collection_name]
+    module.close_client = lambda: None
+    sys.modules["db.connection"] = module
+    return database
+
+
+class FakeLLM:
+    """
+    Chat model stand-in: answers with a fixed reply after `delay` seconds.
+    A call given a `timeout` shorter than that raises TimeoutError once the
+    timeout passes, like the Gemini client's deadline.
+    """
+
+    def __init__(self, reply: str = "Our doctors are available from 9 AM to 6 PM.", delay: float = 0):
+        self.reply = reply
+        self.delay = delay
+        self.calls = 0
+
+    def invoke(self, messages, *args, timeout: float = None, **kwargs):
+        from langchain_core.messages import AIMessage
+        self.calls += 1
+        if self.delay:
+            time.sleep(min(self.delay, timeout if timeout is not None else self.delay))
+            if timeout is not None and timeout < self.delay:
+                raise TimeoutError(f"no reply within {timeout:.2f}s")
+        return AIMessage(content=self.reply)
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        from langchain_core.messages import AIMessage
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return AIMessage(content=self.reply)
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def install_fake_llm(llm=None) -> FakeLLM:
+    """Make agents.llm_config.get_llm() return a fake model."""
+    from agents.llm_config import set_llm
+    llm = llm or FakeLLM()
+    set_llm(llm)
+    return llm
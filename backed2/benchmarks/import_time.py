@@ -0,0 +1,49 @@
+# benchmarks/import_time.py
+"""
+Import-time budget for agents.graph.
+
+Imports the module in fresh interpreters with no MONGO_URI / GOOGLE_API_KEY
+set (so any eager client creation fails loudly) and checks the best of N
+runs against the budget.
+
+    python -m benchmarks.import_time [--budget-ms 100] [--runs 5] [--module agents.graph]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKED2 = Path(__file__).resolve().parents[1]
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "100"))
+
+
+def import_ms(module: str) -> float:
+    env = {k: v for k, v in os.environ.items() if k not in ("MONGO_URI", "MONGODB_URI", "GOOGLE_API_KEY")}
+    code = f"import time; t = time.perf_counter(); import {module}; print((time.perf_counter() - t) * 1000)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKED2, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the agent package")
+    parser.add_argument("--module", default="agents.graph")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    args = parser.parse_args()
+
+    samples = [import_ms(args.module) for _ in range(args.runs)]
+    best = min(samples)
+    print(f"import {args.module}: best {best:.1f} ms, runs {', '.join(f'{s:.1f}' for s in samples)} (budget {args.budget_ms:.0f} ms)")
+    if best > args.budget_ms:
+        print(f"❌ over budget by {best - args.budget_ms:.1f} ms")
+        sys.exit(1)
+    print("✅ within budget")
+
+
+if __name__ == "__main__":
+    main()
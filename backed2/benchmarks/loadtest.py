@@ -0,0 +1,282 @@
+# benchmarks/loadtest.py
+"""
+End-to-end load test: many simulated patients talking to run_graph at once.
+
+Each session checks a doctor's availability, books a slot, and sometimes
+reschedules or cancels it. The scripted chat model turns every user message
+into the planned tool call (optionally sleeping --llm-ms to stand in for
+Gemini), Mongo is the in-process stand-in and checkpoints stay in memory,
+so the numbers show the agent's own overhead and contention behaviour.
+
+Few doctors and days are used on purpose, so sessions fight over the same
+slots. After each run the invariants are checked: no slot is booked twice,
+every booking/reschedule the agent confirmed is in the database (and nothing
+else is), and slot reservations match appointments one to one.
+
+    cd backed2
+    python -m benchmarks.loadtest --concurrency 1 8 32 --sessions 200 --llm-ms 50
+"""
+import argparse
+import json
+import random
+import re
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import datasets
+from benchmarks.fakes import install_fake_db
+from benchmarks.run import percentile
+
+
+class ScriptedChatModel:
+    """
+    Chat model stand-in that follows a plan: the latest user message is
+    looked up in `plans` and answered with that tool call; after a tool
+    result it answers in plain text. Anything else (history summaries) gets
+    a short fixed reply.
+    """
+
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.plans = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def plan(self, text: str, tool: str, args: dict):
+        self.plans[text] = (tool, args)
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def invoke(self, messages, *args, **kwargs):
+        from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+
+        if isinstance(messages[-1], ToolMessage):
+            return AIMessage(content=f"Here is what I found: {str(messages[-1].content)[:200]}")
+        human = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+        planned = self.plans.get(human.content) if human is not None else None
+        if planned is None:
+            return AIMessage(content="Summary of the earlier conversation.")
+        tool, args = planned
+        return AIMessage(content="", tool_calls=[{"name": tool, "args": args, "id": f"call-{uuid.uuid4().hex[:12]}"}])
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        return self.invoke(messages)
+
+
+class Session:
+    """One simulated patient and the appointments the agent confirmed for them."""
+
+    def __init__(self, number: int, llm: ScriptedChatModel, rng: random.Random, doctors: list, days: list):
+        self.thread_id = f"load-{number}-{uuid.uuid4().hex[:8]}"
+        self.patient = f"patient {number}"
+        self.llm = llm
+        self.rng = rng
+        self.doctor = rng.choice(doctors)
+        self.days = days
+        self.booked = None          # (doctor, date, time) the agent confirmed
+        self.latencies = []
+        self.errors = 0
+        self._turn = 0
+
+    def say(self, tool: str, args: dict) -> str:
+        from agents.graph import run_graph
+        self._turn += 1
+        text = f"loadtest {self.thread_id} turn {self._turn}"
+        self.llm.plan(text, tool, args)
+        started = time.perf_counter()
+        try:
+            return run_graph(text, self.thread_id)
+        except Exception:
+            self.errors += 1
+            return ""
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+    def run(self):
+        date, time_ = self.rng.choice(self.days), self.rng.choice(datasets.SLOT_TIMES)
+        self.say("check_availability", {"doctor_name": self.doctor, "date": date})
+
+        reply = self.say("book_appointment", {
+            "patient_name": self.patient, "doctor_name": self.doctor, "date": date, "time": time_,
+        })
+        if not reply.startswith("✅ Booked"):
+            return self
+        self.booked = (self.doctor, date, time_)
+
+        roll = self.rng.random()
+        if roll < 0.3:
+            new_date, new_time = self.rng.choice(self.days), self.rng.choice(datasets.SLOT_TIMES)
+            reply = self.say("reschedule_appointment", {
+                "patient_name": self.patient, "doctor_name": self.doctor,
+                "old_date": date, "old_time": time_, "new_date": new_date, "new_time": new_time,
+            })
+            if reply.startswith("✅ Moved"):
+                self.booked = (self.doctor, new_date, new_time)
+        elif roll < 0.5:
+            reply = self.say("cancel_appointment", {
+                "patient_name": self.patient, "doctor_name": self.doctor, "date": date, "time": time_,
+            })
+            if reply.startswith("✅ Cancelled"):
+                self.booked = None
+        return self
+
+
+def setup(database, llm: ScriptedChatModel, n_doctors: int) -> list:
+    """Empty the Mongo stand-in, add the doctor roster, and start a runtime with an in-memory checkpointer."""
+    from langgraph.checkpoint.memory import InMemorySaver
+    from agents import graph, runtime
+    from agents.llm_config import set_llm
+    from metrics import REGISTRY
+    from agents.names import invalidate_names
+    from db.cache import appointments_cache
+    from db.indexes import ensure_indexes
+    from db.schedule import free_timelines
+
+    import db.reservations
+
+    for name in database.list_collection_names():
+        database[name].drop()
+    db.reservations._index_ready = False   # dropping removed the unique slot index
+    ensure_indexes()
+    roster = datasets.doctors(n_doctors)
+    for name, specialization in roster:
+        database["appointments"].insert_one({"name": name, "specialization": specialization})
+
+    set_llm(llm)
+    graph._llm_with_tools = None
+    appointments_cache.clear()
+    free_timelines.clear()
+    invalidate_names()
+    REGISTRY.reset()
+
+    rt = runtime.AgentRuntime()
+    rt.graph = graph.build_graph().compile(checkpointer=InMemorySaver())
+    runtime._runtime = rt
+    return [name for name, _ in roster]
+
+
+def check_invariants(database, sessions: list) -> dict:
+    from db.reservations import RESERVATIONS_COLLECTION
+
+    appointments = [d for d in database["appointments"].find({}) if "patient_name" in d]
+    slot = lambda d: (str(d["doctor_name"]).lower(), d["date"], re.sub(r"^0", "", d["time"]))
+    held = Counter(slot(d) for d in appointments)
+    double_booked = sorted(k for k, n in held.items() if n > 1)
+
+    actual = {(d["patient_name"], *slot(d)) for d in appointments}
+    expected = {
+        (s.patient, s.booked[0].lower(), s.booked[1], s.booked[2])
+        for s in sessions if s.booked is not None
+    }
+    reserved = {
+        (d["doctor_key"], d["date"], re.sub(r"^0", "", d["time"]))
+        for d in database[RESERVATIONS_COLLECTION].find({})
+    }
+    return {
+        "appointments": len(appointments),
+        "double_booked": [list(k) for k in double_booked],
+        "lost": [list(k) for k in sorted(expected - actual)],
+        "unexpected": [list(k) for k in sorted(actual - expected)],
+        "orphan_reservations": [list(k) for k in sorted(reserved - set(held))],
+        "unreserved_appointments": [list(k) for k in sorted(set(held) - reserved)],
+    }
+
+
+def breakdown(histogram, label: str) -> dict:
+    out = {}
+    for series in histogram.snapshot():
+        name = series["labels"].get(label, "?")
+        out[name] = {
+            "calls": series["count"],
+            "total_s": round(series["sum"], 4),
+            "mean_ms": round(series["sum"] / series["count"] * 1000, 3) if series["count"] else 0,
+        }
+    return dict(sorted(out.items(), key=lambda kv: -kv[1]["total_s"]))
+
+
+def run_level(database, concurrency: int, sessions: int, llm_ms: float, n_doctors: int, n_days: int, seed: int) -> dict:
+    from metrics import TOOL_SECONDS, NODE_SECONDS, DB_SECONDS
+
+    llm = ScriptedChatModel(delay=llm_ms / 1000)
+    doctors = setup(database, llm, n_doctors)
+    days = [f"{d:02d}-09-2025" for d in range(1, n_days + 1)]
+    rng = random.Random(seed)
+    planned = [Session(i, llm, random.Random(rng.random()), doctors, days) for i in range(sessions)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency, thread_name_prefix="session") as pool:
+        done = list(pool.map(Session.run, planned))
+    elapsed = time.perf_counter() - started
+
+    ms = [x * 1000 for s in done for x in s.latencies]
+    invariants = check_invariants(database, done)
+    return {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "turns": len(ms),
+        "errors": sum(s.errors for s in done),
+        "llm_calls": llm.calls,
+        "elapsed_s": round(elapsed, 3),
+        "turns_per_s": round(len(ms) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "mean_ms": round(statistics.fmean(ms), 2),
+        "tools": breakdown(TOOL_SECONDS, "tool"),
+        "nodes": breakdown(NODE_SECONDS, "node"),
+        "db": breakdown(DB_SECONDS, "op"),
+        "invariants": invariants,
+        "ok": not any(invariants[k] for k in ("double_booked", "lost", "unexpected", "orphan_reservations", "unreserved_appointments")),
+    }
+
+
+def report(result: dict):
+    print(f"\nconcurrency {result['concurrency']:>4}: {result['turns']} turns in {result['elapsed_s']} s "
+          f"({result['turns_per_s']} turns/s), p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  "
+          f"p99 {result['p99_ms']} ms, {result['llm_calls']} LLM calls, {result['errors']} errors")
+    for name, t in result["tools"].items():
+        print(f"    tool {name:24s} {t['calls']:>6} calls  {t['total_s']:>9.3f} s  {t['mean_ms']:>8.3f} ms/call")
+    inv = result["invariants"]
+    status = "✅ consistent" if result["ok"] else "❌ INVARIANT VIOLATION"
+    print(f"    {status}: {inv['appointments']} appointments, {len(inv['double_booked'])} double-booked, "
+          f"{len(inv['lost'])} lost, {len(inv['unexpected'])} unexpected, "
+          f"{len(inv['orphan_reservations'])} orphan reservations, {len(inv['unreserved_appointments'])} unreserved")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent end-to-end load test with booking-conflict checks")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="concurrent sessions; one run per value")
+    parser.add_argument("--sessions", type=int, default=200, help="sessions per run")
+    parser.add_argument("--llm-ms", type=float, default=0, help="simulated model latency per call")
+    parser.add_argument("--doctors", type=int, default=3)
+    parser.add_argument("--days", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args()
+
+    # Before anything imports db.connection
+    database = install_fake_db()
+    results = []
+    for concurrency in args.concurrency:
+        result = run_level(database, concurrency, args.sessions, args.llm_ms, args.doctors, args.days, args.seed)
+        report(result)
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,286 @@
+# benchmarks/run.py
+"""
+Microbenchmarks for the tool and data layer.
+
+Runs the availability index and CSV path from backend/, and the CRUD,
+reservation and search layers from backed2/db against an in-process Mongo
+stand-in with a fake LLM. Results are written as JSON so two commits can be
+compared.
+
+    cd backed2
+    python -m benchmarks.run --slots 100000 --output bench.json
+    python -m benchmarks.run --slots 100000 --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks import datasets
+from benchmarks.fakes import install_fake_db, install_fake_llm
+
+BACKEND_AGENTS = Path(__file__).resolve().parents[2] / "backend" / "agents"
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str, calls: int = 1000):
+    """Register a benchmark. The function receives the context and returns a
+    zero-argument callable that performs one call."""
+    def register(fn):
+        BENCHMARKS[name] = (fn, calls)
+        return fn
+    return register
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+def measure(call, calls: int, alloc_calls: int = 50) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - t0)
+    total = time.perf_counter() - started
+
+    # Separate pass: tracemalloc slows calls down too much to time them with it on
+    alloc_calls = min(alloc_calls, calls)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(alloc_calls):
+        call()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = [x * 1000 for x in latencies]
+    return {
+        "calls": calls,
+        "p50_ms": round(percentile(ms, 50), 4),
+        "p95_ms": round(percentile(ms, 95), 4),
+        "p99_ms": round(percentile(ms, 99), 4),
+        "mean_ms": round(statistics.fmean(ms), 4),
+        "ops_per_s": round(calls / total, 1) if total else None,
+        "retained_kib_per_call": round((after - before) / alloc_calls / 1024, 3),
+        "peak_kib": round((peak - before) / 1024, 1),
+    }
+
+
+# ---------------- CSV / backend availability ---------------- #
+
+@benchmark("pandas_specialization_filter", calls=20)
+def bench_pandas_filter(ctx):
+    """The pre-index approach: read the CSV and filter with pandas per call"""
+    import pandas as pd
+    path, day, spec = ctx["csv"], ctx["day"], ctx["specialization"]
+
+    def call():
+        df = pd.read_csv(path)
+        df[
+            (df['date_slot'].apply(lambda input: input.split(' ')[0]) == day) &
+            (df['specialization'].str.lower() == spec) &
+            (df['is_available'] == True)
+        ]
+    return call
+
+
+@benchmark("slot_index_load", calls=3)
+def bench_index_load(ctx):
+    from slot_index import SlotIndex
+    return lambda: SlotIndex(ctx["csv"])
+
+
+@benchmark("slot_index_by_specialization", calls=5000)
+def bench_index_specialization(ctx):
+    index, rng = ctx["index"], random.Random(1)
+    days, specs = ctx["days"], datasets.SPECIALIZATIONS
+    return lambda: index.available_by_specialization(rng.choice(specs), rng.choice(days))
+
+
+@benchmark("slot_index_by_doctor", calls=5000)
+def bench_index_doctor(ctx):
+    index, rng = ctx["index"], random.Random(2)
+    days, names = ctx["days"], ctx["doctor_names"]
+    return lambda: index.available(rng.choice(names), rng.choice(days))
+
+
+@benchmark("slot_index_book", calls=500)
+def bench_index_book(ctx):
+    index, rng = ctx["index"], random.Random(3)
+    days, names = ctx["days"], ctx["doctor_names"]
+    return lambda: index.book(rng.choice(names), rng.choice(days), rng.choice(datasets.SLOT_TIMES))
+
+
+@benchmark("csv_full_rewrite", calls=3)
+def bench_csv_rewrite(ctx):
+    """What every booking used to cost before the journal"""
+    return lambda: ctx["index"].export(ctx["csv"] + ".export")
+
+
+@benchmark("journal_compact", calls=3)
+def bench_journal_compact(ctx):
+    return ctx["index"].compact
+
+
+# ---------------- Mongo CRUD / tools (stand-in) ---------------- #
+
+@benchmark("crud_get_appointments", calls=500)
+def bench_get_appointments(ctx):
+    from db.crud import get_appointments
+    rng, days, names = random.Random(4), ctx["days"], ctx["doctor_names"]
+    return lambda: get_appointments({"doctor_name": rng.choice(names), "date": rng.choice(days)})
+
+
+@benchmark("crud_get_all_doctors", calls=200)
+def bench_get_all_doctors(ctx):
+    from db.crud import get_all_doctors
+    rng = random.Random(5)
+    return lambda: get_all_doctors(rng.choice(datasets.SPECIALIZATIONS))
+
+
+@benchmark("crud_update_appointment", calls=500)
+def bench_update(ctx):
+    from db.crud import update_appointment
+    rng, days, names = random.Random(6), ctx["days"], ctx["doctor_names"]
+    return lambda: update_appointment(
+        {"doctor_name": rng.choice(names), "date": rng.choice(days), "time": rng.choice(datasets.SLOT_TIMES)},
+        {"status": "confirmed"},
+    )
+
+
+@benchmark("crud_create_delete_appointment", calls=500)
+def bench_create_delete(ctx):
+    from db.crud import create_appointment, delete_appointment
+
+    def call():
+        doc = {"patient_name": "bench", "doctor_name": "bench doctor", "date": "01-01-2030", "time": "9:00"}
+        create_appointment(doc)
+        delete_appointment({"patient_name": "bench", "doctor_name": "bench doctor"})
+    return call
+
+
+@benchmark("reservation_claim_release", calls=2000)
+def bench_reservations(ctx):
+    from db.reservations import claim_slot, release_slot
+    rng, days, names = random.Random(8), ctx["days"], ctx["doctor_names"]
+
+    def call():
+        slot = (rng.choice(names), rng.choice(days), rng.choice(datasets.SLOT_TIMES))
+        if claim_slot(*slot, "bench"):
+            release_slot(*slot, "bench")
+    return call
+
+
+@benchmark("query_database_format", calls=200)
+def bench_query_database(ctx):
+    from agents.tools import query_database
+    rng = random.Random(9)
+    collection = ctx["collection"]
+    return lambda: query_database.invoke({"collection_name": collection, "search_text": rng.choice(datasets.LAST)})
+
+
+# ---------------- driver ---------------- #
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def setup(slots: int, max_docs: int, workdir: str) -> dict:
+    sys.path.insert(0, str(BACKEND_AGENTS))
+    from slot_index import SlotIndex
+
+    csv_path = os.path.join(workdir, "doctor_availability.csv")
+    datasets.write_availability_csv(csv_path, slots)
+
+    database = install_fake_db()
+    install_fake_llm()
+    collection = database["appointments"]
+    for i, doc in enumerate(datasets.appointment_docs(slots)):
+        if i >= max_docs:
+            break
+        collection.insert_one(doc)
+
+    n_doctors, n_days = datasets.shape(slots)
+    index = SlotIndex(csv_path)
+    return {
+        "csv": csv_path,
+        "index": index,
+        "collection": collection.name,
+        "doctor_names": [name for name, _ in datasets.doctors(n_doctors)],
+        "days": sorted({d for _, d in index.by_doctor}),
+        "day": next(iter(index.by_doctor))[1],
+        "specialization": datasets.SPECIALIZATIONS[0],
+    }
+
+
+def compare(current: dict, baseline_path: str, threshold: float = 0.10):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline.get('commit')} ({baseline_path})")
+    for name, result in current["benchmarks"].items():
+        old = baseline.get("benchmarks", {}).get(name)
+        if not old or "p50_ms" not in old or "p50_ms" not in result:
+            continue
+        ratio = result["p50_ms"] / old["p50_ms"] if old["p50_ms"] else float("inf")
+        flag = "⚠️ regression" if ratio > 1 + threshold else ""
+        print(f"  {name:34s} p50 {old['p50_ms']:>10.4f} -> {result['p50_ms']:>10.4f} ms  x{ratio:.2f} {flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tool and data layer microbenchmarks")
+    parser.add_argument("--slots", type=int, default=10_000, help="availability slots to generate (10k - 10M)")
+    parser.add_argument("--max-docs", type=int, default=50_000, help="cap on appointment docs loaded into the Mongo stand-in")
+    parser.add_argument("--only", nargs="*", help="run only these benchmarks")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "slots": args.slots,
+        "benchmarks": {},
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = setup(args.slots, args.max_docs, workdir)
+        for name, (fn, calls) in BENCHMARKS.items():
+            if args.only and name not in args.only:
+                continue
+            try:
+                results["benchmarks"][name] = measure(fn(ctx), calls)
+            except ImportError as e:
+                results["benchmarks"][name] = {"skipped": f"missing dependency: {e.name}"}
+            r = results["benchmarks"][name]
+            if "skipped" in r:
+                print(f"{name:34s} skipped ({r['skipped']})")
+            else:
+                print(f"{name:34s} p50 {r['p50_ms']:>10.4f} ms  p99 {r['p99_ms']:>10.4f} ms  {r['ops_per_s']:>10} ops/s  {r['retained_kib_per_call']:>8} KiB/call")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# db/cache.py
+"""
+Read-through cache for the hot appointment reads.
+
+Entries live in a size- and TTL-bounded LRU (cachetools.TTLCache) and carry
+tags: ("day", doctor, date) for an availability lookup, "doctors" for the
+roster, "appointments" for any other query. Writes in db.crud invalidate the
+tags they can touch; an optional change-stream listener does the same for
+writers outside this process.
+"""
+import copy
+import json
+import os
+import threading
+from collections import defaultdict
+from cachetools import TTLCache
+from pymongo.errors import PyMongoError
+from metrics import CACHE_REQUESTS
+
+CACHE_SIZE = int(os.getenv("DB_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("DB_CACHE_TTL", "30"))
+CHANGE_STREAM = os.getenv("DB_CACHE_CHANGE_STREAM", "0") == "1"
+
+ALL_APPOINTMENTS = "appointments"
+DOCTORS = "doctors"
+DOCTOR_FIELDS = ("name", "specialization")
+
+
+def day_tag(doctor_name, date):
+    return ("day", str(doctor_name).strip().lower(), str(date))
+
+
+def query_tags(query: dict) -> set:
+    """Tags for an appointments read: one day when doctor and date are pinned."""
+    doctor, date = query.get("doctor_name"), query.get("date")
+    if isinstance(doctor, str) and isinstance(date, str):
+        return {day_tag(doctor, date)}
+    return {ALL_APPOINTMENTS}
+
+
+def write_tags(*docs) -> set:
+    """
+    Tags a write may affect, given its filter, document and $set fields.
+    A write that doesn't pin both doctor and date drops every day entry (None).
+    """
+    tags = {ALL_APPOINTMENTS}
+    doctors = {doc["doctor_name"] for doc in docs if "doctor_name" in doc}
+    dates = {doc["date"] for doc in docs if "date" in doc}
+    if any(field in doc for doc in docs for field in DOCTOR_FIELDS):
+        tags.add(DOCTORS)
+    if doctors and dates:
+        tags.update(day_tag(doctor, date) for doctor in doctors for date in dates)
+    else:
+        tags.add(None)
+    return tags
+
+
+class QueryCache:
+    def __init__(self, name: str, maxsize: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.name = name
+        self.enabled = maxsize > 0 and ttl > 0
+        self.entries = TTLCache(maxsize=max(maxsize, 1), ttl=max(ttl, 0.001))
+        self.tags = defaultdict(set)   # tag -> keys
+        self.generation = 0
+        self.hits = self.misses = self.invalidations = 0
+        self._stores = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, tags: set, loader):
+        if not self.enabled:
+            return loader()
+        with self._lock:
+            value = self.entries.get(key)
+            generation = self.generation
+            if value is not None:
+                self.hits += 1
+        if value is not None:
+            CACHE_REQUESTS.inc(cache=self.name, result="hit")
+            return copy.deepcopy(value)
+
+        CACHE_REQUESTS.inc(cache=self.name, result="miss")
+        value = loader()
+        with self._lock:
+            self.misses += 1
+            # A write that landed while we were reading makes this result stale
+            if generation == self.generation:
+                self.entries[key] = copy.deepcopy(value)
+                for tag in tags:
+                    self.tags[tag].add(key)
+                self._stores += 1
+                if self._stores >= self.entries.maxsize:
+                    self._prune_tags()
+        return value
+
+    def _prune_tags(self):
+        # Forget keys that TTL/LRU eviction already dropped
+        self._stores = 0
+        for tag in list(self.tags):
+            keys = {key for key in self.tags[tag] if key in self.entries}
+            if keys:
+                self.tags[tag] = keys
+            else:
+                del self.tags[tag]
+
+    def invalidate(self, tags: set):
+        with self._lock:
+            self.generation += 1
+            if None in tags:
+                tags = {tag for tag in self.tags if isinstance(tag, tuple)} | (tags - {None})
+            for tag in tags:
+                for key in self.tags.pop(tag, ()):
+                    if self.entries.pop(key, None) is not None:
+                        self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self.entries.clear()
+            self.tags.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "cache": self.name,
+                "size": len(self.entries),
+                "maxsize": self.entries.maxsize,
+                "ttl": self.entries.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+appointments_cache = QueryCache("appointments")
+
+
+def cache_key(op: str, query: dict) -> str:
+    return op + ":" + json.dumps(query, sort_keys=True, default=str)
+
+
+def stats() -> dict:
+    return appointments_cache.stats()
+
+
+class ChangeStreamInvalidator:
+    """Invalidate on changes made by other processes (needs a replica set)."""
+
+    def __init__(self, collection, cache: QueryCache = appointments_cache):
+        self.collection = collection
+        self.cache = cache
+        self._stream = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _run(self):
+        try:
+            with self.collection.watch(full_document="updateLookup") as stream:
+                self._stream = stream
+                for change in stream:
+                    doc = change.get("fullDocument")
+                    updated = change.get("updateDescription", {}).get("updatedFields", {})
+                    if doc:
+                        self.cache.invalidate(write_tags(doc, updated))
+                    else:
+                        # deletes carry only the _id
+                        self.cache.clear()
+                    if self._stop.is_set():
+                        break
+        except PyMongoError as e:
+            if not self._stop.is_set():
+                print(f"⚠️ Cache change stream stopped: {e}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="cache-invalidator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._stream is not None:
+            self._stream.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def invalidator_from_env():
+    """Start a change-stream invalidator if DB_CACHE_CHANGE_STREAM=1."""
+    if not CHANGE_STREAM or not appointments_cache.enabled:
+        return None
+    from db.connection import get_appointments_collection
+    return ChangeStreamInvalidator(get_appointments_collection()).start()
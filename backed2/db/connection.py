@@ -1,18 +1,63 @@
 import os
-from pymongo import MongoClient
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("MONGODB_DB", "PatientData")
+COLLECTION_NAME = os.getenv("MONGODB_COLLECTION", "appointments")
 
-if not MONGO_URI:
-    raise ValueError("❌ MONGO_URI is missing in .env")
+# Connection pool sizing, shared by the CRUD layer and the checkpointer
+MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
 
-# Connect to MongoDB Atlas
-client = MongoClient(MONGO_URI, tls=True, tlsAllowInvalidCertificates=True)
+_client = None
+_lock = threading.Lock()
 
-db = client[DB_NAME]
 
-appointments_collection = db[os.getenv("MONGODB_COLLECTION", "appointments")]
+def get_client():
+    """Connect to MongoDB Atlas on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                if not MONGO_URI:
+                    raise ValueError("❌ MONGO_URI is missing in .env")
+                from pymongo import MongoClient
+
+                _client = MongoClient(
+                    MONGO_URI,
+                    tls=True,
+                    tlsAllowInvalidCertificates=True,
+                    maxPoolSize=MAX_POOL_SIZE,
+                    minPoolSize=MIN_POOL_SIZE,
+                )
+    return _client
+
+
+def get_db():
+    return get_client()[DB_NAME]
+
+
+def get_appointments_collection():
+    return get_db()[COLLECTION_NAME]
+
+
+def close_client():
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+
+
+def __getattr__(name):
+    # Old module-level names, resolved on first access
+    if name == "client":
+        return get_client()
+    if name == "db":
+        return get_db()
+    if name == "appointments_collection":
+        return get_appointments_collection()
+    raise AttributeError(name)
@@ -1,27 +1,55 @@
 # db/crud.py
-from db.connection import appointments_collection
+from db.connection import get_appointments_collection
+from metrics import timed, DB_SECONDS
+from db.cache import appointments_cache, cache_key, query_tags, write_tags, DOCTORS
 
+@timed(DB_SECONDS, op="create_appointment")
 def create_appointment(data: dict):
     """Create a new appointment"""
-    return appointments_collection.insert_one(data).inserted_id
+    inserted_id = get_appointments_collection().insert_one(data).inserted_id
+    appointments_cache.invalidate(write_tags(data))
+    return inserted_id
 
+@timed(DB_SECONDS, op="create_appointments")
+def create_appointments(docs: list) -> list:
+    """Insert many appointments in one round trip; returns their ids"""
+    if not docs:
+        return []
+    inserted_ids = get_appointments_collection().insert_many(docs).inserted_ids
+    appointments_cache.invalidate(set().union(*(write_tags(doc) for doc in docs)))
+    return inserted_ids
+
+@timed(DB_SECONDS, op="get_appointments")
 def get_appointments(query: dict = {}):
     """Get appointments matching query"""
-    return list(appointments_collection.find(query))
+    return appointments_cache.get_or_load(
+        cache_key("appointments", query), query_tags(query),
+        lambda: list(get_appointments_collection().find(query)),
+    )
 
+@timed(DB_SECONDS, op="update_appointment")
 def update_appointment(query: dict, update: dict):
     """Update appointment(s)"""
-    result = appointments_collection.update_one(query, {"$set": update})
+    result = get_appointments_collection().update_one(query, {"$set": update})
+    if result.matched_count:
+        appointments_cache.invalidate(write_tags(query, update))
     return {"matched": result.matched_count, "modified": result.modified_count}
 
+@timed(DB_SECONDS, op="delete_appointment")
 def delete_appointment(query: dict):
     """Delete appointment(s)"""
-    result = appointments_collection.delete_one(query)
+    result = get_appointments_collection().delete_one(query)
+    if result.deleted_count:
+        appointments_cache.invalidate(write_tags(query))
     return {"deleted": result.deleted_count}
 
+@timed(DB_SECONDS, op="get_all_doctors")
 def get_all_doctors(specialization: str = None):
     """Return all doctors, or only those with a specific specialization"""
     query = {}
     if specialization:
         query["specialization"] = specialization
-    return list(appointments_collection.find(query, {"_id": 0, "name": 1, "specialization": 1}))
+    return appointments_cache.get_or_load(
+        cache_key("doctors", query), {DOCTORS},
+        lambda: list(get_appointments_collection().find(query, {"_id": 0, "name": 1, "specialization": 1})),
+    )
@@ -0,0 +1,85 @@
+# db/indexes.py
+"""
+Index bootstrap for the collections the tools query, plus an explain-based
+check that every tool query shape is served by an index.
+
+    python -m db.indexes          # create indexes and check query plans
+"""
+import sys
+from pymongo import ASCENDING
+from db.connection import get_appointments_collection
+from db.reservations import ensure_reservation_index
+from db.schedule import ensure_schedule_indexes
+from db.search import ensure_search_indexes
+
+# name -> key pattern, created on appointments_collection
+APPOINTMENT_INDEXES = {
+    # check_availability (doctor_name, date) uses the prefix;
+    # update/delete (patient_name, doctor_name, date, time) use all of it.
+    "doctor_date_time_patient": [
+        ("doctor_name", ASCENDING), ("date", ASCENDING),
+        ("time", ASCENDING), ("patient_name", ASCENDING),
+    ],
+    # get_all_doctors(specialization), covered by the index
+    "specialization_name": [("specialization", ASCENDING), ("name", ASCENDING)],
+}
+
+# (name, filter, projection) for each query crud.py issues on behalf of a tool.
+# get_all_doctors() without a specialization is a full listing by design.
+QUERY_SHAPES = [
+    ("get_appointments", {"doctor_name": "x", "date": "01-01-2025"}, None),
+    ("update_appointment", {"patient_name": "x", "doctor_name": "x", "date": "01-01-2025", "time": "09:00"}, None),
+    ("delete_appointment", {"patient_name": "x", "doctor_name": "x", "date": "01-01-2025", "time": "09:00"}, None),
+    ("get_all_doctors", {"specialization": "x"}, {"_id": 0, "name": 1, "specialization": 1}),
+]
+
+
+class CollectionScanError(RuntimeError):
+    """A tool query shape is planned as a collection scan."""
+
+
+def ensure_indexes():
+    """Create all indexes the tools rely on. Safe to call on every start."""
+    for name, keys in APPOINTMENT_INDEXES.items():
+        get_appointments_collection().create_index(keys, name=name)
+    ensure_reservation_index()
+    ensure_schedule_indexes()
+    ensure_search_indexes()
+
+
+def _stages(plan: dict):
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+
+def check_query_plans() -> dict:
+    """Explain every query shape and return {shape name: winning plan stages}."""
+    plans = {}
+    for name, query, projection in QUERY_SHAPES:
+        explain = get_appointments_collection().find(query, projection).explain()
+        winning = explain["queryPlanner"]["winningPlan"]
+        plans[name] = [stage for stage in _stages(winning) if stage]
+    return plans
+
+
+def assert_no_collscan():
+    """Raise CollectionScanError if any tool query shape would scan the collection."""
+    plans = check_query_plans()
+    scans = [name for name, stages in plans.items() if "COLLSCAN" in stages]
+    if scans:
+        raise CollectionScanError(f"❌ Collection scan planned for: {', '.join(scans)}")
+    return plans
+
+
+if __name__ == "__main__":
+    ensure_indexes()
+    try:
+        for name, stages in assert_no_collscan().items():
+            print(f"✅ {name}: {' <- '.join(stages)}")
+    except CollectionScanError as e:
+        print(e)
+        sys.exit(1)
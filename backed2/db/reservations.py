@@ -0,0 +1,244 @@
+# db/reservations.py
+import os
+import re
+from datetime import datetime, timezone
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from db.cache import appointments_cache
+from db.connection import get_db, get_appointments_collection
+from metrics import timed, DB_SECONDS
+
+# One document per taken slot. The unique index is what makes a claim atomic:
+# of any number of concurrent inserts for the same slot exactly one succeeds.
+RESERVATIONS_COLLECTION = os.getenv("MONGODB_RESERVATIONS_COLLECTION", "slot_reservations")
+# One document per one-off data migration that has run
+MIGRATIONS_COLLECTION = os.getenv("MONGODB_MIGRATIONS_COLLECTION", "migrations")
+BACKFILL_BATCH = 1000
+DATE_FORMAT = "%d-%m-%Y"
+
+
+def get_reservations_collection():
+    return get_db()[RESERVATIONS_COLLECTION]
+
+
+SLOT_KEY = [("doctor_key", ASCENDING), ("date", ASCENDING), ("time", ASCENDING)]
+
+_index_ready = False
+
+# Called as listener(doctor_key, date, time, claimed) after this process
+# claims or releases a slot, e.g. to update db.schedule's free-slot timelines
+_listeners = []
+
+
+def on_slot_change(listener):
+    _listeners.append(listener)
+
+
+def _notify(doc: dict, claimed: bool):
+    for listener in _listeners:
+        listener(doc["doctor_key"], doc["date"], doc["time"], claimed)
+
+
+def ensure_reservation_index():
+    """Create the unique (doctor, date, time) index and backfill old bookings, once per process"""
+    global _index_ready
+    if not _index_ready:
+        get_reservations_collection().create_index(SLOT_KEY, unique=True, name="unique_slot")
+        normalize_appointments()
+        backfill_reservations()
+        _index_ready = True
+
+
+def normalize_time(time: str) -> str:
+    """'9:00', '09.00', '9' -> '09:00'. Raises ValueError for anything else, e.g. '10:00 AM'"""
+    match = re.fullmatch(r"(\d{1,2})(?:[:.](\d{2}))?", str(time).strip())
+    if not match or int(match[1]) > 23 or int(match[2] or 0) > 59:
+        raise ValueError(f"Invalid time {time!r}, expected HH:MM (24-hour)")
+    return f"{int(match[1]):02d}:{int(match[2] or 0):02d}"
+
+
+def normalize_date(date: str) -> str:
+    """'1-9-2025', '01-09-2025' -> '01-09-2025'. Raises ValueError for anything else, e.g. '2025-09-01'"""
+    try:
+        return datetime.strptime(str(date).strip(), DATE_FORMAT).strftime(DATE_FORMAT)
+    except ValueError:
+        raise ValueError(f"Invalid date {date!r}, expected DD-MM-YYYY") from None
+
+
+def normalize_slot(date: str, time: str) -> tuple:
+    """(date, time) as stored in appointments and reservations; raises ValueError like the two above"""
+    return normalize_date(date), normalize_time(time)
+
+
+def slot_key(doctor_name: str, date: str, time: str) -> dict:
+    date, time = normalize_slot(date, time)
+    return {
+        "doctor_key": doctor_name.strip().lower(),
+        "date": date,
+        "time": time,
+    }
+
+
+@timed(DB_SECONDS, op="claim_slot")
+def claim_slot(doctor_name: str, date: str, time: str, patient_name: str) -> bool:
+    """Atomically take a slot. Returns False if someone already holds it."""
+    ensure_reservation_index()
+    doc = slot_key(doctor_name, date, time)
+    doc.update({
+        "doctor_name": doctor_name,
+        "patient_name": patient_name,
+        "claimed_at": datetime.now(timezone.utc),
+    })
+    try:
+        get_reservations_collection().insert_one(doc)
+        _notify(doc, True)
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+@timed(DB_SECONDS, op="claim_slots")
+def claim_slots(claims: list) -> list:
+    """
+    Bulk claim_slot for [(doctor_name, date, time, patient_name), ...] in one
+    unordered insert. Returns one bool per claim, False where the slot was taken.
+    """
+    if not claims:
+        return []
+    ensure_reservation_index()
+    claimed_at = datetime.now(timezone.utc)
+    docs = []
+    for doctor_name, date, time, patient_name in claims:
+        doc = slot_key(doctor_name, date, time)
+        doc.update({"doctor_name": doctor_name, "patient_name": patient_name, "claimed_at": claimed_at})
+        docs.append(doc)
+    try:
+        get_reservations_collection().insert_many(docs, ordered=False)
+        claimed = [True] * len(docs)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != 11000 for err in errors):
+            raise
+        taken = {err["index"] for err in errors}
+        claimed = [i not in taken for i in range(len(docs))]
+    for doc, ok in zip(docs, claimed):
+        if ok:
+            _notify(doc, True)
+    return claimed
+
+
+@timed(DB_SECONDS, op="release_slot")
+def release_slot(doctor_name: str, date: str, time: str, patient_name: str = None) -> bool:
+    """Free a slot. When patient_name is given only that patient's hold is released."""
+    try:
+        query = slot_key(doctor_name, date, time)
+    except ValueError:
+        return False   # no slot can have been claimed with this time
+    if patient_name is not None:
+        query["patient_name"] = patient_name
+    if get_reservations_collection().delete_one(query).deleted_count == 0:
+        return False
+    _notify(query, False)
+    return True
+
+
+@timed(DB_SECONDS, op="is_slot_taken")
+def is_slot_taken(doctor_name: str, date: str, time: str) -> bool:
+    try:
+        query = slot_key(doctor_name, date, time)
+    except ValueError:
+        return False
+    return get_reservations_collection().count_documents(query, limit=1) > 0
+
+
+def reserve_existing(bookings: list) -> int:
+    """
+    Reserve slots that are already booked elsewhere (dicts with doctor_name,
+    date, time, patient_name). Slots already reserved and times that can't be
+    parsed are skipped. Returns the number of reservations added.
+    """
+    docs = []
+    for b in bookings:
+        try:
+            doc = slot_key(b["doctor_name"], b["date"], b["time"])
+        except (KeyError, AttributeError, ValueError):
+            continue
+        doc.update({"doctor_name": b["doctor_name"], "patient_name": b.get("patient_name", "")})
+        docs.append(doc)
+    if not docs:
+        return 0
+    try:
+        added = len(get_reservations_collection().insert_many(docs, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+        added = e.details.get("nInserted", 0)
+    # Slots that were already reserved weren't free either
+    for doc in docs:
+        _notify(doc, True)
+    return added
+
+
+@timed(DB_SECONDS, op="backfill_reservations")
+def backfill_reservations(force: bool = False) -> int:
+    """
+    One-off migration: reserve the slots of appointments booked before slot
+    reservations existed, so they can't be booked a second time. Recorded in
+    the migrations collection and skipped once done (unless `force`).
+    Returns the number of reservations added.
+    """
+    migrations = get_db()[MIGRATIONS_COLLECTION]
+    if not force and migrations.find_one({"_id": "reservations_backfill"}) is not None:
+        return 0
+
+    fields = {"_id": 0, "doctor_name": 1, "date": 1, "time": 1, "patient_name": 1}
+    added, batch = 0, []
+    for appointment in get_appointments_collection().find({"patient_name": {"$exists": True}}, fields):
+        batch.append(appointment)
+        if len(batch) >= BACKFILL_BATCH:
+            added += reserve_existing(batch)
+            batch = []
+    added += reserve_existing(batch)
+    migrations.update_one(
+        {"_id": "reservations_backfill"},
+        {"$set": {"done_at": datetime.now(timezone.utc), "added": added}},
+        upsert=True,
+    )
+    return added
+
+
+@timed(DB_SECONDS, op="normalize_appointments")
+def normalize_appointments(force: bool = False) -> int:
+    """
+    One-off migration: rewrite the date and time of appointments stored as
+    typed ('1-9-2025', '9:00') in the canonical form the tools now store and
+    look up ('01-09-2025', '09:00'). Ones that can't be parsed are left as
+    they are. Returns the number of appointments rewritten.
+    """
+    migrations = get_db()[MIGRATIONS_COLLECTION]
+    if not force and migrations.find_one({"_id": "appointments_normalized"}) is not None:
+        return 0
+
+    collection = get_appointments_collection()
+    fields = {"_id": 1, "date": 1, "time": 1}
+    rewritten, batch = 0, []
+    for appointment in collection.find({"patient_name": {"$exists": True}}, fields):
+        try:
+            date, time = normalize_slot(appointment["date"], appointment["time"])
+        except (KeyError, ValueError):
+            continue
+        if (date, time) != (appointment["date"], appointment["time"]):
+            batch.append(UpdateOne({"_id": appointment["_id"]}, {"$set": {"date": date, "time": time}}))
+        if len(batch) >= BACKFILL_BATCH:
+            rewritten += collection.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        rewritten += collection.bulk_write(batch, ordered=False).modified_count
+    if rewritten:
+        appointments_cache.clear()
+    migrations.update_one(
+        {"_id": "appointments_normalized"},
+        {"$set": {"done_at": datetime.now(timezone.utc), "rewritten": rewritten}},
+        upsert=True,
+    )
+    return rewritten
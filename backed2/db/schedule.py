@@ -0,0 +1,397 @@
+# db/schedule.py
+"""
+Availability as weekly recurring templates plus overlays, instead of one
+stored row per doctor per slot.
+
+    schedule_templates   {doctor_key, doctor_name, specialization, weekday, times,
+                          valid_from, valid_to}
+    schedule_exceptions  {doctor_key, date, add: [times], remove: [times]}
+    slot_reservations    bookings (see db/reservations.py)
+
+Free slots for a date range are computed on the fly: template times for
+each weekday (only between the template's valid_from and valid_to, when
+set), adjusted by that date's exception, minus reserved slots.
+Nearest-slot suggestions instead use per-doctor free-slot timelines that
+are kept between queries (see FreeTimelines).
+"""
+import heapq
+import os
+import threading
+import time as clock
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, ReplaceOne
+from db.cache import CACHE_TTL
+from db.connection import get_db
+from db.reservations import (
+    DATE_FORMAT, get_reservations_collection, ensure_reservation_index, normalize_date, normalize_time,
+    on_slot_change, reserve_existing,
+)
+from metrics import timed, DB_SECONDS
+
+TEMPLATES_COLLECTION = os.getenv("MONGODB_TEMPLATES_COLLECTION", "schedule_templates")
+EXCEPTIONS_COLLECTION = os.getenv("MONGODB_EXCEPTIONS_COLLECTION", "schedule_exceptions")
+MAX_RANGE_DAYS = 366
+
+
+def get_templates_collection():
+    return get_db()[TEMPLATES_COLLECTION]
+
+
+def get_exceptions_collection():
+    return get_db()[EXCEPTIONS_COLLECTION]
+
+
+def ensure_schedule_indexes():
+    get_templates_collection().create_index(
+        [("doctor_key", ASCENDING), ("weekday", ASCENDING)], unique=True, name="doctor_weekday")
+    get_templates_collection().create_index(
+        [("specialization_key", ASCENDING)], name="specialization")
+    get_exceptions_collection().create_index(
+        [("doctor_key", ASCENDING), ("date", ASCENDING)], unique=True, name="doctor_date")
+
+
+def doctor_key(name: str) -> str:
+    return name.strip().lower()
+
+
+def parse_date(value: str):
+    return datetime.strptime(value.strip(), DATE_FORMAT).date()
+
+
+def date_range(start: str, days: int) -> list:
+    first = parse_date(start)
+    days = max(1, min(days, MAX_RANGE_DAYS))
+    return [(first + timedelta(days=i)).strftime(DATE_FORMAT) for i in range(days)]
+
+
+def _in_effect(template: dict, day) -> bool:
+    """Whether `template` applies on the date `day` (valid_from/valid_to are inclusive and optional)"""
+    if template.get("valid_from") and day < parse_date(template["valid_from"]):
+        return False
+    if template.get("valid_to") and day > parse_date(template["valid_to"]):
+        return False
+    return True
+
+
+def _minutes(time: str) -> int:
+    hours, minutes = normalize_time(time).split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+# ---------------- reads ---------------- #
+
+def has_templates(doctor_name: str) -> bool:
+    return get_templates_collection().count_documents({"doctor_key": doctor_key(doctor_name)}, limit=1) > 0
+
+
+def _compute(keys: list, dates: list) -> dict:
+    """{doctor_key: {date: [free times]}} for the given doctors and dates"""
+    templates = defaultdict(dict)
+    names = {}
+    for t in get_templates_collection().find({"doctor_key": {"$in": keys}}, {"_id": 0}):
+        templates[t["doctor_key"]][t["weekday"]] = t
+        names[t["doctor_key"]] = t["doctor_name"]
+
+    exceptions = {
+        (e["doctor_key"], e["date"]): e
+        for e in get_exceptions_collection().find({"doctor_key": {"$in": keys}, "date": {"$in": dates}}, {"_id": 0})
+    }
+    taken = {
+        (r["doctor_key"], r["date"], r["time"])
+        for r in get_reservations_collection().find(
+            {"doctor_key": {"$in": keys}, "date": {"$in": dates}},
+            {"_id": 0, "doctor_key": 1, "date": 1, "time": 1},
+        )
+    }
+
+    out = {}
+    for key in keys:
+        if key not in templates:
+            continue
+        days = {}
+        for day in dates:
+            date = parse_date(day)
+            template = templates[key].get(date.weekday())
+            times = set(template["times"]) if template and _in_effect(template, date) else set()
+            exception = exceptions.get((key, day))
+            if exception:
+                times = (times - set(exception.get("remove", []))) | set(exception.get("add", []))
+            free = sorted((t for t in times if (key, day, t) not in taken), key=_minutes)
+            if free:
+                days[day] = free
+        out[names[key]] = days
+    return out
+
+
+@timed(DB_SECONDS, op="free_slots")
+def free_slots(doctor_name: str, start: str, days: int = 1) -> dict:
+    """{date: [free times]} for one doctor over `days` days starting at `start`"""
+    result = _compute([doctor_key(doctor_name)], date_range(start, days))
+    return next(iter(result.values()), {})
+
+
+@timed(DB_SECONDS, op="free_slots_by_specialization")
+def free_slots_by_specialization(specialization: str, start: str, days: int = 1) -> dict:
+    """{doctor_name: {date: [free times]}} for every doctor with the specialization"""
+    keys = get_templates_collection().distinct("doctor_key", {"specialization_key": specialization.strip().lower()})
+    return {name: slots for name, slots in _compute(keys, date_range(start, days)).items() if slots}
+
+
+def nearest(timeline: list, target: int, k: int, low: int = None, high: int = None) -> list:
+    """
+    The k values of the sorted `timeline` closest to `target`, only counting
+    values in [low, high) when given (bisect, then walk outwards).
+    """
+    first = bisect_left(timeline, low) if low is not None else 0
+    end = bisect_left(timeline, high) if high is not None else len(timeline)
+    right = min(max(bisect_left(timeline, target), first), end)
+    left = right - 1
+    out = []
+    while len(out) < k and (left >= first or right < end):
+        if right >= end or (left >= first and target - timeline[left] <= timeline[right] - target):
+            out.append(timeline[left])
+            left -= 1
+        else:
+            out.append(timeline[right])
+            right += 1
+    return out
+
+
+def _value(day: str, time: str) -> int:
+    """Absolute minutes: date ordinal * 1440 + minute of day"""
+    return parse_date(day).toordinal() * 1440 + _minutes(time)
+
+
+def _slot(value: int) -> dict:
+    day = datetime.fromordinal(value // 1440).strftime(DATE_FORMAT)
+    return {"date": day, "time": f"{value % 1440 // 60:02d}:{value % 60:02d}"}
+
+
+class FreeTimeline:
+    """One doctor's free slots as sorted absolute minutes, for the date ordinals in `days`."""
+
+    __slots__ = ("name", "days", "free", "version", "loaded_at")
+
+    def __init__(self, loaded_at: float):
+        self.name = None
+        self.days = set()
+        self.free = []
+        self.version = 0
+        self.loaded_at = loaded_at
+
+
+class FreeTimelines:
+    """
+    Per-doctor free-slot timelines kept between nearest-slot queries.
+
+    Days a query needs are computed once with _compute and merged in. After
+    that, a claim made by this process removes its slot by bisection. A
+    release drops the whole day, because the freed time may not be a
+    template slot, so the next query recomputes it. Claims by other
+    processes aren't seen, so a timeline older than DB_CACHE_TTL is rebuilt.
+    Booking still claims the slot atomically, so a stale suggestion is just
+    refused.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL):
+        self.ttl = ttl
+        self.timelines = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str, now: float) -> FreeTimeline:
+        timeline = self.timelines.get(key)
+        if timeline is None or now - timeline.loaded_at >= self.ttl:
+            timeline = self.timelines[key] = FreeTimeline(now)
+        return timeline
+
+    def nearest(self, keys: list, ordinals: range, target: int, k: int, not_before: int = None) -> dict:
+        """
+        {doctor_key: (doctor_name, k nearest free values)} within the days of
+        `ordinals`, and not before the value `not_before` when given
+        """
+        with self._lock:
+            timelines = {key: self._get(key, clock.monotonic()) for key in keys}
+            missing = {key: set(ordinals) - t.days for key, t in timelines.items()}
+            missing = {key: days for key, days in missing.items() if days}
+            versions = {key: timelines[key].version for key in missing}
+
+        loaded = {}
+        if missing:
+            dates = [datetime.fromordinal(o).strftime(DATE_FORMAT) for o in sorted(set().union(*missing.values()))]
+            for name, days in _compute(list(missing), dates).items():
+                loaded[doctor_key(name)] = (name, days)
+
+        low, high = ordinals[0] * 1440, (ordinals[-1] + 1) * 1440
+        if not_before is not None:
+            low = max(low, not_before)
+        out = {}
+        with self._lock:
+            for key, timeline in timelines.items():
+                free = timeline.free
+                if key in missing:
+                    name, days = loaded.get(key, (None, {}))
+                    added = [_value(day, t) for day, times in days.items()
+                             if parse_date(day).toordinal() in missing[key] for t in times]
+                    free = sorted(free + added)
+                    # A claim or release while _compute ran may not be in `added`
+                    if timeline.version == versions[key] and self.timelines.get(key) is timeline:
+                        timeline.free = free
+                        timeline.days |= missing[key]
+                        timeline.name = timeline.name or name
+                if timeline.name is not None or key in loaded:
+                    out[key] = (timeline.name or loaded[key][0], nearest(free, target, k, low, high))
+        return out
+
+    def slot_changed(self, key: str, date: str, time: str, claimed: bool):
+        try:
+            day = parse_date(date).toordinal()
+            value = day * 1440 + _minutes(time)
+        except ValueError:
+            return
+        with self._lock:
+            timeline = self.timelines.get(key)
+            if timeline is None:
+                return
+            timeline.version += 1
+            if day not in timeline.days:
+                return
+            free = timeline.free
+            if claimed:
+                i = bisect_left(free, value)
+                if i < len(free) and free[i] == value:
+                    del free[i]
+            else:
+                timeline.days.discard(day)
+                del free[bisect_left(free, day * 1440):bisect_left(free, (day + 1) * 1440)]
+
+    def clear(self):
+        with self._lock:
+            self.timelines.clear()
+
+
+free_timelines = FreeTimelines()
+on_slot_change(free_timelines.slot_changed)
+
+
+@timed(DB_SECONDS, op="nearest_free_slots")
+def nearest_free_slots(doctor_name: str, date: str, time: str = None, k: int = 3, window_days: int = 7,
+                       now: datetime = None) -> dict:
+    """
+    The k free slots closest to `date` `time` (midday if no time) within
+    `window_days` either side, for the doctor and, merged, for the other
+    doctors with the same specialization. Slots before `now` (default: the
+    current time) are never suggested:
+
+        {"suggested": [{date, time}], "alternatives": [{doctor, date, time}]}
+    """
+    key = doctor_key(doctor_name)
+    template = get_templates_collection().find_one({"doctor_key": key}, {"specialization_key": 1})
+    if template is None:
+        return {"suggested": [], "alternatives": []}
+    keys = [key] + [
+        other for other in get_templates_collection().distinct(
+            "doctor_key", {"specialization_key": template.get("specialization_key")})
+        if other != key
+    ]
+
+    now = now or datetime.now()
+    day = parse_date(date).toordinal()
+    target = day * 1440 + (_minutes(time) if time else 12 * 60)
+    days = range(max(day - window_days, now.toordinal()), day + window_days + 1)
+    if not days:
+        return {"suggested": [], "alternatives": []}
+    earliest = now.toordinal() * 1440 + now.hour * 60 + now.minute
+    found = free_timelines.nearest(keys, days, target, k, not_before=earliest)
+
+    own = [_slot(v) for v in found.get(key, (None, []))[1]]
+    alternatives = [
+        (abs(v - target), name, v)
+        for other, (name, values) in found.items() if other != key for v in values
+    ]
+    return {
+        "suggested": own,
+        "alternatives": [{"doctor": name, **_slot(v)} for _, name, v in heapq.nsmallest(k, alternatives)],
+    }
+
+
+# ---------------- building templates ---------------- #
+
+def compress_rows(rows):
+    """
+    Turn materialized availability rows (doctor_name, specialization,
+    date_slot 'DD-MM-YYYY H:MM', is_available, patient_to_attend) into
+    (templates, exceptions, bookings).
+
+    The template for a weekday is the set of times offered on most of that
+    weekday's dates between the doctor's first and last date, counting dates
+    without rows as days off; every date that differs gets an exception, so
+    a missing date removes the whole day. Templates are valid only over that
+    first..last range.
+    """
+    offered = defaultdict(lambda: defaultdict(set))   # doctor -> date -> times
+    info, bookings = {}, []
+    for row in rows:
+        parts = str(row["date_slot"]).strip().split(" ")
+        day, time = normalize_date(parts[0]), normalize_time(parts[-1])
+        key = doctor_key(row["doctor_name"])
+        info.setdefault(key, (row["doctor_name"].strip(), str(row.get("specialization") or "").strip()))
+        offered[key][day].add(time)
+        if str(row.get("is_available")).strip().lower() not in ("true", "1"):
+            bookings.append({"doctor_name": row["doctor_name"].strip(), "date": day, "time": time,
+                             "patient_name": str(row.get("patient_to_attend") or "")})
+
+    templates, exceptions = [], []
+    for key, by_date in offered.items():
+        name, specialization = info[key]
+        ordinals = [parse_date(day).toordinal() for day in by_date]
+        first, last = min(ordinals), max(ordinals)
+        weekdays = {datetime.fromordinal(o).weekday() for o in ordinals}
+        by_weekday = defaultdict(list)
+        for o in range(first, last + 1):
+            weekday, day = datetime.fromordinal(o).weekday(), datetime.fromordinal(o).strftime(DATE_FORMAT)
+            if weekday in weekdays:
+                by_weekday[weekday].append((day, frozenset(by_date.get(day, ()))))
+
+        for weekday, days in by_weekday.items():
+            pattern = Counter(times for _, times in days).most_common(1)[0][0]
+            templates.append({
+                "doctor_key": key, "doctor_name": name,
+                "specialization": specialization, "specialization_key": specialization.lower(),
+                "weekday": weekday, "times": sorted(pattern, key=_minutes),
+                "valid_from": datetime.fromordinal(first).strftime(DATE_FORMAT),
+                "valid_to": datetime.fromordinal(last).strftime(DATE_FORMAT),
+            })
+            for day, times in days:
+                if times != pattern:
+                    exceptions.append({
+                        "doctor_key": key, "date": day,
+                        "add": sorted(times - pattern, key=_minutes),
+                        "remove": sorted(pattern - times, key=_minutes),
+                    })
+    return templates, exceptions, bookings
+
+
+def save_templates(templates: list, exceptions: list):
+    """Replace the stored templates/exceptions for the doctors given"""
+    ensure_schedule_indexes()
+    free_timelines.clear()
+    if templates:
+        get_templates_collection().bulk_write([
+            ReplaceOne({"doctor_key": t["doctor_key"], "weekday": t["weekday"]}, t, upsert=True)
+            for t in templates
+        ], ordered=False)
+    if exceptions:
+        get_exceptions_collection().bulk_write([
+            ReplaceOne({"doctor_key": e["doctor_key"], "date": e["date"]}, e, upsert=True)
+            for e in exceptions
+        ], ordered=False)
+
+
+def save_bookings(bookings: list) -> int:
+    """Record already-taken slots as reservations; slots already reserved are skipped."""
+    if not bookings:
+        return 0
+    ensure_reservation_index()
+    return reserve_existing(bookings)
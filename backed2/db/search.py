@@ -0,0 +1,136 @@
+# db/search.py
+"""
+Bounded search over any collection, used by the query_database tool.
+
+Collection names and searchable fields are cached, user text is escaped,
+results are projected and limited server-side, and paging uses an _id cursor.
+Search indexes are built by ensure_search_indexes() (from db.indexes), never
+on the request path.
+"""
+import os
+import time
+import threading
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, TEXT
+from pymongo.collation import Collation
+from pymongo.errors import OperationFailure
+from db.connection import get_db
+from metrics import timed, DB_SECONDS
+
+METADATA_TTL = int(os.getenv("SEARCH_METADATA_TTL", "300"))
+DEFAULT_LIMIT = int(os.getenv("SEARCH_LIMIT", "20"))
+MAX_LIMIT = 100
+# Collections query_database is expected to search; indexed by ensure_search_indexes()
+SEARCH_COLLECTIONS = [
+    name.strip()
+    for name in os.getenv("SEARCH_COLLECTIONS", os.getenv("MONGODB_COLLECTION", "appointments")).split(",")
+    if name.strip()
+]
+TEXT_INDEX = [("$**", TEXT)]
+# Case-insensitive comparisons for the prefix fallback and its field indexes
+CASE_INSENSITIVE = Collation(locale="en", strength=2)
+
+_lock = threading.Lock()
+_collections = {"expires": 0.0, "names": set()}
+_fields = {}        # collection -> list of string fields
+_text_index = {}    # collection -> bool
+
+
+def collection_names() -> set:
+    """Collection names, refreshed at most every METADATA_TTL seconds"""
+    with _lock:
+        if time.monotonic() >= _collections["expires"]:
+            _collections["names"] = set(get_db().list_collection_names())
+            _collections["expires"] = time.monotonic() + METADATA_TTL
+        return _collections["names"]
+
+
+def string_fields(collection_name: str) -> list:
+    """Top-level string fields of a sample document, cached per collection"""
+    if collection_name not in _fields:
+        sample = get_db()[collection_name].find_one({}, {"_id": 0}) or {}
+        _fields[collection_name] = [k for k, v in sample.items() if isinstance(v, str)]
+    return _fields[collection_name]
+
+
+def _text_indexed(collection) -> bool:
+    return any(
+        any(kind == TEXT for _, kind in info["key"])
+        for info in collection.index_information().values()
+    )
+
+
+def has_text_index(collection_name: str) -> bool:
+    """Whether the collection has a text index (cached; indexes are never created here)"""
+    if collection_name not in _text_index:
+        _text_index[collection_name] = _text_indexed(get_db()[collection_name])
+    return _text_index[collection_name]
+
+
+def ensure_search_indexes(collection_names: list = None):
+    """
+    Index the collections query_database searches: a wildcard text index, or,
+    where the server refuses one, a case-insensitive index per string field
+    for the prefix fallback. Safe to call on every start.
+    """
+    for name in collection_names or SEARCH_COLLECTIONS:
+        collection = get_db()[name]
+        if not _text_indexed(collection):
+            try:
+                collection.create_index(TEXT_INDEX, name="search_text")
+            except OperationFailure:
+                for field in string_fields(name):
+                    collection.create_index([(field, ASCENDING)], name=f"{field}_ci", collation=CASE_INSENSITIVE)
+        invalidate_metadata(name)
+
+
+def invalidate_metadata(collection_name: str = None):
+    """Forget cached metadata (all collections, or one)"""
+    with _lock:
+        _collections["expires"] = 0.0
+        if collection_name is None:
+            _fields.clear()
+            _text_index.clear()
+        else:
+            _fields.pop(collection_name, None)
+            _text_index.pop(collection_name, None)
+
+
+def build_query(collection_name: str, search_text: str) -> dict:
+    text = search_text.strip()
+    if not text:
+        return {}
+    if has_text_index(collection_name):
+        return {"$text": {"$search": text}}
+    # Fallback: prefix match on the known string fields, as a range so that,
+    # run with CASE_INSENSITIVE, the per-field collation indexes bound it
+    return {"$or": [{field: {"$gte": text, "$lt": text + "\uffff"}} for field in string_fields(collection_name)]}
+
+
+@timed(DB_SECONDS, op="search")
+def search(collection_name: str, search_text: str = "", fields: list = None,
+           limit: int = DEFAULT_LIMIT, cursor: str = None):
+    """
+    Return (records, next_cursor) for one page of results.
+
+    Records keep their `_id` so a caller that shows fewer of them can page
+    from the last one shown; next_cursor is None when there are no more results.
+    """
+    query = build_query(collection_name, search_text)
+    if query.get("$or") == []:
+        return [], None
+    # Text search can't take a collation; the prefix fallback needs it
+    options = {} if "$text" in query else {"collation": CASE_INSENSITIVE}
+    if cursor:
+        try:
+            query = {"$and": [query, {"_id": {"$gt": ObjectId(cursor)}}]} if query else {"_id": {"$gt": ObjectId(cursor)}}
+        except InvalidId:
+            return [], None
+
+    projection = {field: 1 for field in fields} if fields else None
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    docs = list(get_db()[collection_name].find(query, projection, **options).sort("_id", 1).limit(limit + 1))
+    next_cursor = str(docs[limit - 1]["_id"]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
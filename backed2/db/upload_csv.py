@@ -1,6 +1,29 @@
-import pandas as pd
-from pymongo import MongoClient
+"""
+Stream a doctor availability CSV into MongoDB.
+
+Rows are read in chunks and written as unordered bulk upserts keyed on
+(doctor_name, date_slot), so reloading the same file is idempotent and memory
+stays flat. Every row is tagged with the id of the load that wrote it; once
+the file is in, rows left over from earlier loads (slots no longer in the
+CSV) are deleted. Documents the loader never wrote, such as booked
+appointments, carry no load id and are kept. With --swap the file is loaded into a shadow collection which then
+replaces the live one in a single rename, so the app never sees a half-loaded
+schedule; the target must be named explicitly, since everything else in it
+is dropped.
+
+    python -m db.upload_csv path/to/doctor_availability.csv [--chunk-size 5000]
+    python -m db.upload_csv path/to/doctor_availability.csv --swap --collection doctor_availability
+
+With --templates the rows are not stored one per slot: they are compressed
+into weekly templates, per-date exceptions and reservations (db/schedule.py),
+whose collections are fixed, so --collection and --swap don't apply.
+"""
+import argparse
+import csv
 import os
+import time
+from bson import ObjectId
+from pymongo import MongoClient, UpdateOne, ASCENDING, TEXT
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -11,36 +34,166 @@ MONGO_URI = os.getenv("MONGO_URI") or os.getenv("MONGODB_URI")
 DB_NAME = os.getenv("MONGODB_DB", "PatientData")
 COLLECTION_NAME = os.getenv("MONGODB_COLLECTION", "appointments")  # Upload to same collection used by your app
 
-if not MONGO_URI:
-    raise ValueError("❌ MONGO_URI is missing in .env")
+KEY_FIELDS = ("doctor_name", "date_slot")
+LOAD_ID = "load_id"
+CHUNK_SIZE = 5000
+
+
+def coerce(value):
+    """CSV strings -> None / bool / int / float / str"""
+    if value is None:
+        return None
+    value = value.strip()
+    if value == "" or value.lower() in ("nan", "none", "null"):
+        return None
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def read_chunks(path: str, chunk_size: int = CHUNK_SIZE):
+    """Yield lists of at most chunk_size cleaned rows"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            doc = {k.strip(): coerce(v) for k, v in row.items() if k}
+            if any(doc.get(k) is None for k in KEY_FIELDS):
+                continue
+            chunk.append(doc)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def ensure_key_index(collection):
+    collection.create_index([(k, ASCENDING) for k in KEY_FIELDS], name="doctor_date_slot")
+
+
+def load(collection, path: str, chunk_size: int = CHUNK_SIZE, report=print) -> int:
+    """
+    Upsert every row of the CSV into collection, then delete the rows earlier
+    loads wrote that this one didn't. Returns the number of rows written.
+    """
+    ensure_key_index(collection)
+    load_id = ObjectId()
+    started = time.perf_counter()
+    total = 0
+    for chunk in read_chunks(path, chunk_size):
+        ops = [
+            UpdateOne({k: doc[k] for k in KEY_FIELDS}, {"$set": {**doc, LOAD_ID: load_id}}, upsert=True)
+            for doc in chunk
+        ]
+        collection.bulk_write(ops, ordered=False)
+        total += len(ops)
+        elapsed = time.perf_counter() - started
+        report(f"… {total} rows ({total / elapsed:,.0f} rows/s)")
+    if total:
+        # Only after the whole file is in, so a failed load removes nothing
+        removed = collection.delete_many({LOAD_ID: {"$exists": True, "$ne": load_id}}).deleted_count
+        if removed:
+            report(f"… removed {removed} rows not in this file")
+    return total
+
+
+INDEX_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression", "collation")
+TEXT_OPTIONS = ("weights", "default_language", "language_override")
+
+
+def index_spec(info: dict):
+    """
+    (keys, options) to recreate an index from its index_information() entry.
+    A text index is listed by its internal _fts/_ftsx keys; it is rebuilt
+    from its weights, which name the indexed fields.
+    """
+    options = {k: v for k, v in info.items() if k in INDEX_OPTIONS}
+    keys = list(info["key"])
+    if any(field == "_fts" for field, _ in keys):
+        weights = info.get("weights", {})
+        prefix = [(f, d) for f, d in keys if f not in ("_fts", "_ftsx")]
+        keys = prefix + [(field, TEXT) for field in weights]
+        options.update((k, info[k]) for k in TEXT_OPTIONS if k in info)
+    return keys, options
+
+
+def swap_load(db, collection_name: str, path: str, chunk_size: int = CHUNK_SIZE, report=print) -> int:
+    """Load into a shadow collection, rebuild the live indexes on it, then rename it over the live one."""
+    shadow = db[f"{collection_name}__shadow"]
+    shadow.drop()
+
+    total = load(shadow, path, chunk_size, report)
+
+    live = db[collection_name]
+    if collection_name in db.list_collection_names():
+        for name, info in live.index_information().items():
+            if name == "_id_":
+                continue
+            keys, options = index_spec(info)
+            shadow.create_index(keys, name=name, **options)
+
+    shadow.rename(collection_name, dropTarget=True)
+    return total
+
+
+def load_templates(path: str, chunk_size: int = CHUNK_SIZE):
+    from db.schedule import compress_rows, save_templates, save_bookings
+
+    started = time.perf_counter()
+    rows = (row for chunk in read_chunks(path, chunk_size) for row in chunk)
+    templates, exceptions, bookings = compress_rows(rows)
+    save_templates(templates, exceptions)
+    booked = save_bookings(bookings)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Stored {len(templates)} weekly templates, {len(exceptions)} exceptions "
+          f"and {booked} bookings in {elapsed:.1f}s.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load doctor availability CSV into MongoDB")
+    parser.add_argument("path", help="CSV file with doctor_name, date_slot, ... columns")
+    parser.add_argument("--collection", help=f"target collection (default {COLLECTION_NAME}; required with --swap)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--swap", action="store_true", help="load into a shadow collection and swap it in")
+    parser.add_argument("--templates", action="store_true", help="store weekly templates + exceptions instead of one row per slot")
+    args = parser.parse_args(argv)
 
-# Connect to MongoDB
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-collection = db[COLLECTION_NAME]
+    if args.swap and not args.collection:
+        # The default collection also holds booked appointments, which a swap would drop
+        parser.error("--swap replaces the whole target collection; name it explicitly with --collection")
+    if args.templates and (args.swap or args.collection):
+        parser.error("--templates stores into the schedule collections; it can't be combined with --collection or --swap")
+    args.collection = args.collection or COLLECTION_NAME
 
-# Path to CSV file
-CSV_FILE = r"C:\Users\Aman Kumar\Desktop\AI_Agent\backed2\doctor_availability.csv"
+    if args.templates:
+        return load_templates(args.path, args.chunk_size)
 
-if not os.path.exists(CSV_FILE):
-    raise FileNotFoundError(f"❌ CSV file not found at: {CSV_FILE}")
+    if not MONGO_URI:
+        raise ValueError("❌ MONGO_URI is missing in .env")
+    if not os.path.exists(args.path):
+        raise FileNotFoundError(f"❌ CSV file not found at: {args.path}")
 
-# Read the CSV
-df = pd.read_csv(CSV_FILE)
+    client = MongoClient(MONGO_URI)
+    db = client[DB_NAME]
 
-# Replace NaN with None for MongoDB
-df = df.where(pd.notnull(df), None)
+    started = time.perf_counter()
+    if args.swap:
+        total = swap_load(db, args.collection, args.path, args.chunk_size)
+    else:
+        total = load(db[args.collection], args.path, args.chunk_size)
+    elapsed = time.perf_counter() - started
 
-# Convert to list of dictionaries
-data = df.to_dict(orient="records")
+    if not total:
+        print("❌ No data found in CSV.")
+    else:
+        print(f"✅ Upserted {total} rows into '{args.collection}' in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s).")
+    client.close()
 
-if not data:
-    print("❌ No data found in CSV.")
-else:
-    # Optional: clear old data before inserting
-    deleted_count = collection.delete_many({}).deleted_count
-    print(f"🗑 Cleared {deleted_count} existing records from '{COLLECTION_NAME}'.")
 
-    # Insert into MongoDB
-    result = collection.insert_many(data)
-    print(f"✅ Inserted {len(result.inserted_ids)} documents into '{COLLECTION_NAME}' collection.")
+if __name__ == "__main__":
+    main()
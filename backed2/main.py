@@ -1,10 +1,35 @@
 # backend/main.py
 
+import argparse
+import uuid
 from agents.graph import run_graph
+from agents.runtime import get_runtime, shutdown_runtime
+from db.connection import close_client
+
+
+def chat():
+    get_runtime()
+    thread_id = str(uuid.uuid4())
+    try:
+        while True:
+            user_input = input("You: ")
+            if user_input.lower() in ("exit", "quit"):
+                break
+            print("🤖:", run_graph(user_input, thread_id))
+    finally:
+        shutdown_runtime()
+        close_client()
+
 
 if __name__ == "__main__":
-    while True:
-        user_input = input("You: ")
-        if user_input.lower() in ("exit", "quit"):
-            break
-        print("🤖:", run_graph(user_input))
+    parser = argparse.ArgumentParser(description="Appointment booking agent")
+    parser.add_argument("--serve", action="store_true", help="run the async HTTP server instead of the CLI chat")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.serve:
+        from server import main as serve
+        serve(args.host, args.port)
+    else:
+        chat()
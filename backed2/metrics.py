@@ -0,0 +1,218 @@
+# metrics.py
+"""
+In-process metrics for the agent and db layers: histograms for graph nodes,
+tools, DB calls and checkpoint I/O, and counters for Gemini tokens.
+
+    with span(NODE_SECONDS, node="chatbot"): ...
+    @timed(DB_SECONDS, op="get_appointments")
+
+render_prometheus() returns Prometheus text format; export_jsonl() appends
+a snapshot line to a file. Set METRICS_JSONL to have the runtime export
+every METRICS_EXPORT_INTERVAL seconds.
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name, self.help = name, help
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [{"labels": dict(k), "value": v} for k, v in self.values.items()]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets=DEFAULT_BUCKETS):
+        self.name, self.help = name, help
+        self.buckets = tuple(buckets)
+        self.series = {}   # labels -> [bucket counts..., +Inf count], sum, count
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _key(labels)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [
+                {"labels": dict(k), "count": s["count"], "sum": s["sum"], "buckets": list(s["counts"])}
+                for k, s in self.series.items()
+            ]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help))
+
+    def histogram(self, name: str, help: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help, buckets))
+
+    def reset(self):
+        for metric in self.metrics.values():
+            with metric._lock:
+                getattr(metric, "values", getattr(metric, "series", {})).clear()
+
+
+REGISTRY = Registry()
+
+NODE_SECONDS = REGISTRY.histogram("agent_node_seconds", "Time spent in each graph node")
+TOOL_SECONDS = REGISTRY.histogram("agent_tool_seconds", "Time spent in each tool call")
+DB_SECONDS = REGISTRY.histogram("agent_db_seconds", "Time spent in Mongo calls made by the tools")
+CHECKPOINT_SECONDS = REGISTRY.histogram("agent_checkpoint_seconds", "Time spent reading/writing checkpoints")
+ERRORS = REGISTRY.counter("agent_errors_total", "Exceptions raised inside a span")
+LLM_CALLS = REGISTRY.counter("agent_llm_calls_total", "Gemini calls by call site")
+LLM_TOKENS = REGISTRY.counter("agent_llm_tokens_total", "Gemini tokens by call site and kind (prompt/completion)")
+LLM_SECONDS = REGISTRY.histogram("agent_llm_seconds", "Gemini call latency by call site and bound tool set (all/subset)")
+SCHEMA_TOKENS = REGISTRY.counter("agent_tool_schema_tokens_total", "Estimated tool-schema prompt tokens sent and saved by tool selection")
+TURN_EXITS = REGISTRY.counter("agent_turn_exits_total", "Turns ended by a direct tool reply or an exhausted budget")
+CACHE_REQUESTS = REGISTRY.counter("agent_cache_requests_total", "Read-through cache lookups by cache and result (hit/miss)")
+
+
+@contextmanager
+def span(histogram: Histogram, **labels):
+    """Time the block into `histogram`; exceptions are counted and re-raised."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.inc(metric=histogram.name, **labels)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - started, **labels)
+
+
+def timed(histogram: Histogram, **labels):
+    """Decorator form of span(); works on sync and async functions."""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(histogram, **labels):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(histogram, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def instrument_tool(tool):
+    """Time a LangChain tool's sync and async implementations in place."""
+    if getattr(tool, "_instrumented", False):
+        return tool
+    if tool.func is not None:
+        tool.func = timed(TOOL_SECONDS, tool=tool.name)(tool.func)
+    if getattr(tool, "coroutine", None) is not None:
+        tool.coroutine = timed(TOOL_SECONDS, tool=tool.name)(tool.coroutine)
+    object.__setattr__(tool, "_instrumented", True)
+    return tool
+
+
+def record_llm_usage(message, call: str):
+    """Count one Gemini call and its prompt/completion tokens."""
+    LLM_CALLS.inc(call=call)
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage:
+        LLM_TOKENS.inc(usage.get("input_tokens", 0), call=call, kind="prompt")
+        LLM_TOKENS.inc(usage.get("output_tokens", 0), call=call, kind="completion")
+    return message
+
+
+def _fmt_labels(labels: dict, extra: dict = None) -> str:
+    items = {**labels, **(extra or {})}
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items.items()) + "}"
+
+
+def render_prometheus(registry: Registry = REGISTRY) -> str:
+    lines = []
+    for metric in registry.metrics.values():
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        if isinstance(metric, Counter):
+            lines.append(f"# TYPE {metric.name} counter")
+            for s in metric.snapshot():
+                lines.append(f"{metric.name}{_fmt_labels(s['labels'])} {s['value']}")
+            continue
+
+        lines.append(f"# TYPE {metric.name} histogram")
+        for s in metric.snapshot():
+            cumulative = 0
+            for bound, count in zip(list(metric.buckets) + ["+Inf"], s["buckets"]):
+                cumulative += count
+                lines.append(f"{metric.name}_bucket{_fmt_labels(s['labels'], {'le': bound})} {cumulative}")
+            lines.append(f"{metric.name}_sum{_fmt_labels(s['labels'])} {s['sum']}")
+            lines.append(f"{metric.name}_count{_fmt_labels(s['labels'])} {s['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot(registry: Registry = REGISTRY) -> dict:
+    return {name: metric.snapshot() for name, metric in registry.metrics.items()}
+
+
+def export_jsonl(path: str, registry: Registry = REGISTRY):
+    """Append one {"ts": ..., "metrics": {...}} line to path."""
+    with open(path, "a") as f:
+        f.write(json.dumps({"ts": time.time(), "metrics": snapshot(registry)}) + "\n")
+
+
+class JsonlExporter:
+    """Background thread that exports a snapshot every `interval` seconds."""
+
+    def __init__(self, path: str, interval: float = 60):
+        self.path, self.interval = path, interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            export_jsonl(self.path)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        export_jsonl(self.path)
+
+
+def exporter_from_env():
+    path = os.getenv("METRICS_JSONL")
+    if not path:
+        return None
+    return JsonlExporter(path, float(os.getenv("METRICS_EXPORT_INTERVAL", "60"))).start()
@@ -0,0 +1,113 @@
+# server.py
+"""
+Small asyncio HTTP entry point for the agent.
+
+    POST /chat   {"message": "...", "thread_id": "..."}  -> {"reply": "...", "thread_id": "..."}
+    GET  /health                                         -> {"status": "ok"}
+    GET  /metrics                                        -> Prometheus text
+
+Each request is an `arun_graph` call, so one process keeps many
+conversations in flight while blocking work runs on the runtime executor.
+"""
+import asyncio
+import json
+import os
+import uuid
+
+from agents.graph import arun_graph
+from agents.runtime import get_runtime, shutdown_runtime
+from db.connection import close_client
+from metrics import render_prometheus
+
+MAX_BODY = 64 * 1024
+MAX_IN_FLIGHT = int(os.getenv("SERVER_MAX_IN_FLIGHT", "500"))
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+async def _respond(writer, status: int, payload, content_type: str = "application/json"):
+    body = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    writer.write(head.encode() + body)
+    await writer.drain()
+
+
+async def _read_request(reader):
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    method, path, _ = request_line.split(" ", 2)
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    if length > MAX_BODY:
+        return method, path, None
+    body = await reader.readexactly(length) if length else b""
+    return method, path, body
+
+
+def make_handler(limit: asyncio.Semaphore):
+    async def handle(reader, writer):
+        try:
+            try:
+                method, path, body = await _read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError):
+                return await _respond(writer, 400, {"error": "malformed request"})
+
+            if method == "GET" and path == "/health":
+                return await _respond(writer, 200, {"status": "ok"})
+            if method == "GET" and path == "/metrics":
+                return await _respond(writer, 200, render_prometheus(), "text/plain; version=0.0.4")
+            if method != "POST" or path != "/chat":
+                return await _respond(writer, 404, {"error": "not found"})
+            if body is None:
+                return await _respond(writer, 413, {"error": "body too large"})
+
+            try:
+                data = json.loads(body or b"{}")
+                message = data["message"]
+            except (ValueError, KeyError, TypeError):
+                return await _respond(writer, 400, {"error": "expected JSON with a 'message' field"})
+            thread_id = data.get("thread_id") or str(uuid.uuid4())
+
+            async with limit:
+                try:
+                    reply = await arun_graph(message, thread_id)
+                except Exception as e:
+                    return await _respond(writer, 500, {"error": str(e), "thread_id": thread_id})
+            await _respond(writer, 200, {"reply": reply, "thread_id": thread_id})
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8000):
+    runtime = get_runtime()
+    runtime.install_executor()
+    server = await asyncio.start_server(make_handler(asyncio.Semaphore(MAX_IN_FLIGHT)), host, port)
+    print(f"🤖 Serving on http://{host}:{port}/chat")
+    async with server:
+        await server.serve_forever()
+
+
+def main(host: str = "127.0.0.1", port: int = 8000):
+    try:
+        asyncio.run(serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_runtime()
+        close_client()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# tests/conftest.py
+"""
+Tests run against the in-process stand-ins from benchmarks/fakes.py, so no
+MongoDB or Gemini access is needed:
+
+    cd backed2 && python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+BACKED2 = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKED2 not in sys.path:
+    sys.path.insert(0, BACKED2)
+
+from benchmarks.fakes import install_fake_db  # noqa: E402
+
+# Before anything imports db.connection
+DATABASE = install_fake_db()
+
+
+@pytest.fixture
+def database():
+    """The fake database, emptied, with read caches and name indexes reset."""
+    import db.reservations
+    from db.cache import appointments_cache
+    from db.schedule import free_timelines
+    from agents.names import invalidate_names
+
+    for name in DATABASE.list_collection_names():
+        DATABASE[name].drop()
+    db.reservations._index_ready = False
+    appointments_cache.clear()
+    free_timelines.clear()
+    invalidate_names()
+    return DATABASE
+
+
+@pytest.fixture
+def call():
+    """call(tool, **args) -> the tool's raw (artifact) result."""
+    from agents.serialize import raw_result
+    return lambda tool, **args: raw_result(tool, args)
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeLLM
+from agents.answer_cache import AnswerCache, normalize_question
+
+
+def _ask(llm):
+    return lambda question: llm.invoke([question]).content
+
+
+def test_question_words_and_order_are_kept():
+    keys = {normalize_question(q) for q in ("Where is the clinic?", "When is the clinic?", "What does the clinic do?")}
+    assert len(keys) == 3
+    assert normalize_question("Who is the doctor?") != normalize_question("Which doctor?")
+    assert normalize_question("dog bites man") != normalize_question("man bites dog")
+
+
+def test_filler_words_share_a_key():
+    assert normalize_question("What are your working hours?") == normalize_question("what are the working hours")
+
+
+def test_different_questions_get_different_answers():
+    cache = AnswerCache()
+    assert cache.get_or_compute("Where is the clinic?", lambda q: "12 Main St") == "12 Main St"
+    assert cache.get_or_compute("When is the clinic open?", lambda q: "9 to 6") == "9 to 6"
+    assert cache.lookup("where is the clinic") == "12 Main St"
+
+
+def test_concurrent_misses_share_one_call():
+    llm = FakeLLM(reply="9 AM to 6 PM", delay=0.05)
+    cache = AnswerCache()
+    with ThreadPoolExecutor(8) as pool:
+        answers = list(pool.map(lambda _: cache.get_or_compute("working hours?", _ask(llm)), range(8)))
+    assert answers == ["9 AM to 6 PM"] * 8
+    assert llm.calls == 1
+
+
+def test_async_misses_share_one_call():
+    llm = FakeLLM(reply="9 AM to 6 PM", delay=0.05)
+    cache = AnswerCache()
+
+    async def acompute(question):
+        return (await llm.ainvoke([question])).content
+
+    async def main():
+        return await asyncio.gather(*(cache.aget_or_compute("working hours?", acompute) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["9 AM to 6 PM"] * 5
+    assert llm.calls == 1
+
+
+def test_async_embedder_runs_off_the_event_loop():
+    threads = []
+
+    def embedder(text):
+        threads.append(threading.get_ident())
+        return [1.0, float(len(text))]
+
+    cache = AnswerCache(embedder=embedder, threshold=0.99)
+
+    async def acompute(question):
+        return "answer"
+
+    async def main():
+        await cache.aget_or_compute("working hours", acompute)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert threads and loop_thread not in threads
+
+
+def test_similar_question_is_served_from_the_embedding():
+    cache = AnswerCache(embedder=lambda text: [1.0, 0.0] if "hours" in text else [0.0, 1.0], threshold=0.9)
+    cache.get_or_compute("working hours", lambda q: "9 to 6")
+    assert cache.get_or_compute("opening hours today", lambda q: "computed") == "9 to 6"
+    assert cache.get_or_compute("parking", lambda q: "computed") == "computed"
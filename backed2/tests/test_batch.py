@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+import batch
+from db.reservations import RESERVATIONS_COLLECTION
+
+
+def book(patient, time, date="01-09-2025"):
+    return {"action": "book", "patient_name": patient, "doctor_name": "Jane Smith", "date": date, "time": time}
+
+
+def cancel(patient, time, date="01-09-2025"):
+    return {"action": "cancel", "patient_name": patient, "doctor_name": "Jane Smith", "date": date, "time": time}
+
+
+@pytest.fixture
+def runner(database):
+    runner = batch.BatchRunner(workers=4, run_id="test-run")
+    yield runner
+    runner.close()
+
+
+def test_bad_row_fails_alone(runner, database):
+    out = runner.run_chunk(0, [book("Ann", "10:00"), book("Bob", "10:00 AM"), book("Cy", "11:00")])
+    assert [r["ok"] for r in out] == [True, False, True]
+    assert "HH:MM" in out[1]["result"]["message"]
+    assert database["appointments"].count_documents({}) == 2
+
+
+def test_rows_take_effect_in_input_order(runner, database):
+    out = runner.run_chunk(0, [book("Ann", "10:00"), cancel("Ann", "10:00"), book("Bob", "10:00")])
+    assert [r["ok"] for r in out] == [True, True, True]
+    assert [d["patient_name"] for d in database["appointments"].find({})] == ["Bob"]
+
+
+def test_repeated_slot_splits_the_bulk_write(runner):
+    chunk = [book("Ann", "10:00"), book("Bob", "9:00"), book("Cy", "10:00")]
+    assert runner.segments(chunk) == [(True, [0, 1]), (True, [2])]
+    assert [r["ok"] for r in runner.run_chunk(0, chunk)] == [True, True, False]
+
+
+def test_rows_on_the_same_slot_run_in_order(runner, database):
+    reschedule = {"action": "reschedule", "patient_name": "Bob", "doctor_name": "Jane Smith",
+                  "old_date": "01-09-2025", "old_time": "9:00", "new_date": "01-09-2025", "new_time": "10:00"}
+    chunk = [book("Ann", "10:00"), book("Bob", "9:00"), cancel("Ann", "10:00"), reschedule, cancel("Cy", "11:00")]
+    assert runner.chains(chunk, [2, 3, 4]) == [[2, 3], [4]]
+    out = runner.run_chunk(0, chunk)
+    assert [r["ok"] for r in out] == [True, True, True, True, False]
+    assert database[RESERVATIONS_COLLECTION].count_documents({}) == 1
+    assert database["appointments"].find_one({"patient_name": "Bob"})["time"] == "10:00"
+
+
+def test_free_text_threads_are_named_after_the_run(runner, monkeypatch):
+    import agents.graph
+    monkeypatch.setattr(agents.graph, "run_graph", lambda message, thread_id: f"ok {thread_id}")
+    out = runner.run_chunk(40, [{"message": "hello"}, {"message": "hi", "thread_id": "mine"}])
+    assert [r["thread_id"] for r in out] == ["batch-test-run-40", "mine"]
+    runner.used_graph = False
+
+
+def test_resume_starts_after_the_last_written_row(tmp_path):
+    output = tmp_path / "results.jsonl"
+    assert batch.resume_row(str(output)) == 0
+    output.write_text(json.dumps({"row": 10}) + "\n" + json.dumps({"row": 11}) + "\n" + '{"row": 1')
+    assert batch.resume_row(str(output)) == 12
+    assert output.read_text().endswith('{"row": 11}\n')
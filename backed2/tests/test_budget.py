@@ -0,0 +1,84 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+import agents.runtime
+from agents import budget, graph, llm_config
+from benchmarks.fakes import install_fake_llm, FakeLLM
+
+
+@pytest.fixture
+def slow_llm(database):
+    previous = llm_config._llm
+    llm = install_fake_llm(FakeLLM(delay=5))
+    graph._llm_with_tools = None
+    yield llm
+    llm_config.set_llm(previous)
+    graph._llm_with_tools = None
+
+
+def late_turn(seconds_left: float) -> dict:
+    return {
+        "messages": [HumanMessage(content="What are your opening hours?")],
+        "llm_calls": 0,
+        "tool_calls": 0,
+        "turn_started": time.time() - (budget.MAX_SECONDS - seconds_left),
+    }
+
+
+def ended(state: dict, update: dict) -> str:
+    """The reply a timed-out chatbot update leads to."""
+    state = {**state, **update}
+    assert budget.route_after_chatbot(state) == "budget_exhausted"
+    message = budget.budget_exhausted(state)["messages"][-1]
+    assert not message.tool_calls
+    return message.content
+
+
+def assert_ended_on_time(state: dict, update: dict, started: float):
+    assert time.perf_counter() - started < 1
+    assert "messages" not in update
+    assert "couldn't finish" in ended(state, update)
+
+
+def test_chatbot_call_is_limited_to_the_time_left(slow_llm):
+    state, started = late_turn(0.2), time.perf_counter()
+    assert_ended_on_time(state, graph.chatbot(state), started)
+    assert slow_llm.calls == 1
+
+
+def test_achatbot_call_is_limited_to_the_time_left(slow_llm):
+    state, started = late_turn(0.2), time.perf_counter()
+    assert_ended_on_time(state, asyncio.run(graph.achatbot(state)), started)
+
+
+def test_no_model_call_once_the_turn_is_out_of_time(slow_llm):
+    state = late_turn(-1)
+    assert "couldn't finish" in ended(state, graph.chatbot(state))
+    assert slow_llm.calls == 0
+
+
+def test_remaining_counts_down_from_turn_start():
+    assert budget.remaining({}) == budget.MAX_SECONDS
+    assert budget.remaining(late_turn(-5)) == 0
+    assert 9 < budget.remaining(late_turn(10)) <= 10
+
+
+def test_timed_out_turn_streams_its_reply(slow_llm, monkeypatch):
+    monkeypatch.setattr(budget, "MAX_SECONDS", 0.2)
+    compiled = graph.complie_graph_with_checkpointer(InMemorySaver())
+    monkeypatch.setattr(agents.runtime, "get_runtime", lambda: SimpleNamespace(graph=compiled))
+
+    events = list(graph.stream_graph("What are your opening hours?", "slow-thread"))
+    assert len(events) == 1
+    kind, text = events[0]
+    assert kind == "token" and "couldn't finish" in text
+
+    # The next turn starts with a fresh budget
+    monkeypatch.setattr(budget, "MAX_SECONDS", 30)
+    slow_llm.delay = 0
+    assert graph.run_graph("And on Sundays?", "slow-thread") == slow_llm.reply
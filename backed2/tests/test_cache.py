@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from db import crud
+from db.cache import appointments_cache
+
+
+def appointment(patient, date="01-09-2025", time="10:00", doctor="Jane Smith"):
+    return {"patient_name": patient, "doctor_name": doctor, "date": date, "time": time}
+
+
+def day(date="01-09-2025", doctor="Jane Smith"):
+    return [a["patient_name"] for a in crud.get_appointments({"doctor_name": doctor, "date": date})]
+
+
+@pytest.fixture
+def reads(database, monkeypatch):
+    """Counts the finds that reach the collection."""
+    calls = []
+    collection = database["appointments"]
+    find = collection.find
+    monkeypatch.setattr(collection, "find", lambda *args, **kwargs: calls.append(args) or find(*args, **kwargs))
+    return calls
+
+
+def test_repeated_reads_are_served_from_the_cache(reads):
+    crud.create_appointment(appointment("Ann"))
+    assert day() == day() == ["Ann"]
+    assert len(reads) == 1
+    assert appointments_cache.stats()["hits"] == 1
+
+
+def test_create_invalidates_only_its_day(reads):
+    day(), day("02-09-2025")
+    crud.create_appointment(appointment("Ann"))
+    assert day() == ["Ann"]
+    assert day("02-09-2025") == []
+    assert len(reads) == 3
+
+
+def test_moving_an_appointment_invalidates_both_days(database):
+    crud.create_appointment(appointment("Ann"))
+    assert day() == ["Ann"] and day("02-09-2025") == []
+    crud.update_appointment({"patient_name": "Ann", "doctor_name": "Jane Smith", "date": "01-09-2025"},
+                            {"date": "02-09-2025"})
+    assert day() == []
+    assert day("02-09-2025") == ["Ann"]
+
+
+def test_delete_invalidates(reads):
+    crud.create_appointment(appointment("Ann"))
+    assert day() == ["Ann"]
+    crud.delete_appointment({"patient_name": "Ann", "doctor_name": "Jane Smith", "date": "01-09-2025"})
+    assert day() == []
+
+
+def test_unpinned_writes_drop_every_day(database):
+    crud.create_appointment(appointment("Ann"))
+    assert day() == ["Ann"]
+    crud.delete_appointment({"patient_name": "Ann"})
+    assert day() == []
+
+
+def test_doctor_roster_is_cached_until_a_doctor_changes(database, reads):
+    database["appointments"].insert_one({"name": "Jane Smith", "specialization": "dentist"})
+    assert crud.get_all_doctors() == crud.get_all_doctors() == [{"name": "Jane Smith", "specialization": "dentist"}]
+    assert len(reads) == 1
+    crud.create_appointment({"name": "John Doe", "specialization": "dentist"})
+    assert [d["name"] for d in crud.get_all_doctors()] == ["Jane Smith", "John Doe"]
+
+
+def test_read_racing_a_write_is_not_cached(database):
+    loading, written = threading.Event(), threading.Event()
+
+    def slow_load():
+        loading.set()
+        written.wait(5)
+        return ["stale"]
+
+    reader = threading.Thread(target=appointments_cache.get_or_load, args=("k", {"t"}, slow_load))
+    reader.start()
+    loading.wait(5)
+    appointments_cache.invalidate({"other"})
+    written.set()
+    reader.join()
+    assert appointments_cache.get_or_load("k", {"t"}, lambda: ["fresh"]) == ["fresh"]
+
+
+def test_callers_get_copies(database):
+    crud.create_appointment(appointment("Ann"))
+    crud.get_appointments({"doctor_name": "Jane Smith", "date": "01-09-2025"})[0]["patient_name"] = "Bob"
+    assert day() == ["Ann"]
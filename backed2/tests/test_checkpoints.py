@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from agents.checkpoints import compact_thread, expire_idle_threads, prune_thread, run_maintenance
+from benchmarks.fakes import FakeCollection
+
+
+@pytest.fixture
+def saver():
+    return SimpleNamespace(checkpoint_collection=FakeCollection("checkpoints"),
+                           writes_collection=FakeCollection("checkpoint_writes"))
+
+
+def written_at(when: datetime) -> ObjectId:
+    # from_datetime() zeroes the non-time bytes; keep ids unique
+    return ObjectId(ObjectId.from_datetime(when).binary[:4] + ObjectId().binary[4:])
+
+
+def add_thread(saver, thread_id, n, ns="", days_ago=0):
+    written = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    for i in range(n):
+        checkpoint_id = f"{i:04d}"
+        scope = {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id}
+        saver.checkpoint_collection.insert_one({
+            **scope, "_id": written_at(written),
+            "parent_checkpoint_id": f"{i - 1:04d}" if i else None,
+        })
+        saver.writes_collection.insert_one({**scope, "task_id": "t", "idx": 0})
+
+
+def checkpoint_ids(saver, thread_id, ns=""):
+    docs = saver.checkpoint_collection.find({"thread_id": thread_id, "checkpoint_ns": ns}).sort("checkpoint_id")
+    return [(d["checkpoint_id"], d["parent_checkpoint_id"]) for d in docs]
+
+
+def write_ids(saver, thread_id):
+    return sorted(d["checkpoint_id"] for d in saver.writes_collection.find({"thread_id": thread_id}))
+
+
+def test_prune_keeps_the_newest_and_reroots_them(saver):
+    add_thread(saver, "a", 5)
+    assert prune_thread(saver, "a", keep_last=2) == 3
+    assert checkpoint_ids(saver, "a") == [("0003", None), ("0004", "0003")]
+    assert write_ids(saver, "a") == ["0003", "0004"]
+
+
+def test_prune_leaves_short_threads_alone(saver):
+    add_thread(saver, "a", 2)
+    assert prune_thread(saver, "a", keep_last=2) == 0
+    assert checkpoint_ids(saver, "a") == [("0000", None), ("0001", "0000")]
+
+
+def test_namespaces_are_pruned_separately(saver):
+    add_thread(saver, "a", 3)
+    add_thread(saver, "a", 3, ns="tools")
+    assert prune_thread(saver, "a", keep_last=1) == 4
+    assert checkpoint_ids(saver, "a") == [("0002", None)]
+    assert checkpoint_ids(saver, "a", "tools") == [("0002", None)]
+
+
+def test_compact_keeps_only_the_latest_writes(saver):
+    add_thread(saver, "a", 4)
+    assert compact_thread(saver, "a", keep_last=2) == 2
+    assert checkpoint_ids(saver, "a") == [("0002", None), ("0003", "0002")]
+    assert write_ids(saver, "a") == ["0003"]
+
+
+def test_idle_threads_expire_by_checkpoint_age(saver):
+    add_thread(saver, "old", 2, days_ago=40)
+    add_thread(saver, "new", 2, days_ago=1)
+    assert expire_idle_threads(saver, idle_days=30) == 1
+    assert saver.checkpoint_collection.distinct("thread_id") == ["new"]
+    assert write_ids(saver, "old") == []
+
+
+def test_maintenance_expires_then_compacts_long_threads(saver):
+    add_thread(saver, "old", 1, days_ago=40)
+    add_thread(saver, "long", 5)
+    add_thread(saver, "short", 2)
+    assert run_maintenance(saver, keep_last=3, idle_days=30) == {"expired_threads": 1, "pruned_checkpoints": 2}
+    assert [c for c, _ in checkpoint_ids(saver, "long")] == ["0002", "0003", "0004"]
+    assert write_ids(saver, "long") == ["0004"]
+    assert write_ids(saver, "short") == ["0000", "0001"]
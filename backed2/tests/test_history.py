@@ -0,0 +1,54 @@
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+
+from agents import budget
+from agents.history import make_summarize_node
+from benchmarks.fakes import FakeLLM
+
+
+def turns(n: int) -> list:
+    messages = []
+    for i in range(n):
+        messages += [HumanMessage(content=f"question {i}", id=f"h{i}"), AIMessage(content=f"answer {i}", id=f"a{i}")]
+    return messages
+
+
+def state(messages, seconds_left: float = budget.MAX_SECONDS, llm_calls: int = 0) -> dict:
+    return {"messages": messages, "summary": "", "llm_calls": llm_calls, "tool_calls": 0,
+            "turn_started": time.time() - (budget.MAX_SECONDS - seconds_left)}
+
+
+@pytest.fixture
+def llm():
+    return FakeLLM(reply="Ann booked Dr Smith")
+
+
+def test_history_grows_to_twice_the_window_before_summarizing(llm):
+    summarize = make_summarize_node(llm, window=4, summarize_at=8)
+    assert summarize(state(turns(3))) == {}
+    assert llm.calls == 0
+
+    update = summarize(state(turns(4), llm_calls=1))
+    assert update["summary"] == "Ann booked Dr Smith"
+    assert [m.id for m in update["messages"]] == ["h0", "a0", "h1", "a1"]
+    assert all(isinstance(m, RemoveMessage) for m in update["messages"])
+    assert update["llm_calls"] == 2
+    assert llm.calls == 1
+
+
+def test_no_summary_without_time_left(llm):
+    summarize = make_summarize_node(llm, window=4, summarize_at=8)
+    assert summarize(state(turns(4), seconds_left=-1)) == {}
+    assert llm.calls == 0
+
+
+def test_timed_out_summary_keeps_the_history(llm):
+    llm.delay = 5
+    summarize = make_summarize_node(llm, window=4, summarize_at=8)
+    started = time.perf_counter()
+    update = summarize(state(turns(4), seconds_left=0.2))
+    assert time.perf_counter() - started < 1
+    assert "messages" not in update and "summary" not in update
+    assert update["llm_calls"] == 1
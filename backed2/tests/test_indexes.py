@@ -0,0 +1,69 @@
+import pytest
+
+import db.indexes
+from db.indexes import APPOINTMENT_INDEXES, CollectionScanError, assert_no_collscan, check_query_plans, ensure_indexes
+
+
+class PlannedCursor:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def explain(self):
+        return {"queryPlanner": {"winningPlan": self.plan}}
+
+
+class PlannedCollection:
+    """Records create_index calls and plans a query as an index scan when an
+    index's leading field is in the filter, like the query planner would."""
+
+    def __init__(self):
+        self.indexes = {}
+
+    def create_index(self, keys, name=None, **kwargs):
+        self.indexes[name] = keys
+        return name
+
+    def find(self, query, projection=None):
+        for name, keys in self.indexes.items():
+            if keys[0][0] in query:
+                return PlannedCursor({"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": name}})
+        return PlannedCursor({"stage": "COLLSCAN"})
+
+
+@pytest.fixture
+def appointments(monkeypatch):
+    collection = PlannedCollection()
+    monkeypatch.setattr(db.indexes, "get_appointments_collection", lambda: collection)
+    # Other collections' bootstraps are covered by their own tests
+    for name in dir(db.indexes):
+        if name.startswith("ensure_") and name != "ensure_indexes":
+            monkeypatch.setattr(db.indexes, name, lambda *args, **kwargs: None)
+    return collection
+
+
+def test_ensure_indexes_creates_every_tool_index(appointments):
+    ensure_indexes()
+    ensure_indexes()
+    assert appointments.indexes == APPOINTMENT_INDEXES
+
+
+def test_query_shapes_scan_without_indexes(appointments):
+    with pytest.raises(CollectionScanError, match="get_appointments"):
+        assert_no_collscan()
+
+
+def test_indexes_remove_every_collection_scan(appointments):
+    ensure_indexes()
+    plans = assert_no_collscan()
+    assert set(plans) == {name for name, _, _ in db.indexes.QUERY_SHAPES}
+    assert all(stages == ["FETCH", "IXSCAN"] for stages in plans.values())
+
+
+def test_nested_plan_stages_are_flattened(appointments, monkeypatch):
+    plan = {"stage": "SUBPLAN", "inputStage": {"stage": "OR", "inputStages": [
+        {"stage": "IXSCAN"}, {"stage": "FETCH", "inputStage": {"stage": "COLLSCAN"}},
+    ]}}
+    monkeypatch.setattr(appointments, "find", lambda query, projection=None: PlannedCursor(plan))
+    assert check_query_plans()["get_appointments"] == ["SUBPLAN", "OR", "IXSCAN", "FETCH", "COLLSCAN"]
+    with pytest.raises(CollectionScanError):
+        assert_no_collscan()
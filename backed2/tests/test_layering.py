@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+BACKED2 = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """
+import sys
+from benchmarks.fakes import install_fake_db
+install_fake_db()
+import db.crud, db.reservations, db.search, db.schedule, db.cache, db.indexes
+agents = sorted(m for m in sys.modules if m == "agents" or m.startswith("agents."))
+assert not agents, agents
+"""
+
+
+def test_db_layer_does_not_import_agents():
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=BACKED2, capture_output=True, text=True,
+                            env={**os.environ, "PYTHONPATH": BACKED2})
+    assert result.returncode == 0, result.stderr
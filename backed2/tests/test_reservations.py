@@ -0,0 +1,94 @@
+import pytest
+
+from agents.tools import book_appointment, cancel_appointment, reschedule_appointment
+from db.reservations import (
+    MIGRATIONS_COLLECTION, RESERVATIONS_COLLECTION, backfill_reservations, claim_slot, ensure_reservation_index,
+    normalize_appointments, normalize_date, normalize_time,
+)
+
+
+@pytest.mark.parametrize("value, expected", [("9", "09:00"), ("9:00", "09:00"), ("09.30", "09:30"), (" 14:05 ", "14:05")])
+def test_normalize_time(value, expected):
+    assert normalize_time(value) == expected
+
+
+@pytest.mark.parametrize("value", ["10:00 AM", "ten", "25:00", "9:75", ""])
+def test_normalize_time_rejects_free_text(value):
+    with pytest.raises(ValueError):
+        normalize_time(value)
+
+
+def test_book_with_unparseable_time_is_a_tool_error(database, call):
+    result = call(book_appointment, patient_name="Ann", doctor_name="Jane Smith", date="01-09-2025", time="10:00 AM")
+    assert result["success"] is False
+    assert "HH:MM" in result["message"]
+    assert database[RESERVATIONS_COLLECTION].count_documents({}) == 0
+
+
+def test_reschedule_to_unparseable_time_is_a_tool_error(database, call):
+    assert call(book_appointment, patient_name="Ann", doctor_name="Jane Smith", date="01-09-2025", time="10:00")["success"]
+    result = call(reschedule_appointment, patient_name="Ann", doctor_name="Jane Smith", old_date="01-09-2025",
+                  old_time="10:00", new_date="02-09-2025", new_time="noon")
+    assert result["success"] is False
+
+
+def test_cancel_with_unparseable_time_does_not_raise(database, call):
+    result = call(cancel_appointment, patient_name="Ann", doctor_name="Jane Smith", date="01-09-2025", time="10 am")
+    assert result["success"] is False
+
+
+def test_appointments_booked_before_reservations_are_backfilled(database, call):
+    database["appointments"].insert_one(
+        {"patient_name": "Old", "doctor_name": "Jane Smith", "date": "01-09-2025", "time": "10:00", "status": "booked"})
+    database["appointments"].insert_one(
+        {"patient_name": "Legacy", "doctor_name": "Jane Smith", "date": "01-09-2025", "time": "10 AM", "status": "booked"})
+
+    result = call(book_appointment, patient_name="New", doctor_name="Jane Smith", date="01-09-2025", time="10:00")
+    assert result["success"] is False
+    assert database[RESERVATIONS_COLLECTION].count_documents({}) == 1
+    assert database[MIGRATIONS_COLLECTION].find_one({"_id": "reservations_backfill"})["added"] == 1
+
+
+def test_backfill_runs_once(database):
+    assert backfill_reservations() == 0
+    database["appointments"].insert_one(
+        {"patient_name": "Ann", "doctor_name": "Jane Smith", "date": "01-09-2025", "time": "9:00"})
+    assert backfill_reservations() == 0
+    assert backfill_reservations(force=True) == 1
+    assert not claim_slot("jane smith", "01-09-2025", "09:00", "Bob")
+
+
+@pytest.mark.parametrize("value, expected", [("1-9-2025", "01-09-2025"), (" 01-09-2025 ", "01-09-2025")])
+def test_normalize_date(value, expected):
+    assert normalize_date(value) == expected
+
+
+@pytest.mark.parametrize("value", ["2025-09-01", "31-02-2025", "01/09/2025", "tomorrow"])
+def test_normalize_date_rejects_other_formats(value):
+    with pytest.raises(ValueError, match="DD-MM-YYYY"):
+        normalize_date(value)
+
+
+def test_spellings_of_a_slot_are_one_slot(database):
+    assert claim_slot("Jane Smith", "01-09-2025", "09:00", "Ann")
+    assert not claim_slot("Jane Smith", "1-9-2025", "9:00", "Bob")
+    with pytest.raises(ValueError):
+        claim_slot("Jane Smith", "2025-09-01", "09:00", "Cy")
+
+
+def test_appointments_are_stored_and_found_canonically(database, call):
+    assert call(book_appointment, patient_name="Ann", doctor_name="Jane Smith", date="1-9-2025", time="9:00")["success"]
+    assert database["appointments"].find_one({"patient_name": "Ann"})["time"] == "09:00"
+    assert call(reschedule_appointment, patient_name="Ann", doctor_name="Jane Smith", old_date="01-09-2025",
+                old_time="09:00", new_date="2-9-2025", new_time="10")["success"]
+    assert call(cancel_appointment, patient_name="Ann", doctor_name="Jane Smith", date="02-09-2025", time="10:00")["success"]
+    assert database[RESERVATIONS_COLLECTION].count_documents({}) == 0
+
+
+def test_appointments_stored_as_typed_are_normalized_once(database, call):
+    database["appointments"].insert_one(
+        {"patient_name": "Old", "doctor_name": "Jane Smith", "date": "1-9-2025", "time": "9:00", "status": "booked"})
+    ensure_reservation_index()   # at startup, from db.indexes.ensure_indexes
+    assert call(cancel_appointment, patient_name="Old", doctor_name="Jane Smith", date="01-09-2025", time="09:00")["success"]
+    assert database[MIGRATIONS_COLLECTION].find_one({"_id": "appointments_normalized"})["rewritten"] == 1
+    assert normalize_appointments() == 0
@@ -0,0 +1,74 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents.router import fast_path, match_request
+
+BOOK = "book with Dr Smith on 12-08-2025 at 10:00"
+CANCEL = "cancel my 10:00 appointment with Dr Smith on 12-08-2025"
+
+
+@pytest.fixture
+def doctors(database):
+    database["appointments"].insert_many([
+        {"name": "Jane Smith", "specialization": "dentist"},
+        {"name": "John Doe", "specialization": "dentist"},
+    ])
+    return database
+
+
+@pytest.mark.parametrize("earlier", [
+    "Hi, I'm looking for a heart doctor",
+    "I am not sure which day works",
+    "This is urgent",
+    "My name is Ann Lee",
+])
+@pytest.mark.parametrize("request_text", [BOOK, CANCEL])
+def test_earlier_turns_never_supply_the_patient(database, earlier, request_text):
+    state = {"messages": [HumanMessage(content=earlier), AIMessage(content="How can I help?"),
+                          HumanMessage(content=request_text)]}
+    assert match_request(request_text) is None
+    assert fast_path(state) == {}
+    assert database["appointments"].count_documents({}) == 0
+
+
+@pytest.mark.parametrize("text, patient", [
+    ("My name is Ann Lee, " + BOOK, "Ann Lee"),
+    (BOOK + ". My name is Ann", "Ann"),
+    ("book for Bob Stone with Dr Smith on 12-08-2025 at 10:00", "Bob Stone"),
+])
+def test_patient_named_in_the_request(doctors, text, patient):
+    tool_name, args = match_request(text)
+    assert tool_name == "book_appointment"
+    assert args == {"patient_name": patient, "doctor_name": "Jane Smith", "date": "12-08-2025", "time": "10:00"}
+
+
+def test_cancel_for_patient(doctors):
+    assert match_request(CANCEL + " for Ann") == ("cancel_appointment", {
+        "patient_name": "Ann", "doctor_name": "Jane Smith", "date": "12-08-2025", "time": "10:00"})
+
+
+def test_name_clause_must_stand_alone(doctors):
+    assert match_request("My name is Ann " + BOOK) is None
+
+
+def test_availability_needs_no_patient(doctors):
+    assert match_request("Is Dr Smith free on 12-08-2025?") == (
+        "check_availability", {"doctor_name": "Jane Smith", "date": "12-08-2025"})
+
+
+def test_fast_path_books_and_replies(doctors):
+    reply = fast_path({"messages": [HumanMessage(content="book for Ann with Dr Smith on 12-08-2025 at 10:00")]})
+    assert reply["messages"][0].content == "✅ Booked Ann with Dr Jane Smith on 12-08-2025 at 10:00."
+    assert doctors["appointments"].find_one({"patient_name": "Ann"})["doctor_name"] == "Jane Smith"
+
+
+@pytest.mark.parametrize("text", [
+    "book for Ann with Dr Nobody on 12-08-2025 at 10:00",
+    "Is Dr Nobody free on 12-08-2025?",
+    "book for Ann with Dr Smith on 12-08-2025 at 10:00",
+])
+def test_unknown_or_ambiguous_doctors_go_to_the_llm(doctors, text):
+    doctors["appointments"].insert_one({"name": "Will Smith", "specialization": "surgeon"})
+    assert match_request(text) is None
+    assert fast_path({"messages": [HumanMessage(content=text)]}) == {}
+    assert doctors["appointments"].count_documents({"patient_name": "Ann"}) == 0
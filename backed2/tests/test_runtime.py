@@ -0,0 +1,19 @@
+import sys
+
+from agents.runtime import AgentRuntime
+
+
+def test_shutdown_leaves_the_shared_client_open(monkeypatch, database):
+    closed = []
+    monkeypatch.setattr(sys.modules["db.connection"], "close_client", lambda: closed.append(True))
+
+    runtime = AgentRuntime()
+    runtime.client = sys.modules["db.connection"].get_client()
+    runtime.shutdown()
+
+    assert closed == []
+    assert runtime.client is None
+    # crud and reservations keep working after the runtime is gone
+    from db.crud import get_appointments
+    database["appointments"].insert_one({"name": "Jane Smith", "specialization": "Dentist"})
+    assert len(list(get_appointments({"name": "Jane Smith"}))) == 1
@@ -0,0 +1,112 @@
+from datetime import datetime
+
+import pytest
+
+import db.schedule
+from db.reservations import claim_slot, release_slot
+from db.schedule import compress_rows, free_slots, nearest, nearest_free_slots, save_templates
+
+
+# Before every date used here, so no slot is in the past
+NOW = datetime(2025, 8, 1)
+
+
+def template(name, times, specialization="dentist"):
+    return [
+        {"doctor_key": name.lower(), "doctor_name": name, "specialization": specialization,
+         "specialization_key": specialization, "weekday": weekday, "times": times}
+        for weekday in range(7)
+    ]
+
+
+@pytest.fixture
+def computes(database, monkeypatch):
+    save_templates(template("Jane Smith", ["09:00", "09:30", "10:00"]) + template("John Doe", ["09:00"]), [])
+    calls = []
+    compute = db.schedule._compute
+    monkeypatch.setattr(db.schedule, "_compute", lambda keys, dates: calls.append(keys) or compute(keys, dates))
+    return calls
+
+
+def suggested(time="09:30"):
+    return [(s["date"], s["time"]) for s in nearest_free_slots("Jane Smith", "01-09-2025", time, now=NOW)["suggested"]]
+
+
+def test_nearest_respects_bounds():
+    timeline = [10, 20, 30, 40, 50]
+    assert nearest(timeline, 31, 2) == [30, 40]
+    assert nearest(timeline, 31, 3, low=25, high=40) == [30]
+    assert nearest(timeline, 5, 2, low=35) == [40, 50]
+
+
+def test_suggestions_include_other_doctors_of_the_specialization(computes):
+    result = nearest_free_slots("Jane Smith", "01-09-2025", "09:00", k=2, now=NOW)
+    assert result["suggested"] == [{"date": "01-09-2025", "time": "09:00"}, {"date": "01-09-2025", "time": "09:30"}]
+    assert result["alternatives"][0] == {"doctor": "John Doe", "date": "01-09-2025", "time": "09:00"}
+
+
+def test_timelines_are_kept_between_queries(computes):
+    assert suggested() == [("01-09-2025", "09:30"), ("01-09-2025", "09:00"), ("01-09-2025", "10:00")]
+    suggested()
+    assert len(computes) == 1
+
+
+def test_claim_updates_the_kept_timeline(computes):
+    suggested()
+    assert claim_slot("Jane Smith", "01-09-2025", "9:30", "Ann")
+    assert suggested() == [("01-09-2025", "09:00"), ("01-09-2025", "10:00"), ("31-08-2025", "10:00")]
+    assert len(computes) == 1
+
+
+def test_past_slots_are_never_suggested(computes):
+    now = datetime(2025, 9, 1, 9, 15)
+    result = nearest_free_slots("Jane Smith", "01-09-2025", "09:00", k=3, now=now)
+    assert [(s["date"], s["time"]) for s in result["suggested"]] == [
+        ("01-09-2025", "09:30"), ("01-09-2025", "10:00"), ("02-09-2025", "09:00")]
+    assert all(s["date"] != "01-09-2025" for s in result["alternatives"])
+    assert nearest_free_slots("Jane Smith", "01-08-2025", "09:00", now=now) == {"suggested": [], "alternatives": []}
+
+
+def test_release_recomputes_only_that_day(computes):
+    assert claim_slot("Jane Smith", "01-09-2025", "9:30", "Ann")
+    suggested()
+    assert release_slot("Jane Smith", "01-09-2025", "9:30", "Ann")
+    assert suggested()[0] == ("01-09-2025", "09:30")
+    assert computes[-1] == ["jane smith"]
+
+
+def test_new_templates_drop_kept_timelines(computes):
+    suggested()
+    save_templates(template("Jane Smith", ["14:00"]), [])
+    assert suggested("14:00")[0] == ("01-09-2025", "14:00")
+
+
+def rows(doctor, slots):
+    return [{"doctor_name": doctor, "specialization": "dentist", "date_slot": slot, "is_available": "True"}
+            for slot in slots]
+
+
+# Mondays 01-09 to 22-09 with 15-09 missing; one Tuesday, 02-09
+CSV = rows("Jane Smith", ["01-09-2025 9:00", "01-09-2025 9:30", "8-9-2025 9:00", "08-09-2025 9:30",
+                          "22-09-2025 9:00", "22-09-2025 9:30", "02-09-2025 14:00"])
+
+
+def test_missing_dates_become_full_day_exceptions():
+    templates, exceptions, _ = compress_rows(CSV)
+    assert {t["weekday"]: t["times"] for t in templates} == {0: ["09:00", "09:30"], 1: []}
+    assert {(t["valid_from"], t["valid_to"]) for t in templates} == {("01-09-2025", "22-09-2025")}
+    assert sorted((e["date"], e["add"], e["remove"]) for e in exceptions) == [
+        ("02-09-2025", ["14:00"], []),
+        ("15-09-2025", [], ["09:00", "09:30"]),
+    ]
+
+
+def test_templates_apply_only_within_their_dates(database):
+    save_templates(*compress_rows(CSV)[:2])
+    assert free_slots("Jane Smith", "01-09-2025", 9) == {
+        "01-09-2025": ["09:00", "09:30"], "02-09-2025": ["14:00"], "08-09-2025": ["09:00", "09:30"]}
+    assert free_slots("Jane Smith", "15-09-2025") == {}
+    assert free_slots("Jane Smith", "25-08-2025") == {}
+    assert free_slots("Jane Smith", "29-09-2025") == {}
+    assert nearest_free_slots("Jane Smith", "29-09-2025", "09:00", k=1, now=NOW)["suggested"] == [
+        {"date": "22-09-2025", "time": "09:30"}]
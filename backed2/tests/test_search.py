@@ -0,0 +1,46 @@
+from db.indexes import ensure_indexes
+from db.search import CASE_INSENSITIVE, ensure_search_indexes, invalidate_metadata, search
+
+
+def _patients(database):
+    collection = database["patients"]
+    for first, last in [("Jane", "Smith"), ("John", "Doe"), ("Ann", "smithson"), ("Bob", "Jones")]:
+        collection.insert_one({"first_name": first, "last_name": last, "notes": "a.b*c"})
+    invalidate_metadata()
+    return collection
+
+
+def test_search_does_not_build_indexes(database):
+    collection = _patients(database)
+    before = collection.index_information()
+    search("patients", "smith")
+    assert collection.index_information() == before
+
+
+def test_ensure_search_indexes_falls_back_to_collation_indexes(database):
+    collection = _patients(database)
+    ensure_search_indexes(["patients"])   # the stand-in refuses text indexes, like some servers
+    indexes = collection.index_information()
+    assert "search_text" not in indexes
+    assert indexes["last_name_ci"]["collation"] == CASE_INSENSITIVE.document
+    assert indexes["first_name_ci"]["key"] == [("first_name", 1)]
+
+
+def test_ensure_indexes_covers_search_collections(database):
+    database["appointments"].insert_one({"name": "Jane Smith", "specialization": "Dentist"})
+    invalidate_metadata()
+    ensure_indexes()
+    assert "name_ci" in database["appointments"].index_information()
+
+
+def test_prefix_fallback_is_case_insensitive(database):
+    _patients(database)
+    records, _ = search("patients", "SMITH", ["first_name"])
+    assert sorted(r["first_name"] for r in records) == ["Ann", "Jane"]
+
+
+def test_prefix_fallback_is_anchored_and_literal(database):
+    _patients(database)
+    assert search("patients", "mith")[0] == []
+    assert len(search("patients", "a.b")[0]) == 4
+    assert search("patients", "a.c")[0] == []
@@ -0,0 +1,67 @@
+import json
+
+from bson import ObjectId
+from langchain_core.messages import ToolMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+import agents.serialize
+from agents.serialize import compact_page, compact_result, compact_tool
+from agents.tools import check_availability, query_database
+from db.search import invalidate_metadata
+
+
+def _pages(collection: str):
+    """Follow query_database's next_cursor until it runs out; yields each page's text."""
+    cursor = ""
+    for _ in range(50):
+        text = query_database.invoke({"collection_name": collection, "cursor": cursor})
+        yield text
+        cursor = json.loads(text.split("\n", 1)[0])["next_cursor"]
+        if not cursor:
+            return
+    raise AssertionError("paging did not terminate")
+
+
+def test_rows_cut_by_the_budget_come_on_the_next_page(database, monkeypatch):
+    monkeypatch.setattr(agents.serialize, "TOOL_RESULT_TOKENS", 60)
+    for i in range(30):
+        database["patients"].insert_one({"n": i, "name": f"patient number {i:02d}", "notes": "x" * 20})
+    invalidate_metadata()
+
+    seen = []
+    for text in _pages("patients"):
+        seen += [int(line.split("|")[0]) for line in text.splitlines()[3:] if line[:1].isdigit()]
+    assert seen == list(range(30))
+
+
+def test_compact_page_keeps_cursor_when_everything_fits():
+    rows = [{"_id": ObjectId(), "name": "a"}, {"_id": ObjectId(), "name": "b"}]
+    text = compact_page({"collection": "c", "next_cursor": "abc", "records": rows})
+    assert json.loads(text.split("\n", 1)[0])["next_cursor"] == "abc"
+    assert "_id" not in text
+
+
+def test_compact_result_drops_internal_fields_and_truncates():
+    rows = [{"_id": ObjectId(), "name": f"doctor {i}"} for i in range(200)]
+    text = compact_result({"success": True, "doctors": rows}, budget_tokens=50)
+    assert text.startswith('{"success":true}\ndoctors (200):\nname\n')
+    assert "more rows available" in text
+    assert len(text) < 50 * 4 + 100
+
+
+def test_artifacts_survive_the_checkpoint_serializer(database):
+    database["appointments"].insert_one(
+        {"patient_name": "Ann", "doctor_name": "Jane Smith", "date": "01-09-2025", "time": "10:00"})
+    message = check_availability.invoke({
+        "name": "check_availability", "args": {"doctor_name": "Jane Smith", "date": "01-09-2025"},
+        "id": "call-1", "type": "tool_call",
+    })
+    assert isinstance(message, ToolMessage)
+    assert isinstance(message.artifact["appointments"][0]["patient_name"], str)
+    serde = JsonPlusSerializer()
+    assert serde.loads_typed(serde.dumps_typed(message)).artifact == message.artifact
+
+
+def test_compact_tool_cleans_the_artifact():
+    text, artifact = compact_tool(lambda: {"id": ObjectId("0123456789abcdef01234567"), "_id": 1})()
+    assert artifact == {"id": "0123456789abcdef01234567"}
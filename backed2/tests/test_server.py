@@ -0,0 +1,88 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import server
+
+
+async def request(port: int, raw: bytes):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    head, _, body = data.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def post(payload) -> bytes:
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    return b"POST /chat HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """serve(scenario, limit) runs scenario(port) against a server whose turns take 0.2 s."""
+    stats = {"in_flight": 0, "peak": 0}
+
+    async def fake_turn(message, thread_id):
+        stats["in_flight"] += 1
+        stats["peak"] = max(stats["peak"], stats["in_flight"])
+        await asyncio.sleep(0.2)
+        stats["in_flight"] -= 1
+        if message == "boom":
+            raise RuntimeError("model unavailable")
+        return f"echo {message}"
+
+    monkeypatch.setattr(server, "arun_graph", fake_turn)
+
+    def run(scenario, limit: int = 10):
+        async def main():
+            srv = await asyncio.start_server(server.make_handler(asyncio.Semaphore(limit)), "127.0.0.1", 0)
+            async with srv:
+                return await scenario(srv.sockets[0].getsockname()[1])
+        return asyncio.run(main()), stats
+
+    return run
+
+
+def test_turns_run_concurrently(serve):
+    async def scenario(port):
+        started = time.perf_counter()
+        replies = await asyncio.gather(*(request(port, post({"message": f"m{i}", "thread_id": f"t{i}"})) for i in range(5)))
+        return replies, time.perf_counter() - started
+
+    (replies, elapsed), stats = serve(scenario)
+    assert replies == [(200, {"reply": f"echo m{i}", "thread_id": f"t{i}"}) for i in range(5)]
+    assert stats["peak"] == 5
+    assert elapsed < 0.6
+
+
+def test_in_flight_turns_are_bounded(serve):
+    async def scenario(port):
+        return await asyncio.gather(*(request(port, post({"message": "hi"})) for _ in range(6)))
+
+    replies, stats = serve(scenario, limit=2)
+    assert [status for status, _ in replies] == [200] * 6
+    assert stats["peak"] == 2
+    assert len({body["thread_id"] for _, body in replies}) == 6
+
+
+def test_error_responses(serve):
+    async def scenario(port):
+        return [
+            await request(port, b"GET /health HTTP/1.1\r\n\r\n"),
+            await request(port, b"GET /nope HTTP/1.1\r\n\r\n"),
+            await request(port, post(b"not json")),
+            await request(port, post({"message": "boom", "thread_id": "t"})),
+            await request(port, b"POST /chat HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % (server.MAX_BODY + 1)),
+        ]
+
+    (health, missing, bad, failed, too_big), _ = serve(scenario)
+    assert health == (200, {"status": "ok"})
+    assert missing[0] == 404
+    assert bad[0] == 400
+    assert failed == (500, {"error": "model unavailable", "thread_id": "t"})
+    assert too_big[0] == 413
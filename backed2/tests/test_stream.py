@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+import agents.runtime
+from agents.graph import stream_graph
+
+
+class ScriptedGraph:
+    """Compiled-graph stand-in whose stream() replays recorded (mode, chunk) events."""
+
+    def __init__(self, events):
+        self.events = events
+        self.calls = []
+
+    def stream(self, state, config=None, stream_mode=None, **kwargs):
+        self.calls.append((state, config, stream_mode))
+        yield from self.events
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    def run(events):
+        graph = ScriptedGraph(events)
+        monkeypatch.setattr(agents.runtime, "get_runtime", lambda: SimpleNamespace(graph=graph))
+        return list(stream_graph("Is Dr Smith free on Friday?", "thread-1")), graph
+    return run
+
+
+def token(node, content):
+    return ("messages", (AIMessageChunk(content=content), {"langgraph_node": node}))
+
+
+def update(node, message):
+    return ("updates", {node: {"messages": [message]}})
+
+
+def test_reply_tokens_and_tool_calls_stream_in_order(scripted):
+    call = {"name": "check_availability", "args": {"doctor_name": "Jane Smith", "date": "05-09-2025"}, "id": "1"}
+    events, _ = scripted([
+        ("updates", {"fast_path": None}),
+        token("summarize_history", "Summary of the earlier conversation"),
+        ("updates", {"summarize_history": {"summary": "…"}}),
+        update("chatbot", AIMessage(content="", tool_calls=[call])),
+        ("updates", {"tools": {"messages": []}}),
+        token("chatbot", "Dr Smith is free "),
+        token("chatbot", ""),
+        token("chatbot", [{"type": "text", "text": "at 10:00."}]),
+        update("chatbot", AIMessage(content="Dr Smith is free at 10:00.")),
+    ])
+    assert events == [
+        ("tool", "check_availability"),
+        ("token", "Dr Smith is free "),
+        ("token", "at 10:00."),
+    ]
+
+
+def test_fast_path_answer_is_one_token(scripted):
+    events, _ = scripted([update("fast_path", AIMessage(content="✅ Booked Ann with Jane Smith"))])
+    assert events == [("token", "✅ Booked Ann with Jane Smith")]
+
+
+def test_turn_streams_the_new_message_on_its_thread(scripted):
+    _, graph = scripted([])
+    (state, config, modes), = graph.calls
+    assert state["messages"] == [{"role": "user", "content": "Is Dr Smith free on Friday?"}]
+    assert config["configurable"]["thread_id"] == "thread-1"
+    assert set(modes) == {"messages", "updates"}
@@ -0,0 +1,35 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents.tool_select import select_tools
+
+
+def selected(*messages):
+    return select_tools({"messages": list(messages)})
+
+
+@pytest.mark.parametrize("text", ["Is Dr Smith available Friday?", "Which dentists do you have?"])
+def test_availability_and_doctor_questions_can_search_the_database(text):
+    # SYSTEM_PROMPT asks for a database search before anything is called unavailable
+    assert "query_database" in selected(HumanMessage(content=text))
+
+
+def test_booking_follow_up_keeps_the_booking_tools():
+    names = selected(
+        HumanMessage(content="Book me with Dr Smith"),
+        AIMessage(content="Which time?"),
+        HumanMessage(content="10:30 works"),
+    )
+    assert {"book_appointment", "check_availability", "general_query"} <= set(names)
+
+
+def test_tools_called_this_turn_stay_bound():
+    names = selected(
+        HumanMessage(content="cancel it"),
+        AIMessage(content="", tool_calls=[{"name": "list_doctors", "args": {}, "id": "1"}]),
+    )
+    assert names == ("cancel_appointment", "general_query", "list_doctors")
+
+
+def test_unmatched_text_binds_every_tool():
+    assert selected(HumanMessage(content="hello")) is None
@@ -0,0 +1,75 @@
+import pytest
+from pymongo import TEXT
+
+from db.search import CASE_INSENSITIVE
+from db.upload_csv import index_spec, load, main, swap_load
+
+CSV = "doctor_name,specialization,date_slot,is_available\nJane Smith,Dentist,01-09-2025 9:00,True\n"
+
+
+def test_text_index_is_rebuilt_from_its_weights():
+    info = {
+        "v": 2, "key": [("_fts", "text"), ("_ftsx", 1)],
+        "weights": {"doctor_name": 5, "notes": 1}, "default_language": "english",
+        "language_override": "language", "textIndexVersion": 3,
+    }
+    keys, options = index_spec(info)
+    assert keys == [("doctor_name", TEXT), ("notes", TEXT)]
+    assert options == {"weights": {"doctor_name": 5, "notes": 1}, "default_language": "english",
+                       "language_override": "language"}
+
+
+def test_wildcard_text_index():
+    keys, options = index_spec({"key": [("_fts", "text"), ("_ftsx", 1)], "weights": {"$**": 1}})
+    assert keys == [("$**", TEXT)]
+    assert options["weights"] == {"$**": 1}
+
+
+def test_compound_text_index_keeps_its_prefix():
+    keys, _ = index_spec({"key": [("clinic", 1), ("_fts", "text"), ("_ftsx", 1)], "weights": {"notes": 1}})
+    assert keys == [("clinic", 1), ("notes", TEXT)]
+
+
+def test_plain_index_options_are_kept():
+    info = {"v": 2, "key": [("name", 1)], "unique": True, "collation": CASE_INSENSITIVE.document}
+    assert index_spec(info) == ([("name", 1)], {"unique": True, "collation": CASE_INSENSITIVE.document})
+
+
+def test_swap_load_carries_indexes_over(database, tmp_path):
+    path = tmp_path / "availability.csv"
+    path.write_text(CSV)
+    live = database["doctor_availability"]
+    live.insert_one({"doctor_name": "Old", "date_slot": "01-01-2025 9:00"})
+    live.create_index([("doctor_name", 1)], name="doctor_name_ci", collation=CASE_INSENSITIVE)
+
+    assert swap_load(database, "doctor_availability", str(path), report=lambda line: None) == 1
+
+    swapped = database["doctor_availability"]
+    assert [d["doctor_name"] for d in swapped.find({})] == ["Jane Smith"]
+    assert swapped.index_information()["doctor_name_ci"]["collation"] == CASE_INSENSITIVE.document
+
+
+def test_swap_requires_an_explicit_collection(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "availability.csv"), "--swap"])
+    assert "--collection" in capsys.readouterr().err
+
+
+def test_reload_removes_slots_dropped_from_the_file(database, tmp_path):
+    path = tmp_path / "availability.csv"
+    path.write_text(CSV + "Jane Smith,Dentist,01-09-2025 9:30,True\n")
+    slots = database["doctor_availability"]
+    slots.insert_one({"patient_name": "Ann", "doctor_name": "Jane Smith", "date": "01-09-2025", "time": "9:00"})
+    assert load(slots, str(path), report=lambda line: None) == 2
+
+    path.write_text(CSV)
+    assert load(slots, str(path), report=lambda line: None) == 1
+    assert sorted(d["date_slot"] for d in slots.find({"date_slot": {"$exists": True}})) == ["01-09-2025 9:00"]
+    assert slots.count_documents({"patient_name": "Ann"}) == 1
+
+
+@pytest.mark.parametrize("flags", [["--collection", "slots"], ["--swap", "--collection", "slots"]])
+def test_templates_reject_collection_and_swap(tmp_path, capsys, flags):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "availability.csv"), "--templates", *flags])
+    assert "--templates" in capsys.readouterr().err
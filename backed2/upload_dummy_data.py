@@ -1,9 +1,10 @@
 # upload_dummy_data.py
 
-import pandas as pd
+import os
+import time
 from pymongo import MongoClient
 from dotenv import load_dotenv
-import os
+from db.upload_csv import load
 
 # Load environment variables
 load_dotenv()
@@ -15,20 +16,10 @@ COLLECTION_NAME = os.getenv("MONGODB_COLLECTION", "appointment")
 
 # Connect to MongoDB
 client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-collection = db[COLLECTION_NAME]
+collection = client[DB_NAME][COLLECTION_NAME]
 
-# Read CSV
+# Upserts keyed on (doctor_name, date_slot): rerunning never duplicates a slot
 csv_path = "doctor_availability.csv"  # It's already in your root folder
-df = pd.read_csv(csv_path)
-
-# Optional: Avoid inserting duplicates (by doctor_name)
-existing_doctors = collection.distinct("doctor_name")
-filtered_df = df[~df["doctor_name"].isin(existing_doctors)]
-
-if filtered_df.empty:
-    print("✅ No new records to insert. All doctor names already exist.")
-else:
-    records = filtered_df.to_dict(orient="records")
-    result = collection.insert_many(records)
-    print(f"✅ Inserted {len(result.inserted_ids)} new records.")
+started = time.perf_counter()
+total = load(collection, csv_path, report=lambda _: None)
+print(f"✅ Upserted {total} records in {time.perf_counter() - started:.1f}s.")
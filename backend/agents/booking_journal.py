@@ -0,0 +1,305 @@
+# booking_journal.py
+
+"""
+File-backed storage for the availability data.
+
+The schedule lives in an immutable, column-oriented snapshot (one list per
+CSV column, dictionary-encoded where that pays off, pickled) plus an
+append-only journal of bookings. A booking is one fsync'd line in the
+journal instead of a rewrite of the whole CSV.
+Compaction folds the journal into a fresh snapshot; on startup a torn last
+journal line left by a crash is cut off and the rest is replayed.
+The snapshot records the CSV's size, mtime and hash. If the CSV changes
+afterwards, the snapshot is reseeded from it. When the journal still
+holds bookings that were never compacted, open() refuses to load instead.
+
+    python booking_journal.py compact     # fold the journal now
+    python booking_journal.py export out.csv
+"""
+
+import csv
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+from array import array
+
+SNAPSHOT_FORMAT = 1
+COMPACT_INTERVAL = float(os.getenv("BOOKING_COMPACT_INTERVAL", "300"))
+COMPACT_MIN_ENTRIES = int(os.getenv("BOOKING_COMPACT_MIN_ENTRIES", "100"))
+
+
+def _fsync_dir(path: str):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return   # e.g. Windows: directories can't be opened
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_csv_columns(path: str):
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        fieldnames = next(reader)
+        columns = [[] for _ in fieldnames]
+        for row in reader:
+            for i, column in enumerate(columns):
+                column.append(row[i] if i < len(row) else "")
+    return fieldnames, dict(zip(fieldnames, columns))
+
+
+def encode_column(values: list):
+    """Dictionary-encode low-cardinality columns (doctor, specialization, flags)."""
+    distinct = list(dict.fromkeys(values))
+    if len(distinct) > len(values) // 2:
+        return {"values": values}
+    codes = {value: i for i, value in enumerate(distinct)}
+    return {"dictionary": distinct, "codes": array("I", (codes[v] for v in values)).tobytes()}
+
+
+def decode_column(encoded: dict) -> list:
+    if "values" in encoded:
+        return encoded["values"]
+    codes = array("I")
+    codes.frombytes(encoded["codes"])
+    dictionary = encoded["dictionary"]
+    return [dictionary[i] for i in codes]
+
+
+class BookingStore:
+    """
+    Snapshot + journal for one availability CSV.
+
+    The CSV is only read to seed a snapshot; after that the snapshot and
+    journal are the source of truth. Editing or replacing the CSV reseeds the
+    snapshot on the next open(), which drops the bookings made since the CSV
+    was last written. Export first to keep them.
+    """
+
+    def __init__(self, csv_path: str, snapshot_path: str = None, journal_path: str = None):
+        self.csv_path = csv_path
+        self.snapshot_path = snapshot_path or csv_path + ".snapshot"
+        self.journal_path = journal_path or csv_path + ".journal"
+        self.seq = 0             # last journal sequence number written
+        self.snapshot_seq = 0    # last sequence number folded into the snapshot
+        self.pending = 0         # journal entries not yet compacted
+        self.source = None       # fingerprint of the CSV the snapshot was seeded from
+        self._journal = None
+        self._lock = threading.Lock()
+
+    # --- loading -------------------------------------------------------
+
+    def _read_snapshot(self):
+        with open(self.snapshot_path, "rb") as f:
+            snapshot = pickle.load(f)
+        if snapshot.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format in {self.snapshot_path}")
+        return snapshot
+
+    def _write_snapshot(self, fieldnames, columns, seq):
+        snapshot = {
+            "format": SNAPSHOT_FORMAT,
+            "seq": seq,
+            "source": self.source,
+            "fieldnames": fieldnames,
+            "columns": {name: encode_column(columns[name]) for name in fieldnames},
+        }
+        _write_atomic(self.snapshot_path, pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _read_journal(self):
+        """Journal entries after the snapshot; a torn tail is truncated away."""
+        entries, good = [], 0
+        if not os.path.exists(self.journal_path):
+            return entries
+        with open(self.journal_path, "rb") as f:
+            data = f.read()
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            good += len(line)
+            entries.append(entry)
+        if good < len(data):
+            print(f"⚠️ Dropping {len(data) - good} bytes of torn journal tail in {self.journal_path}")
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good)
+                f.flush()
+                os.fsync(f.fileno())
+        return entries
+
+    def csv_fingerprint(self, recorded=None):
+        """Size, mtime and hash of the CSV. Skips the hash when size and mtime match `recorded`."""
+        stat = os.stat(self.csv_path)
+        if recorded and (recorded["size"], recorded["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+            return recorded
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(self.csv_path)}
+
+    def _csv_changed(self, snapshot) -> bool:
+        recorded = snapshot.get("source")
+        if recorded is None or not os.path.exists(self.csv_path):
+            self.source = recorded
+            return False
+        self.source = self.csv_fingerprint(recorded)
+        if self.source["sha256"] == recorded["sha256"]:
+            return False
+        uncompacted = [e for e in self._read_journal() if e["seq"] > snapshot["seq"]]
+        if uncompacted:
+            raise RuntimeError(
+                f"{self.csv_path} changed after {self.snapshot_path} was written, and "
+                f"{self.journal_path} holds {len(uncompacted)} booking(s) that are not in the CSV. "
+                "Export the current schedule with 'python booking_journal.py export', merge the CSV "
+                "changes into it, and then replace the CSV."
+            )
+        print(f"⚠️ {self.csv_path} changed since the last snapshot; reseeding from it")
+        return True
+
+    def open(self):
+        """Load the schedule as (fieldnames, columns) with the journal applied."""
+        with self._lock:
+            snapshot = self._read_snapshot() if os.path.exists(self.snapshot_path) else None
+            if snapshot is not None and self._csv_changed(snapshot):
+                snapshot = None
+                _write_atomic(self.journal_path, b"")
+            if snapshot is not None:
+                fieldnames = snapshot["fieldnames"]
+                columns = {name: decode_column(snapshot["columns"][name]) for name in fieldnames}
+                self.snapshot_seq = snapshot["seq"]
+            else:
+                self.source = self.csv_fingerprint()
+                fieldnames, columns = read_csv_columns(self.csv_path)
+                self.snapshot_seq = 0
+                self._write_snapshot(fieldnames, columns, 0)
+
+            self.seq, self.pending = self.snapshot_seq, 0
+            for entry in self._read_journal():
+                self.seq = max(self.seq, entry["seq"])
+                if entry["seq"] <= self.snapshot_seq:
+                    continue   # already folded in by a compaction that crashed before truncating
+                for field, value in entry["set"].items():
+                    columns[field][entry["row"]] = value
+                self.pending += 1
+
+            self._journal = open(self.journal_path, "ab")
+            return fieldnames, columns
+
+    # --- writing -------------------------------------------------------
+
+    def append(self, row: int, values: dict, **context):
+        """Durably record that `row` now has `values`. Returns once fsync'd."""
+        with self._lock:
+            self.seq += 1
+            entry = {"seq": self.seq, "row": row, "set": values, **context}
+            self._journal.write(json.dumps(entry, separators=(",", ":")).encode() + b"\n")
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self.pending += 1
+
+    def compact(self, fieldnames, columns, seq: int):
+        """
+        Write `columns` (the state as of journal entry `seq`) as the new
+        snapshot and drop the journal entries it covers.
+        """
+        self._write_snapshot(fieldnames, columns, seq)
+        with self._lock:
+            self.snapshot_seq = seq
+            # Keep entries appended while the snapshot was being written
+            tail = [e for e in self._read_journal() if e["seq"] > seq]
+            self._journal.close()
+            _write_atomic(self.journal_path, b"".join(
+                json.dumps(e, separators=(",", ":")).encode() + b"\n" for e in tail
+            ))
+            self._journal = open(self.journal_path, "ab")
+            self.pending = len(tail)
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+def export_csv(path: str, fieldnames, columns):
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerows(zip(*(columns[name] for name in fieldnames)))
+    os.replace(tmp, path)
+
+
+class Compactor:
+    """Background thread that compacts a SlotIndex's journal every `interval` seconds."""
+
+    def __init__(self, index, interval: float = COMPACT_INTERVAL, min_entries: int = COMPACT_MIN_ENTRIES):
+        self.index = index
+        self.interval = interval
+        self.min_entries = min_entries
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.index.store.pending >= self.min_entries:
+                try:
+                    self.index.compact()
+                except Exception as e:
+                    print(f"⚠️ Booking journal compaction failed: {e}")
+
+    def start(self):
+        if self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="journal-compactor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main(argv=None):
+    from slot_index import SlotIndex, AVAILABILITY_CSV
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in ("compact", "export"):
+        print("usage: python booking_journal.py compact | export <out.csv>")
+        return 2
+    index = SlotIndex(AVAILABILITY_CSV)
+    if argv[0] == "compact":
+        index.compact()
+        print(f"✅ Compacted journal into {index.store.snapshot_path}")
+    else:
+        index.export(argv[1])
+        print(f"✅ Wrote {argv[1]}")
+    index.store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
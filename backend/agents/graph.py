@@ -1,214 +1,121 @@
-from typing_extensions import TypedDict
 import os
-import uuid
-import pandas as pd
-from model import *
+import threading
 from dotenv import load_dotenv
-from typing import Annotated, Literal
-import pandas as pd
-import re
-from datetime import datetime
-from langchain.tools import tool 
-import asyncio
-from langgraph.graph.message import add_messages
-from langgraph.graph import StateGraph, START, END
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, BaseMessage
-from langchain_core.tools import tool
-from langgraph.prebuilt import ToolNode, tools_condition
-from pymongo import MongoClient
-from langgraph.checkpoint.mongodb import MongoDBSaver
-    
-
-load_dotenv()
-
-
-
-class State(TypedDict):
-    messages: Annotated[list[BaseMessage], add_messages]
-    thread_id: str
-
-
-
-# Doctor list constant
-DOCTOR_LIST = Literal[
-    'kevin anderson', 'robert martinez', 'susan davis', 'daniel miller', 'sarah wilson',
-    'michael green', 'lisa brown', 'jane smith', 'emily johnson', 'john doe'
-]
-
-# ---------------- TOOLS ---------------- #
-
-@tool
-def check_availability_by_doctor(desired_date: DateModel, doctor_name: DOCTOR_LIST):
-    """
-    Check availability for a specific doctor on a specific date.
-    """
-    df = pd.read_csv(r"doctor_availability.csv")
-    # df['date_slot_time'] = df['date_slot'].apply(lambda input: input.split(' ')[-1])
-
-    rows = list(df[
-        (df['date_slot'].apply(lambda input: input.split(' ')[0]) == desired_date.date) &
-        (df['doctor_name'] == doctor_name) &
-        (df['is_available'] == True)
-    ]['date_slot_time'])
-
-    if not rows:
-        return "No availability in the entire day"
-    return f'Availability for {desired_date.date}\nAvailable slots: ' + ', '.join(rows)
-
-
- # Assuming you're using LangChain tool decorator
-
-@tool
-def check_availability_by_specialization(desired_date: str, specialization: str):
-    """
-    Check availability for a specialization on a specific date (flexible input).
-    """
-    df = pd.read_csv("doctor_availability.csv")
-    df['date_slot_time'] = df['date_slot'].apply(lambda input: input.split(' ')[-1])
-
-    # Normalize date input to DD-MM-YYYY if needed
-    try:
-        date_obj = datetime.strptime(desired_date.strip(), "%d-%m-%Y")
-        desired_date = date_obj.strftime("%d-%m-%Y")
-    except:
-        pass
-
-    rows = df[
-        (df['date_slot'].apply(lambda input: input.split(' ')[0]) == desired_date) &
-        (df['specialization'].str.lower() == specialization.lower()) &
-        (df['is_available'] == True)
-    ].groupby(['specialization', 'doctor_name'])['date_slot_time'].apply(list).reset_index(name='available_slots')
-
-    if len(rows) == 0:
-        return f"No availability for {specialization} on {desired_date}."
-
-    def convert_to_am_pm(time_str):
-        hours, minutes = map(int, str(time_str).split(":"))
-        period = "AM" if hours < 12 else "PM"
-        hours = hours % 12 or 12
-        return f"{hours}:{minutes:02d} {period}"
-
-    output = f"Availability for {desired_date}\n"
-    for row in rows.values:
-        output += f"{row[1]} - Available slots: \n" + ', \n'.join([convert_to_am_pm(value) for value in row[2]]) + '\n'
-    return output
-
-
-@tool
-def set_appointment(desired_date: str, doctor_name: str):
-    """
-    Book an appointment for the given date and doctor.
-    Accepts just 'DD-MM-YYYY' or 'DD-MM-YYYY HH:MM'.
-    If only date is given, picks the first available slot.
-    """
-    df = pd.read_csv("doctor_availability.csv")
-    date_input = desired_date.strip()
-
-    # If only date provided
-    if re.match(r"^\d{2}-\d{2}-\d{4}$", date_input):
-        case = df[(df['doctor_name'].str.lower() == doctor_name.lower()) &
-                  (df['is_available'] == True) &
-                  (df['date_slot'].str.startswith(date_input))]
-        if case.empty:
-            return f"❌ No available slots for {doctor_name} on {date_input}."
-        slot = case.iloc[0]['date_slot']
-        desired_date = slot
-    else:
-        try:
-            datetime.strptime(date_input, "%d-%m-%Y %H:%M")
-            slot = datetime.strptime(date_input, "%d-%m-%Y %H:%M").strftime("%d-%m-%Y %#H.%M")
-        except:
-            return "❌ Invalid date format. Please use 'DD-MM-YYYY' or 'DD-MM-YYYY HH:MM'."
-
-    # Check availability
-    case = df[(df['date_slot'].str.startswith(desired_date[:16])) &
-              (df['doctor_name'].str.lower() == doctor_name.lower()) &
-              (df['is_available'] == True)]
-
-    if case.empty:
-        return f"❌ Slot with {doctor_name} at {desired_date} is already booked or unavailable."
-
-    df.loc[(df['date_slot'].str.startswith(desired_date[:16])) &
-           (df['doctor_name'].str.lower() == doctor_name.lower()),
-           ['is_available']] = [False]
-    df.to_csv("doctor_availability.csv", index=False)
-
-    return f"✅ Appointment confirmed with {doctor_name} on {desired_date}."
-
-
-@tool
-def confirm_appointment(desired_date: str, doctor_name: str):
-    """
-    Confirms an appointment if available.
-    """
-    df = pd.read_csv("doctor_availability.csv")
-
-    
-    df.to_csv("doctor_availability.csv", index=False)
-
-    return f"✅ Appointment confirmed with {doctor_name} on {desired_date}."
-
+from slot_index import close_slot_index
+from names import get_names, tool_schemas
 
-@tool
-def general_query(query: str) -> str:
-    """Responds to any kind of general query like 'What is AI?', 'Tell me a joke', or 'Summarize a paragraph'."""
-    try:
-        response = llm.invoke([HumanMessage(content=query)])
-        return response.content
-    except Exception as e:
-        return f"Error while processing your query: {str(e)}"
-
-
-@tool
-def reschedule_appointment(old_date: str, new_date: str, doctor_name: str):
-    """
-    Reschedule an appointment.
-    """
-    
-
-    return set_appointment(new_date, doctor_name)
+# The Gemini client, Mongo client, compiled graph, langgraph, the langchain
+# tools and the model types are imported or created on first use (see
+# get_tools / get_llm / get_graph_builder / AgentRuntime).
 
+load_dotenv()
 
 
 # ---------------- STATE & GRAPH ---------------- #
 
-tools = [check_availability_by_doctor, check_availability_by_specialization,
-         set_appointment, reschedule_appointment, confirm_appointment, general_query]
-
-
-
-
-
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=os.environ["GOOGLE_API_KEY"]
-)
-
-llm_with_tools = llm.bind_tools(tools)
-
-
-def chatbot(state: State):
-    message = llm_with_tools.invoke(state["messages"])
+_tools = None
+_llm = None
+_llm_with_tools = None
+_graph_builder = None
+_lazy_lock = threading.Lock()
+
+
+def get_tools() -> list:
+    """The tool set (tools.py), imported on first use."""
+    global _tools
+    with _lazy_lock:
+        if _tools is None:
+            from tools import tools
+            _tools = tools
+    return _tools
+
+
+def get_llm():
+    global _llm
+    with _lazy_lock:
+        if _llm is None:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            _llm = ChatGoogleGenerativeAI(
+                model="gemini-2.5-flash",
+                google_api_key=os.environ["GOOGLE_API_KEY"]
+            )
+    return _llm
+
+
+def get_llm_with_tools(tool_names: tuple = None):
+    """The model with all tool schemas bound, or only `tool_names`; each subset is bound once."""
+    global _llm_with_tools
+    names = get_names()
+    # The doctor list used to be a hard-coded Literal; the enums now come
+    # from the availability data and are rebound when it reloads
+    if _llm_with_tools is None or _llm_with_tools["version"] != names.version:
+        tools = get_tools()
+        schemas = tool_schemas(tools, {
+            "doctor_name": names.doctors.names,
+            "specialization": names.specializations.names,
+        })
+        _llm_with_tools = {
+            "version": names.version,
+            "schemas": {t.name: schema for t, schema in zip(tools, schemas)},
+            "variants": {},
+        }
+    key = tool_names or tuple(_llm_with_tools["schemas"])
+    variant = _llm_with_tools["variants"].get(key)
+    if variant is None:
+        variant = get_llm().bind_tools([_llm_with_tools["schemas"][name] for name in key])
+        _llm_with_tools["variants"][key] = variant
+    return variant
+
+
+def chatbot(state):
+    from history import build_prompt
+    from tool_select import select_tools
+    message = get_llm_with_tools(select_tools(state)).invoke(build_prompt(state))
     return {"messages": [message]}
 
 
-tool_node = ToolNode(tools=tools)
-
-graph_builder = StateGraph(State)
-graph_builder.add_node("chatbot", chatbot)
-graph_builder.add_node("tools", tool_node)
-graph_builder.add_edge(START, "chatbot")
-graph_builder.add_conditional_edges("chatbot", tools_condition)
-graph_builder.add_edge("tools", "chatbot")
-
-graph = graph_builder.compile()
-
-
+def get_graph_builder():
+    global _graph_builder
+    if _graph_builder is None:
+        from langgraph.graph import StateGraph, START
+        from langgraph.prebuilt import ToolNode, tools_condition
+        from state import State
+        from history import make_summarize_node
+
+        tool_node = ToolNode(tools=get_tools())
+
+        graph_builder = StateGraph(State)
+        graph_builder.add_node("summarize_history", make_summarize_node(get_llm()))
+        graph_builder.add_node("chatbot", chatbot)
+        graph_builder.add_node("tools", tool_node)
+        graph_builder.add_edge(START, "summarize_history")
+        graph_builder.add_edge("summarize_history", "chatbot")
+        graph_builder.add_conditional_edges("chatbot", tools_condition)
+        graph_builder.add_edge("tools", "chatbot")
+        _graph_builder = graph_builder
+    return _graph_builder
+
+
+def __getattr__(name):
+    # Old module-level names, built on first access
+    if name == "tools":
+        return get_tools()
+    if name == "State":
+        from state import State
+        return State
+    if name == "llm":
+        return get_llm()
+    if name == "llm_with_tools":
+        return get_llm_with_tools()
+    if name == "graph_builder":
+        return get_graph_builder()
+    if name == "graph":
+        return get_graph_builder().compile()
+    raise AttributeError(name)
 
 
 def complie_graph_with_checkpointer(checkpointer):
-    graph_with_checkpointer = graph_builder.compile(checkpointer=checkpointer)
+    graph_with_checkpointer = get_graph_builder().compile(checkpointer=checkpointer)
     return graph_with_checkpointer
 
 
@@ -244,28 +151,121 @@ def complie_graph_with_checkpointer(checkpointer):
 # main()
 
 
+# ---------------- RUNTIME ---------------- #
+
+class AgentRuntime:
+    """
+    Holds one pooled Mongo client, one checkpointer and one compiled graph
+    for the whole process, so turns don't reconnect or recompile.
+    """
+
+    def __init__(self, db_uri: str = None, max_pool_size: int = None, min_pool_size: int = None):
+        self.db_uri = db_uri or os.getenv("MONGO_URI")
+        if max_pool_size is None:
+            max_pool_size = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+        if min_pool_size is None:
+            min_pool_size = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+        self.max_pool_size = max_pool_size
+        self.min_pool_size = min_pool_size
+        self.client = None
+        self.checkpointer = None
+        self.graph = None
+        self._lock = threading.Lock()
+
+    def startup(self):
+        with self._lock:
+            if self.graph is not None:
+                return self
+            if not self.db_uri:
+                raise ValueError("❌ MONGO_URI is not set in your .env file.")
+            from pymongo import MongoClient
+            from langgraph.checkpoint.mongodb import MongoDBSaver
+
+            self.client = MongoClient(
+                self.db_uri,
+                maxPoolSize=self.max_pool_size,
+                minPoolSize=self.min_pool_size,
+            )
+            self.checkpointer = MongoDBSaver(self.client)
+            self.graph = complie_graph_with_checkpointer(self.checkpointer)
+            return self
+
+    def shutdown(self):
+        with self._lock:
+            if self.client is not None:
+                self.client.close()
+            self.client = None
+            self.checkpointer = None
+            self.graph = None
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime():
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AgentRuntime()
+    return _runtime.startup()
+
+
+def shutdown_runtime():
+    global _runtime
+    with _runtime_lock:
+        if _runtime is not None:
+            _runtime.shutdown()
+            _runtime = None
+    close_slot_index()
+
+
 # graph.py
-def run_graph(user_input: str):
-    DB_URI = os.getenv("MONGO_URI")
-    if not DB_URI:
-        raise ValueError("❌ MONGO_URI is not set in your .env file.")
+def run_graph(user_input: str, thread_id: str):
+    graph_with_mongo = get_runtime().graph
+    config = {"configurable": {"thread_id": thread_id}}
 
-    config = {"configurable": {"thread_id": "5"}}
-    with MongoDBSaver.from_conn_string(DB_URI) as mongo_checkpointer:
-        graph_with_mongo = complie_graph_with_checkpointer(mongo_checkpointer)
-        
-        state = State(
-            messages=[{ "role": "user", "content": user_input }],
-            thread_id="5"
-        )
+    state = {
+        "messages": [{ "role": "user", "content": user_input }],
+        "thread_id": thread_id,
+    }
 
-        reply = None
-        for event in graph_with_mongo.stream(state, config=config, stream_mode='values'):
-            if "messages" in event:
-                reply = event["messages"][-1]
+    reply = None
+    # durability="exit": one checkpoint per turn, not one per super-step
+    for event in graph_with_mongo.stream(state, config=config, stream_mode='values', durability="exit"):
+        if "messages" in event:
+            reply = event["messages"][-1]
 
-        return reply.content if reply else "❌ No reply from model."
+    return reply.content if reply else "❌ No reply from model."
 
 
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
 
 
+def stream_graph(user_input: str, thread_id: str):
+    """
+    Yields ("token", text) for reply tokens and ("tool", name) for tool calls
+    as the turn runs.
+    """
+    graph_with_mongo = get_runtime().graph
+    config = {"configurable": {"thread_id": thread_id}}
+    state = {
+        "messages": [{ "role": "user", "content": user_input }],
+        "thread_id": thread_id,
+    }
+
+    for mode, chunk in graph_with_mongo.stream(state, config=config, stream_mode=["messages", "updates"], durability="exit"):
+        if mode == "messages":
+            message, metadata = chunk
+            if metadata.get("langgraph_node") == "chatbot" and message.type == "AIMessageChunk":
+                text = _text(message.content)
+                if text:
+                    yield ("token", text)
+        else:
+            update = chunk.get("chatbot")
+            if update:
+                for call in getattr(update["messages"][-1], "tool_calls", []):
+                    yield ("tool", call["name"])
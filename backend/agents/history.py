@@ -0,0 +1,88 @@
+# history.py
+
+import os
+from langchain_core.messages import HumanMessage, SystemMessage, RemoveMessage
+
+# Number of most recent messages kept verbatim after a summary.
+HISTORY_WINDOW = int(os.getenv("HISTORY_WINDOW", "12"))
+# Summarize only once the history reaches this many messages, then cut it back
+# to HISTORY_WINDOW, so the summary call runs every few turns instead of every
+# turn once the window is full.
+SUMMARIZE_AT = int(os.getenv("HISTORY_SUMMARIZE_AT", str(2 * HISTORY_WINDOW)))
+
+SUMMARY_PROMPT = """
+Update the running summary of a clinic assistant conversation.
+Keep patient names, doctors, dates, times and the outcome of every booking,
+reschedule or cancellation. Drop small talk. Reply with the summary only.
+"""
+
+
+def split_history(messages: list, window: int = HISTORY_WINDOW):
+    """Split messages into (older, recent).
+
+    `recent` holds at most `window` messages and always starts at a user turn,
+    so a tool call is never separated from its tool result.
+    """
+    messages = [m for m in messages if not isinstance(m, SystemMessage)]
+    if len(messages) <= window:
+        return [], messages
+
+    cut = len(messages) - window
+    while cut < len(messages) and not isinstance(messages[cut], HumanMessage):
+        cut += 1
+    if cut == len(messages):
+        # The window is one long tool loop; keep it whole from its user turn.
+        cut = len(messages) - window
+        while cut > 0 and not isinstance(messages[cut], HumanMessage):
+            cut -= 1
+    return messages[:cut], messages[cut:]
+
+
+def _render(messages: list) -> str:
+    lines = []
+    for m in messages:
+        content = m.content if isinstance(m.content, str) else str(m.content)
+        if content.strip():
+            lines.append(f"{m.type}: {content[:500]}")
+    return "\n".join(lines)
+
+
+def fold_summary(llm, summary: str, older: list) -> str:
+    """Fold older messages into the rolling summary."""
+    prompt = f"Current summary:\n{summary or '(none)'}\n\nNew messages:\n{_render(older)}"
+    response = llm.invoke([SystemMessage(content=SUMMARY_PROMPT), HumanMessage(content=prompt)])
+    return response.content
+
+
+def make_summarize_node(llm, window: int = HISTORY_WINDOW, summarize_at: int = SUMMARIZE_AT):
+    """
+    Graph node that moves messages outside the window into `summary` once
+    the history reaches `summarize_at` messages.
+    """
+
+    def summarize_history(state):
+        stored = state["messages"]
+        stale_system = [m for m in stored if isinstance(m, SystemMessage)]
+        older = []
+        if len(stored) - len(stale_system) >= summarize_at:
+            older, _ = split_history(stored, window)
+        if not older and not stale_system:
+            return {}
+
+        update = {"messages": [RemoveMessage(id=m.id) for m in older + stale_system]}
+        if older:
+            update["summary"] = fold_summary(llm, state.get("summary", ""), older)
+        return update
+
+    return summarize_history
+
+
+def build_prompt(state, system_prompt: str = None) -> list:
+    """System prompt (once) + rolling summary + recent messages."""
+    system = (system_prompt or "").strip()
+    summary = state.get("summary")
+    if summary:
+        system += f"\n\nSummary of the earlier conversation:\n{summary}"
+
+    recent = [m for m in state["messages"] if not isinstance(m, SystemMessage)]
+    return ([SystemMessage(content=system)] if system else []) + recent
@@ -0,0 +1,169 @@
+# names.py
+"""
+Fuzzy resolution of doctor and specialization names.
+
+NameIndex keeps a trigram posting list and a phonetic key per token for a
+set of canonical names, so "dr jon do", "Smith" or "cardiologists" resolve
+to the stored spelling in microseconds. The doctor/specialization indexes
+are built from the slot index and rebuilt whenever it reloads.
+"""
+import re
+import threading
+from collections import defaultdict
+
+MIN_SCORE = 0.45
+
+_TITLES = re.compile(r"\b(?:dr|doctor|prof|mr|mrs|ms)\b\.?", re.I)
+_SOUNDEX = str.maketrans("bfpvcgjkqsxzdtlmnr", "111122222222334556")
+
+
+def normalize(text: str) -> str:
+    text = _TITLES.sub(" ", str(text).lower())
+    text = re.sub(r"[^a-z0-9 ]+", " ", text)
+    return " ".join(text.split())
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def phonetic(token: str) -> str:
+    """Soundex code of one token"""
+    if not token:
+        return ""
+    digits = token.translate(_SOUNDEX)
+    code, last = token[0], digits[0]
+    for ch in digits[1:]:
+        if ch.isdigit() and ch != last:
+            code += ch
+        if ch not in "hw":
+            last = ch
+        if len(code) == 4:
+            break
+    return code.ljust(4, "0")
+
+
+def _stem(text: str) -> str:
+    # "cardiologists" -> "cardiologist", "dentists" -> "dentist"
+    return " ".join(t[:-1] if len(t) > 4 and t.endswith("s") and not t.endswith("ss") else t for t in text.split())
+
+
+class NameIndex:
+    def __init__(self, names=()):
+        self.names = []
+        self.exact = {}
+        self.grams = defaultdict(set)
+        self.sounds = defaultdict(set)
+        self.tokens = defaultdict(set)
+        for name in names:
+            self.add(name)
+
+    def add(self, name: str):
+        key = _stem(normalize(name))
+        if not key or key in self.exact:
+            return
+        i = len(self.names)
+        self.names.append(name)
+        self.exact[key] = i
+        for g in trigrams(key):
+            self.grams[g].add(i)
+        for token in key.split():
+            self.sounds[phonetic(token)].add(i)
+            self.tokens[token].add(i)
+
+    def _score(self, query: str, query_grams: set, query_sounds: set, i: int) -> float:
+        key = _stem(normalize(self.names[i]))
+        grams = trigrams(key)
+        score = len(query_grams & grams) / len(query_grams | grams)
+        tokens = key.split()
+        if query_sounds & {phonetic(t) for t in tokens}:
+            score += 0.2
+        if set(query.split()) <= set(tokens):
+            score += 0.3   # "smith" -> "jane smith"
+        return score
+
+    def resolve(self, query: str, min_score: float = MIN_SCORE):
+        """Canonical name for query, or None if nothing is close enough or it is ambiguous."""
+        q = _stem(normalize(query or ""))
+        if not q:
+            return None
+        if q in self.exact:
+            return self.names[self.exact[q]]
+
+        q_grams = trigrams(q)
+        q_sounds = {phonetic(t) for t in q.split()}
+        candidates = set()
+        for g in q_grams:
+            candidates |= self.grams.get(g, set())
+        for s in q_sounds:
+            candidates |= self.sounds.get(s, set())
+        if not candidates:
+            return None
+
+        scored = sorted(((self._score(q, q_grams, q_sounds, i), i) for i in candidates), reverse=True)
+        best, i = scored[0]
+        if best < min_score:
+            return None
+        if len(scored) > 1 and best - scored[1][0] < 0.05:
+            return None   # two equally good matches, e.g. "smith" with two Smiths
+        return self.names[i]
+
+
+class Names:
+    """Doctor and specialization indexes for one version of the slot index."""
+
+    def __init__(self, version, doctors, specializations):
+        self.version = version
+        self.doctors = NameIndex(sorted(doctors))
+        self.specializations = NameIndex(sorted(specializations))
+
+
+_names = None
+_names_lock = threading.Lock()
+
+
+def get_names() -> Names:
+    global _names
+    from slot_index import get_slot_index
+    index = get_slot_index()
+    with _names_lock:
+        if _names is None or _names.version != index.version:
+            _names = Names(index.version, index.doctor_names.values(), index.specialization_names.values())
+    return _names
+
+
+def resolve_doctor(name: str) -> str:
+    """Name as written in the availability CSV, or the input unchanged if unknown."""
+    if not name:
+        return name
+    return get_names().doctors.resolve(name) or name
+
+
+def resolve_specialization(specialization: str) -> str:
+    if not specialization:
+        return specialization
+    return get_names().specializations.resolve(specialization) or specialization
+
+
+MAX_ENUM = 200
+
+
+def tool_schemas(tools: list, enums: dict) -> list:
+    """
+    OpenAI-style schemas for `tools` with `enum` lists added to string
+    parameters named in `enums` (e.g. {"doctor_name": [...]}), so the model
+    picks from the names that exist right now.
+    """
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    schemas = []
+    for t in tools:
+        schema = convert_to_openai_tool(t)
+        properties = schema["function"].get("parameters", {}).get("properties", {})
+        for field, values in enums.items():
+            prop = properties.get(field)
+            if prop is not None and prop.get("type") == "string" and 0 < len(values) <= MAX_ENUM:
+                prop["enum"] = list(values)
+        schemas.append(schema)
+    return schemas
@@ -0,0 +1,291 @@
+# slot_index.py
+
+import heapq
+import os
+import re
+import threading
+from bisect import bisect_left
+from datetime import datetime
+from booking_journal import BookingStore, Compactor, export_csv
+
+AVAILABILITY_CSV = os.getenv("DOCTOR_AVAILABILITY_CSV", "doctor_availability.csv")
+
+
+def split_slot(date_slot: str):
+    """'DD-MM-YYYY H:MM' -> ('DD-MM-YYYY', 'H:MM')"""
+    parts = str(date_slot).strip().split(' ')
+    return parts[0], parts[-1]
+
+
+def time_to_minutes(value: str) -> int:
+    """Accepts 'H:MM', 'HH.MM' or 'HH' and returns minutes after midnight."""
+    parts = re.split(r"[:.]", str(value).strip())
+    hours = int(parts[0])
+    minutes = int(parts[1]) if len(parts) > 1 and parts[1] else 0
+    return hours * 60 + minutes
+
+
+def minutes_to_time(minutes: int) -> str:
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+def is_true(value) -> bool:
+    return str(value).strip().lower() in ("true", "1", "yes")
+
+
+def date_ordinal(date: str) -> int:
+    return datetime.strptime(date, "%d-%m-%Y").toordinal()
+
+
+def ordinal_date(ordinal: int) -> str:
+    return datetime.fromordinal(ordinal).strftime("%d-%m-%Y")
+
+
+def nearest(timeline: list, target: int, k: int, limit: int = None, low: int = None) -> list:
+    """The k values of the sorted `timeline` closest to `target`, at most `limit` away and none below `low`."""
+    first = bisect_left(timeline, low) if low is not None else 0
+    right = max(bisect_left(timeline, target), first)
+    left = right - 1
+    out = []
+    while len(out) < k and (left >= first or right < len(timeline)):
+        if right >= len(timeline) or (left >= first and target - timeline[left] <= timeline[right] - target):
+            value, left = timeline[left], left - 1
+        else:
+            value, right = timeline[right], right + 1
+        if limit is not None and abs(value - target) > limit:
+            break
+        out.append(value)
+    return out
+
+
+class DaySlots:
+    """All slots of one doctor on one day; bit i of `free` is set when slot i is open."""
+
+    __slots__ = ("minutes", "rows", "free")
+
+    def __init__(self):
+        self.minutes = []
+        self.rows = []
+        self.free = 0
+
+    def add(self, minutes: int, row: int, available: bool):
+        # CSV rows are usually already in time order, so this is an append
+        pos = len(self.minutes)
+        while pos > 0 and self.minutes[pos - 1] > minutes:
+            pos -= 1
+        self.minutes.insert(pos, minutes)
+        self.rows.insert(pos, row)
+        # Shift the bits above `pos` up by one and set the new one
+        low = self.free & ((1 << pos) - 1)
+        high = (self.free >> pos) << (pos + 1)
+        self.free = high | low | (int(available) << pos)
+
+    def position(self, minutes: int):
+        try:
+            return self.minutes.index(minutes)
+        except ValueError:
+            return None
+
+    def free_minutes(self) -> list:
+        bits, out, i = self.free, [], 0
+        while bits:
+            if bits & 1:
+                out.append(self.minutes[i])
+            bits >>= 1
+            i += 1
+        return out
+
+    def first_free(self):
+        if not self.free:
+            return None
+        return self.minutes[(self.free & -self.free).bit_length() - 1]
+
+
+class SlotIndex:
+    """
+    In-memory availability index over the booking store (snapshot + journal,
+    see booking_journal.py), seeded from the availability CSV.
+
+    Keyed by (doctor, date) and (specialization, date); lookups are dict hits
+    and bookings flip a bit in place and append one journal entry. Each doctor
+    also has a sorted timeline of free slots (date ordinal * 1440 + minute)
+    for nearest-slot suggestions by bisection, and doctors are grouped by
+    specialization so suggestions only visit the doctors that can stand in.
+    """
+
+    def __init__(self, path: str = AVAILABILITY_CSV):
+        self.path = path
+        self.store = BookingStore(path)
+        self.fieldnames = []
+        self.columns = {}
+        self.by_doctor = {}
+        self.by_specialization = {}
+        self.doctor_names = {}
+        self.specialization_names = {}
+        self.doctor_specialization = {}
+        self.doctors_by_specialization = {}
+        self.free_timeline = {}
+        self.version = 0
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        self.fieldnames, self.columns = self.store.open()
+        date_slots = self.columns["date_slot"]
+        doctors = self.columns["doctor_name"]
+        specializations = self.columns.get("specialization", [""] * len(date_slots))
+        available = self.columns["is_available"]
+
+        self.by_doctor.clear()
+        self.by_specialization.clear()
+        self.doctor_names.clear()
+        self.specialization_names.clear()
+        self.doctor_specialization.clear()
+        self.doctors_by_specialization.clear()
+        self.free_timeline.clear()
+        ordinals = {}
+        for i in range(len(date_slots)):
+            date, time = split_slot(date_slots[i])
+            doctor = doctors[i].strip().lower()
+            self.doctor_names.setdefault(doctor, doctors[i].strip())
+
+            day = self.by_doctor.get((doctor, date))
+            if day is None:
+                day = self.by_doctor[(doctor, date)] = DaySlots()
+                spec = specializations[i].strip().lower()
+                if spec:
+                    self.specialization_names.setdefault(spec, specializations[i].strip())
+                self.by_specialization.setdefault((spec, date), []).append(doctor)
+                if doctor not in self.doctor_specialization:
+                    self.doctor_specialization[doctor] = spec
+                    self.doctors_by_specialization.setdefault(spec, []).append(doctor)
+            minutes = time_to_minutes(time)
+            day.add(minutes, i, is_true(available[i]))
+            if is_true(available[i]):
+                if date not in ordinals:
+                    ordinals[date] = date_ordinal(date)
+                self.free_timeline.setdefault(doctor, []).append(ordinals[date] * 1440 + minutes)
+        for timeline in self.free_timeline.values():
+            timeline.sort()
+        self.version += 1
+
+    def day(self, doctor_name: str, date: str):
+        return self.by_doctor.get((doctor_name.strip().lower(), date))
+
+    def available(self, doctor_name: str, date: str) -> list:
+        day = self.day(doctor_name, date)
+        return [minutes_to_time(m) for m in day.free_minutes()] if day else []
+
+    def available_by_specialization(self, specialization: str, date: str) -> dict:
+        doctors = self.by_specialization.get((specialization.strip().lower(), date), [])
+        out = {}
+        for doctor in doctors:
+            free = self.by_doctor[(doctor, date)].free_minutes()
+            if free:
+                out[self.doctor_names[doctor]] = [minutes_to_time(m) for m in free]
+        return out
+
+    def first_free(self, doctor_name: str, date: str):
+        day = self.day(doctor_name, date)
+        minutes = day.first_free() if day else None
+        return minutes_to_time(minutes) if minutes is not None else None
+
+    def book(self, doctor_name: str, date: str, time: str) -> bool:
+        """Mark a slot as taken. Returns False if it doesn't exist or is already taken."""
+        day = self.day(doctor_name, date)
+        if day is None:
+            return False
+        with self.lock:
+            pos = day.position(time_to_minutes(time))
+            if pos is None or not (day.free >> pos) & 1:
+                return False
+            row = day.rows[pos]
+            # Journal first: if the append fails the slot stays free
+            self.store.append(row, {"is_available": "False"}, doctor=doctor_name, date=date, time=time)
+            day.free &= ~(1 << pos)
+            self.columns["is_available"][row] = "False"
+            timeline = self.free_timeline.get(doctor_name.strip().lower(), [])
+            value = date_ordinal(date) * 1440 + day.minutes[pos]
+            j = bisect_left(timeline, value)
+            if j < len(timeline) and timeline[j] == value:
+                del timeline[j]
+            return True
+
+    def suggest(self, doctor_name: str, date: str, time: str = None, k: int = 3, window_days: int = 7,
+                now: datetime = None) -> dict:
+        """
+        The k free slots nearest to `date` `time` (midday if no time) within
+        `window_days`, for the doctor and, merged, for the other doctors with
+        the same specialization. Slots before `now` (default: the current
+        time) are never suggested:
+
+            {"suggested": [(date, time)], "alternatives": [(doctor, date, time)]}
+        """
+        doctor = doctor_name.strip().lower()
+        target = date_ordinal(date) * 1440 + (time_to_minutes(time) if time else 12 * 60)
+        limit = window_days * 1440
+        now = now or datetime.now()
+        low = now.toordinal() * 1440 + now.hour * 60 + now.minute
+        slot = lambda v: (ordinal_date(v // 1440), minutes_to_time(v % 1440))
+
+        with self.lock:
+            own = [slot(v) for v in nearest(self.free_timeline.get(doctor, []), target, k, limit, low)]
+            spec = self.doctor_specialization.get(doctor)
+            others = []
+            if spec:
+                for other in self.doctors_by_specialization.get(spec, ()):
+                    if other != doctor:
+                        others.extend((abs(v - target), other, v)
+                                      for v in nearest(self.free_timeline.get(other, []), target, k, limit, low))
+        return {
+            "suggested": own,
+            "alternatives": [(self.doctor_names[o], *slot(v)) for _, o, v in heapq.nsmallest(k, others)],
+        }
+
+    def is_booked(self, doctor_name: str, date: str, time: str) -> bool:
+        day = self.day(doctor_name, date)
+        pos = day.position(time_to_minutes(time)) if day else None
+        return pos is not None and not (day.free >> pos) & 1
+
+    def compact(self):
+        """Fold the journal into a new snapshot."""
+        with self.lock:
+            columns = {name: list(values) for name, values in self.columns.items()}
+            seq = self.store.seq
+        self.store.compact(self.fieldnames, columns, seq)
+
+    def export(self, path: str):
+        """Write the current schedule as a CSV (for people and other tools)."""
+        with self.lock:
+            columns = {name: list(values) for name, values in self.columns.items()}
+        export_csv(path, self.fieldnames, columns)
+        if os.path.abspath(path) == os.path.abspath(self.store.csv_path):
+            # The CSV now holds every booking; record it so the next load doesn't reseed
+            self.store.source = self.store.csv_fingerprint()
+            self.compact()
+
+
+_index = None
+_compactor = None
+_index_lock = threading.Lock()
+
+
+def get_slot_index() -> SlotIndex:
+    """Load the availability index on first use and reuse it afterwards."""
+    global _index, _compactor
+    with _index_lock:
+        if _index is None:
+            _index = SlotIndex()
+            _compactor = Compactor(_index).start()
+    return _index
+
+
+def close_slot_index():
+    """Stop the compactor and close the journal."""
+    global _index, _compactor
+    with _index_lock:
+        if _compactor is not None:
+            _compactor.stop()
+        if _index is not None:
+            _index.store.close()
+        _index = _compactor = None
@@ -0,0 +1,12 @@
+# state.py
+
+from typing_extensions import TypedDict, NotRequired
+from typing import Annotated
+from langchain_core.messages import BaseMessage
+from langgraph.graph.message import add_messages
+
+
+class State(TypedDict):
+    messages: Annotated[list[BaseMessage], add_messages]
+    thread_id: str
+    summary: NotRequired[str]
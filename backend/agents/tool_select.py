@@ -0,0 +1,59 @@
+# tool_select.py
+"""
+Per-turn tool subset selection.
+
+Binding all seven tool schemas costs prompt tokens on every chatbot call,
+while most turns need one or two tools. select_tools() looks at the latest
+user messages and at the tools already called this turn, and returns the
+names to bind, or None (bind everything) when it can't tell.
+"""
+import os
+import re
+from langchain_core.messages import AIMessage, HumanMessage
+
+TOOL_SELECTION = os.getenv("TOOL_SELECTION", "1") == "1"
+
+# Always offered: cheap to bind and the fallback for anything unmatched
+ALWAYS = ("general_query",)
+
+KEYWORDS = [
+    (r"\b(book|reserve|appointment|schedule|visit|confirm\w*|see (?:a |the )?(?:dr|doctor))", ("set_appointment", "confirm_appointment", "check_availability_by_doctor", "suggest_alternatives")),
+    (r"\b(reschedul\w*|move|postpone|change (?:my|the) (?:appointment|time|date))", ("reschedule_appointment", "check_availability_by_doctor")),
+    (r"\b(availab\w*|free|slots?|open|when can)", ("check_availability_by_doctor", "check_availability_by_specialization")),
+    (r"\b(specialists?|dentists?|surgeons?|orthodontists?|\w+ologists?|specializations?)\b", ("check_availability_by_specialization",)),
+    (r"\b(alternatives?|other (?:times?|slots?|days?|doctors?)|nearest|earliest|next (?:free|available|slot)|instead|taken|unavailable)", ("suggest_alternatives",)),
+    (r"\b(hours|open(?:ing)? times?|contact|phone|call you|address|location|where|fees?|cost|insurance)\b", ALWAYS),
+]
+_PATTERNS = [(re.compile(p, re.I), names) for p, names in KEYWORDS]
+
+# Text of this many recent user messages decides the phase of the conversation,
+# so "yes, 10:30 works" after "book me with Dr Smith" still gets the booking tools
+RECENT_USER_MESSAGES = 2
+
+
+def _recent_turn(messages: list):
+    """(recent user text, tools called since the last user message)."""
+    texts, called = [], set()
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            texts.append(message.content if isinstance(message.content, str) else str(message.content))
+            if len(texts) == RECENT_USER_MESSAGES:
+                break
+        elif isinstance(message, AIMessage) and not texts:
+            called.update(call["name"] for call in message.tool_calls or ())
+    return " ".join(reversed(texts)), called
+
+
+def select_tools(state) -> tuple:
+    """Sorted tool names for this turn, or None to bind every tool."""
+    if not TOOL_SELECTION:
+        return None
+    text, called = _recent_turn(state["messages"])
+    selected = set(called)
+    for pattern, names in _PATTERNS:
+        if pattern.search(text):
+            selected.update(names)
+    if not selected:
+        return None
+    return tuple(sorted(selected | set(ALWAYS)))
+
@@ -0,0 +1,158 @@
+# tools.py
+
+import re
+from datetime import datetime
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+from model import DateModel
+from slot_index import get_slot_index
+from answer_cache import get_answer_cache
+from names import resolve_doctor, resolve_specialization
+
+
+def _suggestions(doctor_name: str, date: str, time: str = None, k: int = 3) -> str:
+    """Nearest free slots with the doctor and with same-specialization doctors, as text."""
+    try:
+        found = get_slot_index().suggest(doctor_name, date, time, k)
+    except ValueError:
+        return ""
+    lines = []
+    if found["suggested"]:
+        lines.append(f"Nearest free slots with {doctor_name}: " + ", ".join(f"{d} {t}" for d, t in found["suggested"]))
+    if found["alternatives"]:
+        lines.append("Other doctors: " + ", ".join(f"{doc} on {d} {t}" for doc, d, t in found["alternatives"]))
+    return "\n" + "\n".join(lines) if lines else ""
+
+
+@tool
+def check_availability_by_doctor(desired_date: DateModel, doctor_name: str):
+    """
+    Check availability for a specific doctor on a specific date.
+    """
+    doctor_name = resolve_doctor(doctor_name)
+    rows = get_slot_index().available(doctor_name, desired_date.date)
+
+    if not rows:
+        return "No availability in the entire day" + _suggestions(doctor_name, desired_date.date)
+    return f'Availability for {desired_date.date}\nAvailable slots: ' + ', '.join(rows)
+
+
+ # Assuming you're using LangChain tool decorator
+
+@tool
+def check_availability_by_specialization(desired_date: str, specialization: str):
+    """
+    Check availability for a specialization on a specific date (flexible input).
+    """
+    specialization = resolve_specialization(specialization)
+
+    # Normalize date input to DD-MM-YYYY if needed
+    try:
+        date_obj = datetime.strptime(desired_date.strip(), "%d-%m-%Y")
+        desired_date = date_obj.strftime("%d-%m-%Y")
+    except:
+        pass
+
+    rows = get_slot_index().available_by_specialization(specialization, desired_date)
+
+    if len(rows) == 0:
+        return f"No availability for {specialization} on {desired_date}."
+
+    def convert_to_am_pm(time_str):
+        hours, minutes = map(int, str(time_str).split(":"))
+        period = "AM" if hours < 12 else "PM"
+        hours = hours % 12 or 12
+        return f"{hours}:{minutes:02d} {period}"
+
+    output = f"Availability for {desired_date}\n"
+    for doctor, slots in rows.items():
+        output += f"{doctor} - Available slots: \n" + ', \n'.join([convert_to_am_pm(value) for value in slots]) + '\n'
+    return output
+
+
+@tool
+def set_appointment(desired_date: str, doctor_name: str):
+    """
+    Book an appointment for the given date and doctor.
+    Accepts just 'DD-MM-YYYY' or 'DD-MM-YYYY HH:MM'.
+    If only date is given, picks the first available slot.
+    """
+    doctor_name = resolve_doctor(doctor_name)
+    index = get_slot_index()
+    date_input = desired_date.strip()
+
+    # If only date provided
+    if re.match(r"^\d{2}-\d{2}-\d{4}$", date_input):
+        date, time = date_input, index.first_free(doctor_name, date_input)
+        if time is None:
+            return f"❌ No available slots for {doctor_name} on {date_input}." + _suggestions(doctor_name, date_input)
+        desired_date = f"{date} {time}"
+    else:
+        try:
+            slot = datetime.strptime(date_input, "%d-%m-%Y %H:%M")
+            date, time = slot.strftime("%d-%m-%Y"), f"{slot.hour}:{slot.minute:02d}"
+        except:
+            return "❌ Invalid date format. Please use 'DD-MM-YYYY' or 'DD-MM-YYYY HH:MM'."
+
+    # Check availability and take the slot
+    if not index.book(doctor_name, date, time):
+        return (f"❌ Slot with {doctor_name} at {desired_date} is already booked or unavailable."
+                + _suggestions(doctor_name, date, time))
+
+    return f"✅ Appointment confirmed with {doctor_name} on {desired_date}."
+
+
+@tool
+def confirm_appointment(desired_date: str, doctor_name: str):
+    """
+    Confirms an appointment if available.
+    """
+    # Read-only: the booking was already journaled by set_appointment
+    doctor_name = resolve_doctor(doctor_name)
+    try:
+        slot = datetime.strptime(desired_date.strip(), "%d-%m-%Y %H:%M")
+    except ValueError:
+        return "❌ Invalid date format. Please use 'DD-MM-YYYY HH:MM'."
+    date, time = slot.strftime("%d-%m-%Y"), f"{slot.hour}:{slot.minute:02d}"
+    if not get_slot_index().is_booked(doctor_name, date, time):
+        return f"❌ No booking with {doctor_name} on {desired_date}. Book the slot first."
+
+    return f"✅ Appointment confirmed with {doctor_name} on {desired_date}."
+
+
+@tool
+def suggest_alternatives(doctor_name: str, desired_date: str):
+    """
+    Suggest the nearest free slots to 'DD-MM-YYYY' or 'DD-MM-YYYY HH:MM' with
+    this doctor, and with other doctors of the same specialization.
+    """
+    doctor_name = resolve_doctor(doctor_name)
+    date, _, time = desired_date.strip().partition(" ")
+    text = _suggestions(doctor_name, date, time.strip() or None).strip()
+    return text or f"No free slots with {doctor_name} or same-specialization doctors within a week of {desired_date}."
+
+
+@tool
+def general_query(query: str) -> str:
+    """Responds to any kind of general query like 'What is AI?', 'Tell me a joke', or 'Summarize a paragraph'."""
+    from graph import get_llm
+    try:
+        return get_answer_cache().get_or_compute(
+            query, lambda q: get_llm().invoke([HumanMessage(content=q)]).content
+        )
+    except Exception as e:
+        return f"Error while processing your query: {str(e)}"
+
+
+@tool
+def reschedule_appointment(old_date: str, new_date: str, doctor_name: str):
+    """
+    Reschedule an appointment.
+    """
+    
+
+    return set_appointment(new_date, doctor_name)
+
+
+tools = [check_availability_by_doctor, check_availability_by_specialization,
+         set_appointment, reschedule_appointment, confirm_appointment, suggest_alternatives, general_query]
@@ -0,0 +1,16 @@
+# tests/conftest.py
+
+"""
+backend/agents modules import each other by bare name, as when run from
+that directory:
+
+    cd backend && python -m pytest -q tests
+"""
+
+import os
+import sys
+
+AGENTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agents")
+
+if AGENTS not in sys.path:
+    sys.path.insert(0, AGENTS)
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+
+from answer_cache import AnswerCache, normalize_question
+
+
+def test_question_words_and_order_are_kept():
+    keys = {normalize_question(q) for q in ("Where is the clinic?", "When is the clinic?", "What does the clinic do?")}
+    assert len(keys) == 3
+    assert normalize_question("dog bites man") != normalize_question("man bites dog")
+    assert normalize_question("What are your working hours?") == normalize_question("what are the working hours")
+
+
+def test_hits_and_misses_are_counted():
+    cache = AnswerCache()
+    assert cache.get_or_compute("Where is the clinic?", lambda q: "12 Main St") == "12 Main St"
+    assert cache.get_or_compute("where is the clinic", lambda q: "computed") == "12 Main St"
+    assert cache.stats == {"miss": 1, "hit": 1}
+
+
+def test_async_embedder_runs_off_the_event_loop():
+    threads = []
+
+    def embedder(text):
+        threads.append(threading.get_ident())
+        return [1.0, float(len(text))]
+
+    cache = AnswerCache(embedder=embedder, threshold=0.99)
+
+    async def acompute(question):
+        return "answer"
+
+    async def main():
+        await cache.aget_or_compute("working hours", acompute)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+    assert threads and loop_thread not in threads
@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from slot_index import SlotIndex
+
+ROWS = [
+    ("01-09-2025 9:00", "dentist", "Jane Smith", "True"),
+    ("01-09-2025 9:30", "dentist", "Jane Smith", "True"),
+    ("01-09-2025 10:00", "dentist", "Jane Smith", "True"),
+    ("01-09-2025 9:00", "dentist", "John Doe", "True"),
+]
+
+
+def write_csv(path, rows=ROWS):
+    with open(path, "w", newline="") as f:
+        f.write("date_slot,specialization,doctor_name,is_available,patient_to_attend\n")
+        for row in rows:
+            f.write(",".join(row) + ",\n")
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = str(tmp_path / "doctor_availability.csv")
+    write_csv(path)
+    return path
+
+
+def reopen(index):
+    index.store.close()
+    return SlotIndex(index.path)
+
+
+def test_bookings_are_replayed_from_the_journal(csv_path):
+    index = SlotIndex(csv_path)
+    assert index.book("Jane Smith", "01-09-2025", "9:30")
+    index = reopen(index)
+    assert index.available("Jane Smith", "01-09-2025") == ["9:00", "10:00"]
+    assert index.store.pending == 1
+
+
+def test_torn_journal_tail_is_dropped(csv_path):
+    index = SlotIndex(csv_path)
+    assert index.book("Jane Smith", "01-09-2025", "9:00")
+    index.store.close()
+    with open(index.store.journal_path, "ab") as f:
+        f.write(b'{"seq":2,"row":1,"set":{"is_avail')
+    index = SlotIndex(csv_path)
+    assert index.available("Jane Smith", "01-09-2025") == ["9:30", "10:00"]
+    assert index.book("Jane Smith", "01-09-2025", "9:30")
+    assert reopen(index).available("Jane Smith", "01-09-2025") == ["10:00"]
+
+
+def test_compacted_bookings_survive_reopen(csv_path):
+    index = SlotIndex(csv_path)
+    assert index.book("Jane Smith", "01-09-2025", "10:00")
+    index.compact()
+    assert os.path.getsize(index.store.journal_path) == 0
+    assert reopen(index).available("Jane Smith", "01-09-2025") == ["9:00", "9:30"]
+
+
+def test_changed_csv_reseeds_the_snapshot(csv_path):
+    index = SlotIndex(csv_path)
+    index.store.close()
+    write_csv(csv_path, ROWS + [("01-09-2025 11:00", "dentist", "Jane Smith", "True")])
+    index = SlotIndex(csv_path)
+    assert index.available("Jane Smith", "01-09-2025") == ["9:00", "9:30", "10:00", "11:00"]
+
+
+def test_touched_but_identical_csv_keeps_the_snapshot(csv_path):
+    index = SlotIndex(csv_path)
+    assert index.book("Jane Smith", "01-09-2025", "9:00")
+    index.store.close()
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert SlotIndex(csv_path).available("Jane Smith", "01-09-2025") == ["9:30", "10:00"]
+
+
+def test_changed_csv_with_uncompacted_bookings_fails_loudly(csv_path):
+    index = SlotIndex(csv_path)
+    assert index.book("Jane Smith", "01-09-2025", "9:00")
+    index.store.close()
+    write_csv(csv_path, ROWS[:2])
+    with pytest.raises(RuntimeError, match="booking"):
+        SlotIndex(csv_path)
+
+
+def test_export_over_the_csv_does_not_reseed(csv_path):
+    index = SlotIndex(csv_path)
+    assert index.book("Jane Smith", "01-09-2025", "9:00")
+    index.export(csv_path)
+    assert index.book("John Doe", "01-09-2025", "9:00")
+    index = reopen(index)
+    assert index.available("Jane Smith", "01-09-2025") == ["9:30", "10:00"]
+    assert index.available("John Doe", "01-09-2025") == []
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+
+from history import make_summarize_node
+
+
+class SummaryLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(content="Ann booked Dr Smith")
+
+
+def turns(n: int) -> list:
+    messages = []
+    for i in range(n):
+        messages += [HumanMessage(content=f"question {i}", id=f"h{i}"), AIMessage(content=f"answer {i}", id=f"a{i}")]
+    return messages
+
+
+def test_history_grows_to_twice_the_window_before_summarizing():
+    llm = SummaryLLM()
+    summarize = make_summarize_node(llm, window=4, summarize_at=8)
+    assert summarize({"messages": turns(3), "summary": ""}) == {}
+    assert llm.calls == 0
+
+    update = summarize({"messages": turns(4), "summary": ""})
+    assert update["summary"] == "Ann booked Dr Smith"
+    assert [m.id for m in update["messages"]] == ["h0", "a0", "h1", "a1"]
+    assert all(isinstance(m, RemoveMessage) for m in update["messages"])
+    assert llm.calls == 1
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+from conftest import AGENTS
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "100"))
+
+SCRIPT = """
+import sys, time
+t = time.perf_counter()
+import graph
+print((time.perf_counter() - t) * 1000)
+heavy = ("langgraph", "langchain_core.tools", "langchain_google_genai", "pymongo", "pandas", "model", "tools", "state")
+loaded = [m for m in heavy if m in sys.modules]
+assert not loaded, loaded
+"""
+
+
+def import_ms() -> float:
+    # No credentials, so any client created at import time fails loudly
+    env = {k: v for k, v in os.environ.items() if k not in ("MONGO_URI", "MONGODB_URI", "GOOGLE_API_KEY")}
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=AGENTS, capture_output=True, text=True,
+                            env={**env, "PYTHONPATH": AGENTS})
+    assert result.returncode == 0, result.stderr
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def test_graph_imports_lazily_within_budget():
+    assert min(import_ms() for _ in range(3)) <= IMPORT_BUDGET_MS
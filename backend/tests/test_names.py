@@ -0,0 +1,7 @@
+from names import NameIndex
+
+
+def test_typos_resolve_to_the_stored_spelling():
+    index = NameIndex(["Jane Smith", "John Doe"])
+    assert index.resolve("jon do") == "John Doe"
+    assert index.resolve("dr jane smith") == "Jane Smith"
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+
+from slot_index import SlotIndex
+
+# Before every slot in ROWS
+NOW = datetime(2025, 8, 1)
+
+ROWS = [
+    ("01-09-2025 9:00", "dentist", "Jane Smith", "False"),
+    ("01-09-2025 9:30", "dentist", "Jane Smith", "True"),
+    ("02-09-2025 9:00", "dentist", "Jane Smith", "True"),
+    ("01-09-2025 9:00", "dentist", "John Doe", "True"),
+    ("01-09-2025 10:00", "dentist", "John Doe", "True"),
+    ("01-09-2025 9:00", "orthodontist", "Ann Lee", "True"),
+]
+
+
+def write_csv(path, rows):
+    path.write_text("date_slot,specialization,doctor_name,is_available,patient_to_attend\n"
+                    + "".join(",".join(row) + ",\n" for row in rows))
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / "doctor_availability.csv"
+    write_csv(path, ROWS)
+    index = SlotIndex(str(path))
+    yield index
+    index.store.close()
+
+
+def test_doctors_are_grouped_by_specialization(index):
+    assert index.doctors_by_specialization == {"dentist": ["jane smith", "john doe"], "orthodontist": ["ann lee"]}
+
+
+def test_suggest_nearest_own_slots_and_same_specialization_alternatives(index):
+    result = index.suggest("Jane Smith", "01-09-2025", "9:00", k=2, now=NOW)
+    assert result["suggested"] == [("01-09-2025", "9:30"), ("02-09-2025", "9:00")]
+    assert result["alternatives"] == [("John Doe", "01-09-2025", "9:00"), ("John Doe", "01-09-2025", "10:00")]
+
+
+def test_booked_slots_leave_the_timeline(index):
+    assert index.book("John Doe", "01-09-2025", "9:00")
+    assert index.suggest("Jane Smith", "01-09-2025", "9:00", k=1, now=NOW)["alternatives"] == [("John Doe", "01-09-2025", "10:00")]
+
+
+def test_window_limits_suggestions(index):
+    assert index.suggest("Jane Smith", "20-09-2025", "9:00", window_days=7, now=NOW) == {"suggested": [], "alternatives": []}
+
+
+def test_past_slots_are_never_suggested(index):
+    result = index.suggest("Jane Smith", "01-09-2025", "9:00", k=2, now=datetime(2025, 9, 1, 9, 45))
+    assert result["suggested"] == [("02-09-2025", "9:00")]
+    assert result["alternatives"] == [("John Doe", "01-09-2025", "10:00")]
+
+
+def test_reload_forgets_removed_doctors(index, tmp_path):
+    write_csv(tmp_path / "doctor_availability.csv", [row for row in ROWS if row[2] != "Ann Lee"])
+    index.load()
+    assert "ann lee" not in index.doctor_names
@@ -0,0 +1,15 @@
+from langchain_core.messages import HumanMessage
+
+import tool_select
+
+
+def test_tool_selection_uses_backend_tool_names():
+    state = {"messages": [HumanMessage(content="Can I book Dr Smith tomorrow?")]}
+    assert tool_select.select_tools(state) == (
+        "check_availability_by_doctor", "confirm_appointment", "general_query",
+        "set_appointment", "suggest_alternatives",
+    )
+
+
+def test_unmatched_text_binds_every_tool():
+    assert tool_select.select_tools({"messages": [HumanMessage(content="hello")]}) is None
@@ -1,10 +1,23 @@
 import streamlit as st
-import time
-from graph import run_graph
+import uuid
+from graph import stream_graph, get_runtime
+
+
+@st.cache_resource
+def load_runtime():
+    # One runtime per Streamlit process, shared by every session and rerun
+    return get_runtime()
+
+
+load_runtime()
 
 if 'message_history' not in st.session_state:
     st.session_state['message_history'] = []
 
+# Each browser session gets its own conversation thread
+if 'thread_id' not in st.session_state:
+    st.session_state['thread_id'] = str(uuid.uuid4())
+
 # Show chat history
 for message in st.session_state['message_history']:
     with st.chat_message(message['role']):
@@ -19,17 +32,20 @@ if user_input:
     with st.chat_message("user"):
         st.markdown(user_input)
 
-    # Get assistant reply
+    # Stream the assistant reply as it is generated
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            response = run_graph(user_input)
-
-            # Typing effect simulation
-            placeholder = st.empty()
-            typed_text = ""
-            for char in response:
-                typed_text += char
-                placeholder.markdown(typed_text)
-                time.sleep(0.015)  # typing delay
-
-            st.session_state['message_history'].append({'role': 'assistant', 'content': response})
+        status = st.empty()
+
+        def reply_tokens():
+            for kind, payload in stream_graph(user_input, st.session_state['thread_id']):
+                if kind == "tool":
+                    status.caption(f"🔧 Running {payload}...")
+                else:
+                    yield payload
+            status.empty()
+
+        response = st.write_stream(reply_tokens())
+        if not isinstance(response, str):
+            response = "".join(str(part) for part in response)
+
+        st.session_state['message_history'].append({'role': 'assistant', 'content': response})